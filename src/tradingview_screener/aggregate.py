@@ -0,0 +1,393 @@
+"""
+Aggregate the results of a query by group (like `sector`, `industry`, or `exchange`).
+
+`GroupBy` computes per-group counts, sums, means, weighted means and quantiles of many columns
+with `np.bincount()` and a single sort per column, rather than a pandas `groupby` per statistic.
+The group of every row (the "group index") is the expensive part, so it's kept between calls,
+and only rebuilt when the group columns of the new result differ (row by row) from the previous
+one. Polling the same query again usually keeps the same rows in the same order, so the
+following calls only re-aggregate the values.
+
+Examples:
+
+>>> by_sector = GroupBy('sector')
+>>> q = Query().select('sector', 'change', 'market_cap_basic').limit(10_000)
+>>> _, df = q.get_scanner_data()
+>>> by_sector.aggregate(
+...     df,
+...     n=('change', 'count'),
+...     median_change=('change', 'median'),
+...     cap_weighted_change=('change', 'wmean', 'market_cap_basic'),
+...     total_cap=('market_cap_basic', 'sum'),
+... )
+                         n  median_change  cap_weighted_change     total_cap
+sector
+Commercial Services    412          0.452                0.713  1.592112e+12
+...
+
+The aggregations are `(column, func)` tuples, where `func` is one of:
+
+- `'size'` (the number of rows, including the nulls), `'count'`, `'sum'`, `'mean'`, `'min'`,
+  `'max'`, `'median'`
+- a float between 0 and 1, for a quantile (with linear interpolation, like pandas)
+- `'wmean'`, with the column of the weights as the third item: `('change', 'wmean', 'volume')`
+
+The nulls are ignored (like in pandas), and so are the rows whose group is null.
+
+When only a few tickers change between polls, `IncrementalAggregate` keeps running counts, sums
+and weighted sums instead, and updates them from the changes only (see `diff.ChangeTracker`).
+"""
+
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+from tradingview_screener.diff import ChangeTracker
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+    from typing import Union
+
+    import numpy as np
+    import pandas as pd
+    from typing_extensions import TypeAlias
+
+    from tradingview_screener.diff import ChangeEvent
+
+    # `(column, func)` or `(column, 'wmean', weights)`
+    Aggregation: TypeAlias = Union[tuple[str, Union[str, float]], tuple[str, str, str]]
+
+
+REDUCTIONS = frozenset(['size', 'count', 'sum', 'mean', 'min', 'max', 'median', 'wmean'])
+
+
+class GroupIndex:
+    """
+    The group of every row of a result.
+
+    :ivar codes: The position of the group of each row (in `groups`), or -1 if it's null.
+    :ivar groups: The unique (sorted) groups.
+    :ivar sizes: The number of rows of each group.
+    """
+
+    def __init__(self, keys: Sequence[pd.Series]) -> None:
+        import numpy as np
+        import pandas as pd
+
+        self.keys = [pd.Index(k) for k in keys]
+        if len(keys) == 1:
+            codes, groups = pd.factorize(keys[0], sort=True)
+            groups = pd.Index(groups, name=keys[0].name)
+        else:
+            valid = np.logical_and.reduce([k.notna().to_numpy() for k in keys])
+            index = pd.MultiIndex.from_arrays([k[valid] for k in keys])
+            codes = np.full(len(valid), -1, dtype='int64')
+            codes[valid], groups = index.factorize(sort=True)
+        self.codes: np.ndarray = codes
+        self.groups: pd.Index = groups
+        self.sizes = np.bincount(codes[codes >= 0], minlength=len(groups))
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def matches(self, keys: Sequence[pd.Series]) -> bool:
+        """
+        Check if the rows of another result are in the same groups (in the same order).
+        """
+        import pandas as pd
+
+        return len(keys) == len(self.keys) and all(
+            len(new) == len(old) and old.equals(pd.Index(new)) for old, new in zip(self.keys, keys)
+        )
+
+    def _reduce(self, values: np.ndarray, func: str, weights: np.ndarray | None) -> np.ndarray:
+        import numpy as np
+
+        n = len(self.groups)
+        if func == 'size':
+            return self.sizes.astype('float64')
+        valid = (self.codes >= 0) & ~np.isnan(values)
+        if weights is not None:
+            valid &= ~np.isnan(weights)
+        codes = self.codes[valid]
+        values = values[valid]
+        counts = np.bincount(codes, minlength=n).astype('float64')
+        if func == 'count':
+            return counts
+        if func == 'sum':
+            return np.bincount(codes, weights=values, minlength=n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if func == 'mean':
+                return np.bincount(codes, weights=values, minlength=n) / counts
+            # func == 'wmean'
+            w = weights[valid]  # pyright: ignore [reportOptionalSubscript]
+            total = np.bincount(codes, weights=w, minlength=n)
+            return np.bincount(codes, weights=values * w, minlength=n) / total
+
+    def _quantile(self, values: np.ndarray, q: float) -> np.ndarray:
+        import numpy as np
+
+        valid = (self.codes >= 0) & ~np.isnan(values)
+        codes = self.codes[valid]
+        # sorted by group, and by value within each group
+        ordered = values[valid][np.lexsort((values[valid], codes))]
+        counts = np.bincount(codes, minlength=len(self.groups))
+        starts = np.cumsum(counts) - counts
+        position = q * (counts - 1)
+        lo = np.floor(position).astype('int64')
+        hi = np.ceil(position).astype('int64')
+        result = np.full(len(self.groups), np.nan)
+        nonempty = counts > 0
+        lo_values = ordered[(starts + lo)[nonempty]]
+        hi_values = ordered[(starts + hi)[nonempty]]
+        fraction = (position - lo)[nonempty]
+        result[nonempty] = lo_values + (hi_values - lo_values) * fraction
+        return result
+
+    def reduce(
+        self, values: np.ndarray, func: str | float, weights: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Aggregate the values of every group.
+
+        :param values: A float64 array with one value per row (nulls are NaN).
+        :param func: See the module docstring.
+        :param weights: The weights of `'wmean'`.
+        :return: A float64 array with one value per group.
+        """
+        quantiles = {'min': 0.0, 'max': 1.0, 'median': 0.5}
+        if isinstance(func, str) and func in quantiles:
+            func = quantiles[func]
+        if not isinstance(func, str):
+            if not 0 <= func <= 1:
+                raise ValueError(f'The quantile must be between 0 and 1, got {func}')
+            return self._quantile(values, func)
+        if func not in REDUCTIONS:
+            raise ValueError(f'Unknown aggregation {func!r}, must be one of {sorted(REDUCTIONS)}')
+        if func == 'wmean' and weights is None:
+            raise ValueError("'wmean' needs a column of weights: (column, 'wmean', weights)")
+        return self._reduce(values, func, weights)
+
+
+class GroupBy:
+    """
+    Aggregate consecutive results of a query by the same columns, see the module docstring.
+
+    :param by: The column (or columns) to group by.
+    """
+
+    def __init__(self, by: str | Sequence[str]) -> None:
+        self.by = [by] if isinstance(by, str) else list(by)
+        self.index: GroupIndex | None = None
+        self.builds = 0  # the number of times the group index was built
+
+    def reset(self) -> None:
+        self.index = None
+
+    def group_index(self, df: pd.DataFrame) -> GroupIndex:
+        """
+        Get the group index of a result, reusing the previous one if the groups didn't change.
+        """
+        keys = [df[c] for c in self.by]
+        if self.index is None or not self.index.matches(keys):
+            self.index = GroupIndex(keys)
+            self.builds += 1
+        return self.index
+
+    def aggregate(self, df: pd.DataFrame, **aggregations: Aggregation) -> pd.DataFrame:
+        """
+        Aggregate a result by group.
+
+        :param aggregations: `name=(column, func)` (or `name=(column, 'wmean', weights)`).
+        :return: A DataFrame with one row per group (sorted), and one column per aggregation.
+        """
+        import pandas as pd
+
+        index = self.group_index(df)
+        cache: dict[str, np.ndarray] = {}
+
+        def values(column: str) -> np.ndarray:
+            if column not in cache:
+                cache[column] = df[column].to_numpy(dtype='float64', na_value=float('nan'))
+            return cache[column]
+
+        result = {}
+        for name, (column, func, *rest) in aggregations.items():
+            weights = values(rest[0]) if rest else None
+            result[name] = index.reduce(values(column), func, weights)
+        return pd.DataFrame(result, index=index.groups)
+
+
+def aggregate(
+    df: pd.DataFrame, by: str | Sequence[str], **aggregations: Aggregation
+) -> pd.DataFrame:
+    """
+    Aggregate a single result by group (see `GroupBy` to reuse the group index across results).
+    """
+    return GroupBy(by).aggregate(df, **aggregations)
+
+
+def _number(x) -> float | None:
+    try:
+        x = float(x)
+    except (TypeError, ValueError):  # None, `pd.NA`, strings
+        return None
+    return None if math.isnan(x) else x
+
+
+class _Totals:
+    """
+    The running totals of a group.
+    """
+
+    __slots__ = ('advancing', 'count', 'declining', 'sum', 'weighted_sum', 'weights')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.sum = 0.0
+        self.weighted_sum = 0.0
+        self.weights = 0.0
+        self.advancing = 0
+        self.declining = 0
+
+    def add(self, value: float, weight: float | None, sign: int) -> None:
+        self.count += sign
+        self.sum += sign * value
+        if weight is not None:
+            self.weighted_sum += sign * value * weight
+            self.weights += sign * weight
+        self.advancing += sign * (value > 0)
+        self.declining += sign * (value < 0)
+        if self.count == 0:  # drop the rounding errors of the additions and subtractions
+            self.sum = self.weighted_sum = self.weights = 0.0
+
+    def row(self) -> dict:
+        count, weights = self.count, self.weights
+        return {
+            'count': count,
+            'sum': self.sum,
+            'mean': self.sum / count if count else math.nan,
+            'wmean': self.weighted_sum / weights if weights else math.nan,
+            'advancing': self.advancing,
+            'declining': self.declining,
+        }
+
+
+class IncrementalAggregate:
+    """
+    Aggregates of a column (overall and per group) that are updated from the changes between
+    consecutive results, rather than recomputed, see `diff.ChangeEvent`.
+
+    The tickers that didn't change cost nothing: every event subtracts the old contribution of
+    its ticker from the totals, and adds the new one.
+
+    >>> breadth = IncrementalAggregate('change', by='sector', weight='market_cap_basic')
+    >>> breadth.update(df)  # the first result adds every ticker
+    9214
+    >>> breadth.update(df2)  # then only the tickers that changed, entered, or exited
+    431
+    >>> breadth.result()
+                           count        sum      mean     wmean  advancing  declining
+    sector
+    Commercial Services      412    186.224  0.452000  0.713000        250        160
+    ...
+    >>> breadth.total()['advancing']
+    3120
+
+    With `Query.watch()`, the events can be applied directly:
+
+    >>> async for event in q.watch(10, key_columns=breadth.columns):
+    ...     breadth.apply([event])
+
+    :param value: The column to aggregate (the nulls are ignored).
+    :param by: The column of the groups (optional).
+    :param weight: The column of the weights for the weighted mean (optional).
+    :param id_column: The column that identifies the rows.
+    """
+
+    def __init__(
+        self,
+        value: str,
+        by: str | None = None,
+        weight: str | None = None,
+        id_column: str = 'ticker',
+    ) -> None:
+        self.value = value
+        self.by = by
+        self.weight = weight
+        self.columns = [c for c in (value, by, weight) if c is not None]
+        self._rows: dict[str, dict] = {}  # {ticker: the values of `columns`}
+        self._groups: dict = {}  # {group: _Totals}
+        self._total = _Totals()
+        self._tracker = ChangeTracker(self.columns, id_column)
+
+    def reset(self) -> None:
+        self._rows.clear()
+        self._groups.clear()
+        self._total = _Totals()
+        self._tracker.reset()
+
+    def _contribute(self, row: dict, sign: int) -> None:
+        value = _number(row.get(self.value))
+        if value is None:
+            return
+        weight = _number(row.get(self.weight)) if self.weight is not None else None
+        self._total.add(value, weight, sign)
+        if self.by is not None:
+            group = row.get(self.by)
+            if group is None or (isinstance(group, float) and math.isnan(group)):
+                return
+            totals = self._groups.get(group)
+            if totals is None:
+                totals = self._groups[group] = _Totals()
+            totals.add(value, weight, sign)
+            if totals.count == 0:
+                del self._groups[group]
+
+    def apply(self, events: Iterable[ChangeEvent]) -> None:
+        """
+        Update the aggregates from the changes of a result (in any order).
+        """
+        rows = self._rows
+        for event in events:
+            old = rows.get(event.ticker)
+            if old is not None:
+                self._contribute(old, -1)
+            if event.kind == 'exited':
+                rows.pop(event.ticker, None)
+                continue
+            new = {**old, **event.values} if old is not None else dict(event.values)
+            rows[event.ticker] = new
+            self._contribute(new, 1)
+
+    def update(self, df: pd.DataFrame) -> int:
+        """
+        Compare a result with the previous one (see `diff.ChangeTracker`), and apply the changes.
+
+        :return: The number of changes.
+        """
+        events = self._tracker.update(df)
+        self.apply(events)
+        return len(events)
+
+    def result(self) -> pd.DataFrame:
+        """
+        The aggregates of every group (sorted).
+        """
+        import pandas as pd
+
+        groups = sorted(self._groups)
+        return pd.DataFrame(
+            [self._groups[group].row() for group in groups],
+            index=pd.Index(groups, name=self.by),
+            columns=list(_Totals().row()),
+        )
+
+    def total(self) -> pd.Series:
+        """
+        The aggregates of all the rows.
+        """
+        import pandas as pd
+
+        return pd.Series(self._total.row(), name=self.value)
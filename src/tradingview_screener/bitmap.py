@@ -0,0 +1,211 @@
+"""
+Combine the results of many screeners with AND, OR and NOT, as bitmaps.
+
+A `Universe` gives every ticker a fixed id (the first time it's seen), and a `Bitmap` is a set of
+tickers stored as one bit per id (so a universe of 100,000 tickers takes 12.5KB per bitmap). The
+set operations are vectorized over 64-bit words, so composing dozens of screeners takes a few
+microseconds, no matter how many tickers they have:
+
+>>> universe = Universe()
+>>> spx = universe.bitmap(members.members('SYML:SP;SPX'))
+>>> momentum = universe.from_response(momentum_query.get_scanner_data_raw())
+>>> earnings = universe.from_response(earnings_query.get_scanner_data_raw())
+>>> picks = spx & momentum & ~earnings
+>>> len(picks)
+17
+>>> picks.tickers()
+['NASDAQ:AAPL', 'NYSE:JPM', ...]
+>>> picks.filter(df)  # the rows of a result that are in the bitmap
+
+Bitmaps of the same universe can be combined even if they were built at different sizes (the
+universe only grows), the missing bits are zeros. `~bitmap` is the complement within the tickers
+that the universe had at the time.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from tradingview_screener.decode import split_response
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    import numpy as np
+    import pandas as pd
+
+    from tradingview_screener.models import ScreenerDict, ScreenerDictV2
+
+
+def _words(n: int) -> int:
+    return (n + 63) // 64
+
+
+class Universe:
+    """
+    A dictionary of tickers, that maps each one to a fixed id.
+    """
+
+    def __init__(self, tickers: Iterable[str] = ()) -> None:
+        self._ids: dict[str, int] = {}
+        self._tickers: list[str] = []
+        self.add(tickers)
+
+    def __len__(self) -> int:
+        return len(self._tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._ids
+
+    def add(self, tickers: Iterable[str]) -> None:
+        ids = self._ids
+        for ticker in tickers:
+            if ticker not in ids:
+                ids[ticker] = len(self._tickers)
+                self._tickers.append(ticker)
+
+    def ids(self, tickers: Sequence[str]) -> np.ndarray:
+        """
+        Get the ids of the tickers, adding the new ones.
+        """
+        import numpy as np
+
+        self.add(tickers)
+        ids = self._ids
+        return np.fromiter((ids[t] for t in tickers), dtype='int64', count=len(tickers))
+
+    def tickers(self, ids: np.ndarray) -> list[str]:
+        tickers = self._tickers
+        return [tickers[i] for i in ids.tolist()]
+
+    def bitmap(self, tickers: Sequence[str]) -> Bitmap:
+        """
+        Get the bitmap of some tickers.
+        """
+        return Bitmap.from_ids(self, self.ids(tickers))
+
+    def from_response(
+        self, json_obj: ScreenerDict | ScreenerDictV2, columns: Sequence[str] = ()
+    ) -> Bitmap:
+        """
+        Get the bitmap of the tickers of a response (see `Query.get_scanner_data_raw()`).
+        """
+        _, tickers, _ = split_response(json_obj, columns)
+        return self.bitmap(tickers)
+
+    def from_dataframe(self, df: pd.DataFrame, id_column: str = 'ticker') -> Bitmap:
+        """
+        Get the bitmap of the tickers of a DataFrame (see `Query.get_scanner_data()`).
+        """
+        return self.bitmap(df[id_column].tolist())
+
+    def all(self) -> Bitmap:
+        return ~self.empty()
+
+    def empty(self) -> Bitmap:
+        import numpy as np
+
+        return Bitmap(self, np.zeros(_words(len(self)), dtype='uint64'))
+
+
+class Bitmap:
+    """
+    A set of tickers of a `Universe`, one bit per ticker (see the module docstring).
+    """
+
+    __slots__ = ('universe', 'words')
+
+    def __init__(self, universe: Universe, words: np.ndarray) -> None:
+        self.universe = universe
+        self.words = words
+
+    @classmethod
+    def from_ids(cls, universe: Universe, ids: np.ndarray) -> Bitmap:
+        import numpy as np
+
+        bits = np.zeros(_words(len(universe)) * 64, dtype=bool)
+        bits[ids] = True
+        return cls(universe, np.packbits(bits, bitorder='little').view('<u8'))
+
+    def ids(self) -> np.ndarray:
+        """
+        The ids of the tickers, in increasing order.
+        """
+        import numpy as np
+
+        return np.flatnonzero(np.unpackbits(self.words.view('uint8'), bitorder='little'))
+
+    def tickers(self) -> list[str]:
+        """
+        The tickers, in the order they were added to the universe.
+        """
+        return self.universe.tickers(self.ids())
+
+    def filter(self, df: pd.DataFrame, id_column: str = 'ticker') -> pd.DataFrame:
+        """
+        Get the rows of a DataFrame whose tickers are in the bitmap.
+        """
+        return df.loc[df[id_column].isin(self.tickers())]
+
+    def __len__(self) -> int:
+        import numpy as np
+
+        return int(np.unpackbits(self.words.view('uint8')).sum())
+
+    def __bool__(self) -> bool:
+        return bool(self.words.any())
+
+    def __contains__(self, ticker: str) -> bool:
+        i = self.universe._ids.get(ticker)
+        if i is None or i >= len(self.words) * 64:
+            return False
+        return bool((int(self.words[i // 64]) >> (i % 64)) & 1)
+
+    def __repr__(self) -> str:
+        return f'<Bitmap {len(self)}/{len(self.universe)} tickers>'
+
+    def _aligned(self, other: Bitmap) -> tuple[np.ndarray, np.ndarray]:
+        import numpy as np
+
+        if not isinstance(other, Bitmap):
+            raise TypeError(f'Expected a Bitmap, got {type(other).__name__}')
+        if other.universe is not self.universe:
+            raise ValueError("Can't combine the bitmaps of different universes")
+        a, b = self.words, other.words
+        if len(a) < len(b):
+            a = np.concatenate([a, np.zeros(len(b) - len(a), dtype='uint64')])
+        elif len(b) < len(a):
+            b = np.concatenate([b, np.zeros(len(a) - len(b), dtype='uint64')])
+        return a, b
+
+    def __and__(self, other: Bitmap) -> Bitmap:
+        a, b = self._aligned(other)
+        return Bitmap(self.universe, a & b)
+
+    def __or__(self, other: Bitmap) -> Bitmap:
+        a, b = self._aligned(other)
+        return Bitmap(self.universe, a | b)
+
+    def __xor__(self, other: Bitmap) -> Bitmap:
+        a, b = self._aligned(other)
+        return Bitmap(self.universe, a ^ b)
+
+    def __sub__(self, other: Bitmap) -> Bitmap:
+        a, b = self._aligned(other)
+        return Bitmap(self.universe, a & ~b)
+
+    def __invert__(self) -> Bitmap:
+        import numpy as np
+
+        n = len(self.universe)
+        a, _ = self._aligned(Bitmap(self.universe, np.zeros(_words(n), dtype='uint64')))
+        words = ~a
+        if n % 64:  # the bits past the last ticker
+            words[-1] &= np.uint64((1 << (n % 64)) - 1)
+        return Bitmap(self.universe, words)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Bitmap) or other.universe is not self.universe:
+            return NotImplemented
+        a, b = self._aligned(other)
+        return bool((a == b).all())
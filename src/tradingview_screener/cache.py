@@ -0,0 +1,273 @@
+"""
+Cache the responses of the scanner API, and answer new queries from them when possible.
+
+Besides returning the response of a query that was already sent, `ResultCache` can answer a
+stricter query from the result of a looser one, without sending a request. For example, once
+this query was sent (and it returned all the rows that matched, i.e. `totalCount` <= 5000):
+
+>>> cache = ResultCache(ttl=60)
+>>> Query().select('name', 'close', 'volume').where(col('close') > 10).limit(5000).get_scanner_data(
+...     cache=cache
+... )
+
+this one is answered locally, by filtering, sorting, and slicing the rows of the first one:
+
+>>> Query().select('name', 'close').where(col('close') > 20, col('volume') > 1e6).order_by(
+...     'volume'
+... ).limit(50).get_scanner_data(cache=cache)
+>>> cache.local_hits
+1
+
+A cached result can answer a new query (on the same market, symbols, etc.) if:
+
+- it has every row that matched its own filters (the range started at 0 and covered `totalCount`)
+- the filters of the new query imply the filters of the cached one, i.e. every condition of the
+  cached query is also in the new query, or is implied by a narrower condition on the same column
+  (`close > 20` implies `close > 10`, and `type = 'stock'` implies `type IN ('stock', 'fund')`)
+- it has all the columns that the new query selects, filters, and sorts by
+- all the filters of the new query can be evaluated locally (see `tradingview_screener.local`)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from tradingview_screener.fingerprint import canonicalize, fingerprint, stable_dumps
+from tradingview_screener.local import evaluate, is_supported, referenced_columns, sort_positions
+from tradingview_screener.optimizer import (
+    EVERYTHING,
+    allowed_values,
+    intersect,
+    is_empty,
+    to_interval,
+)
+
+if TYPE_CHECKING:
+    from tradingview_screener.models import (
+        OperationComparisonDict,
+        QueryDict,
+        ScreenerDict,
+        ScreenerDictV2,
+    )
+    from tradingview_screener.optimizer import Interval, Node
+
+
+# the parts of a query that can be refined locally, everything else must be the same
+_REFINABLE_KEYS = ('columns', 'filter2', 'sort', 'range')
+
+
+def _scope(canonical: dict, url: str) -> str:
+    return stable_dumps(
+        {'url': url, **{k: v for k, v in canonical.items() if k not in _REFINABLE_KEYS}}
+    )
+
+
+def _conjuncts(filter2: OperationComparisonDict | None) -> list[Node]:
+    if filter2 is None:
+        return []
+    if filter2['operator'] == 'and':
+        return list(filter2['operands'])
+    return [{'operation': filter2}]
+
+
+def _contains(outer: Interval, inner: Interval) -> bool:
+    if is_empty(inner):
+        return True
+    lo, lo_incl, hi, hi_incl = outer
+    inner_lo, inner_lo_incl, inner_hi, inner_hi_incl = inner
+    lower_ok = lo is None or (
+        inner_lo is not None
+        and (inner_lo > lo or (inner_lo == lo and (lo_incl or not inner_lo_incl)))
+    )
+    upper_ok = hi is None or (
+        inner_hi is not None
+        and (inner_hi < hi or (inner_hi == hi and (hi_incl or not inner_hi_incl)))
+    )
+    return lower_ok and upper_ok
+
+
+def implies(new: OperationComparisonDict | None, old: OperationComparisonDict | None) -> bool:
+    """
+    Check if every row that matches the (canonical) `new` filter also matches the `old` one.
+
+    This is conservative: it only compares the top-level AND conditions, so it can return False
+    for filters that do imply each other, but never True for filters that don't.
+    """
+    new_nodes = _conjuncts(new)
+    keys = {stable_dumps(node) for node in new_nodes}
+    intervals: dict[str, Interval] = {}
+    values: dict[str, set] = {}
+    for node in new_nodes:
+        expr = node.get('expression')
+        if expr is None:
+            continue
+        iv = to_interval(expr)  # pyright: ignore [reportArgumentType]
+        vals = allowed_values(expr) if iv is None else None  # pyright: ignore [reportArgumentType]
+        if iv is not None:
+            intervals[expr['left']] = intersect(intervals.get(expr['left'], EVERYTHING), iv)
+        elif vals is not None:
+            values[expr['left']] = values[expr['left']] & vals if expr['left'] in values else vals
+
+    for node in _conjuncts(old):
+        if stable_dumps(node) in keys:
+            continue
+        expr = node.get('expression')
+        if expr is None:
+            return False
+        column = expr['left']
+        iv = to_interval(expr)  # pyright: ignore [reportArgumentType]
+        vals = allowed_values(expr) if iv is None else None  # pyright: ignore [reportArgumentType]
+        if iv is not None and column in intervals and _contains(iv, intervals[column]):
+            continue
+        if vals is not None and column in values and values[column] <= vals:
+            continue
+        if expr['operation'] == 'nempty' and (column in intervals or column in values):
+            continue  # comparisons already exclude nulls
+        return False
+    return True
+
+
+class _Entry:
+    def __init__(self, canonical: dict, response: ScreenerDict | ScreenerDictV2) -> None:
+        self.canonical = canonical
+        self.response = response
+        self.created = time.monotonic()
+
+        if 'fields' in response:  # /scan2
+            self.fields = list(response['fields'])
+            self.rows: list[dict] = response.get('symbols') or []  # pyright: ignore
+            self.key = 'f'
+        else:
+            self.fields = list(canonical.get('columns', []))
+            self.rows = response.get('data') or []  # pyright: ignore
+            self.key = 'd'
+        start = canonical['range'][0]
+        self.complete = start == 0 and len(self.rows) >= response['totalCount']
+        self._columns: dict[str, tuple] | None = None
+
+    @property
+    def columns(self) -> dict[str, tuple]:
+        # transposed lazily, since most entries are never refined
+        if self._columns is None:
+            values = list(zip(*[row[self.key] for row in self.rows])) if self.rows else []
+            self._columns = {}
+            for i, name in enumerate(self.fields):
+                self._columns.setdefault(name, values[i] if values else ())
+        return self._columns
+
+    def refine(self, canonical: dict) -> ScreenerDict | ScreenerDictV2 | None:
+        """
+        Answer a stricter query from the rows of this entry, or return None if it can't.
+        """
+        filter2 = canonical.get('filter2')
+        sort = canonical.get('sort')
+        columns = list(canonical.get('columns', []))
+        if not self.complete or not is_supported(filter2):
+            return None
+        if not implies(filter2, self.canonical.get('filter2')):
+            return None
+        needed = {*columns, *referenced_columns(filter2), *([sort['sortBy']] if sort else [])}
+        if not needed.issubset(self.fields):
+            return None
+
+        n = len(self.rows)
+        try:
+            mask = evaluate(filter2, self.columns, n)
+            order = sort_positions(sort, self.columns, n)
+        except (TypeError, ValueError):
+            return None  # the values don't have the expected types
+        order = order[mask[order]]
+        start, end = canonical['range']
+
+        positions = [self.fields.index(name) for name in columns]
+        rows = [
+            {'s': row['s'], self.key: [row[self.key][j] for j in positions]}
+            for row in (self.rows[i] for i in order[start:end].tolist())
+        ]
+        if self.key == 'd':
+            return {'totalCount': int(mask.sum()), 'data': rows}  # pyright: ignore
+        result = {'totalCount': int(mask.sum()), 'fields': columns, 'symbols': rows}
+        if 'time' in self.response:
+            result['time'] = self.response['time']
+        return result  # pyright: ignore [reportReturnType]
+
+
+class ResultCache:
+    """
+    A thread-safe cache of responses, see the module docstring.
+
+    :param ttl: The number of seconds a response stays valid.
+    :param max_entries: The maximum number of responses to keep, the least recently used ones are
+        evicted first.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 64) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0  # the queries answered with the response of the same query
+        self.local_hits = 0  # the queries answered by refining the response of another query
+        self.misses = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()  # {fingerprint: entry}
+        self._scopes: dict[str, str] = {}  # {fingerprint: scope}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self) -> None:
+        deadline = time.monotonic() - self.ttl
+        for key in [k for k, entry in self._entries.items() if entry.created < deadline]:
+            del self._entries[key]
+            del self._scopes[key]
+
+    def get(self, query: QueryDict, url: str = '') -> ScreenerDict | ScreenerDictV2 | None:
+        """
+        Get the response of a query, either from the cache or by refining the response of a
+        looser query, or None if neither is possible.
+
+        Note that the responses of the exact same query are returned as is (without a copy).
+        """
+        key = fingerprint(query, url)
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.response
+
+            canonical = canonicalize(query)
+            scope = _scope(canonical, url)
+            candidates = [
+                (k, e) for k, e in reversed(self._entries.items()) if self._scopes[k] == scope
+            ]
+            for k, entry in candidates:
+                result = entry.refine(canonical)
+                if result is not None:
+                    self._entries.move_to_end(k)
+                    self.local_hits += 1
+                    return result
+            self.misses += 1
+            return None
+
+    def put(self, query: QueryDict, url: str, response: ScreenerDict | ScreenerDictV2) -> None:
+        """
+        Store the response of a query.
+        """
+        key = fingerprint(query, url)
+        canonical = canonicalize(query)
+        with self._lock:
+            self._entries[key] = _Entry(canonical, response)
+            self._entries.move_to_end(key)
+            self._scopes[key] = _scope(canonical, url)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                del self._scopes[evicted]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
@@ -5,9 +5,19 @@ from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from typing import Optional, Iterable
+    from tradingview_screener.derived import Expression
     from tradingview_screener.models import FilterOperationDict
 
 
+class ColumnName(str):
+    """
+    The name of a column on the right side of a filter (like `col('close') > col('VWAP')`), so it
+    isn't mistaken for a string constant (see `optimizer`). It's sent as a plain string.
+    """
+
+    __slots__ = ()
+
+
 class Column:
     """
     A Column object represents a field in the tradingview stock screener,
@@ -42,8 +52,14 @@ class Column:
     >>> Column('typespecs').has_none_of(['reit', 'etn', 'etf']),
 
     >>> Column('description').like('apple')  # the same as `description LIKE '%apple%'`
+    >>> Column('name').regex(r'^[A-Z]{4}$')  # evaluated on the client
     >>> Column('premarket_change').not_empty()  # same as `Column('premarket_change') != None`
     >>> Column('earnings_release_next_trading_date_fq').in_day_range(0, 0)  # same day
+
+    And the arithmetic operators, which create columns that are computed on the client (see
+    `derived.Expression`):
+    >>> Query().select('name', Column('close') / Column('price_52_week_high'))
+    >>> Query().select(((col('high') - col('low')) / col('ATR')).alias('range_atr'))
     """
 
     def __init__(self, name: str) -> None:
@@ -52,7 +68,7 @@ class Column:
     @staticmethod
     def _extract_name(obj) -> ...:
         if isinstance(obj, Column):
-            return obj.name
+            return ColumnName(obj.name)
         return obj
 
     def __gt__(self, other) -> FilterOperationDict:
@@ -192,6 +208,15 @@ class Column:
     def not_like(self, other) -> FilterOperationDict:
         return {'left': self.name, 'operation': 'nmatch', 'right': self._extract_name(other)}
 
+    def regex(self, pattern: str) -> FilterOperationDict:
+        """
+        Match the values against a regular expression (`re.search()`).
+
+        The API doesn't support regexes, so this filter is evaluated on the client (see
+        `tradingview_screener.planner`).
+        """
+        return {'left': self.name, 'operation': 'regex', 'right': pattern}  # pyright: ignore
+
     def empty(self) -> FilterOperationDict:
         # it seems like the `right` key is optional
         return {'left': self.name, 'operation': 'empty', 'right': None}
@@ -202,6 +227,48 @@ class Column:
         """
         return {'left': self.name, 'operation': 'nempty', 'right': None}
 
+    def _expression(self) -> Expression:
+        from tradingview_screener.derived import Expression
+
+        return Expression.wrap(self)
+
+    # arithmetic operators build an `Expression`, a column that is computed on the client
+    def __add__(self, other) -> Expression:
+        return self._expression() + other
+
+    def __radd__(self, other) -> Expression:
+        return other + self._expression()
+
+    def __sub__(self, other) -> Expression:
+        return self._expression() - other
+
+    def __rsub__(self, other) -> Expression:
+        return other - self._expression()
+
+    def __mul__(self, other) -> Expression:
+        return self._expression() * other
+
+    def __rmul__(self, other) -> Expression:
+        return other * self._expression()
+
+    def __truediv__(self, other) -> Expression:
+        return self._expression() / other
+
+    def __rtruediv__(self, other) -> Expression:
+        return other / self._expression()
+
+    def __pow__(self, other) -> Expression:
+        return self._expression() ** other
+
+    def __rpow__(self, other) -> Expression:
+        return other ** self._expression()
+
+    def __neg__(self) -> Expression:
+        return -self._expression()
+
+    def __abs__(self) -> Expression:
+        return abs(self._expression())
+
     def __repr__(self) -> str:
         return f'< Column({self.name!r}) >'
 
@@ -0,0 +1,163 @@
+"""
+Detect crossings between columns at the resolution of your own polling.
+
+`Column.crosses_above()` and friends are evaluated by the server, against its own previous bar
+(e.g. the previous daily close). `CrossingDetector` compares consecutive results of a query
+instead, so it can tell which tickers had `close` cross above `VWAP` in the last 10 seconds, for
+any number of (column, column) or (column, value) pairs, without sending extra requests.
+
+Examples:
+
+>>> detector = CrossingDetector([('close', 'VWAP'), ('close', 'EMA20'), (Column('RSI'), 70)])
+>>> q = Query().select('close', 'VWAP', 'EMA20', 'RSI').limit(10_000)
+>>> scheduler.add(q, interval=10, callback=lambda result: print(detector.update(result.df)))
+           ticker   left right direction
+0     NASDAQ:AAPL  close  VWAP     above
+1  NASDAQ:QQQ      RSI    70     below
+...
+
+How it works:
+
+- every update computes the `left - right` differences of all the pairs at once (a single
+  `tickers x pairs` array), and only its sign is kept (one byte per ticker and pair)
+- a pair crosses above when its last non-zero sign was negative and is now positive (and below
+  when it was positive and is now negative), so touching the other column (a difference of 0)
+  isn't a crossing by itself
+- nulls (and tickers that weren't in the previous result) keep their last known sign, so a
+  crossing is reported once the values are back, and new tickers are never reported on their
+  first update
+- the tickers that are missing from more than `max_missed` consecutive results are forgotten (as
+  if they were new), so the state doesn't grow with every ticker that was ever seen
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from tradingview_screener.column import Column
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    import numpy as np
+    import pandas as pd
+
+
+def _operand(x: Column | str | float) -> str | float:
+    return x.name if isinstance(x, Column) else x
+
+
+def crossings(previous: np.ndarray, signs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Compare the last known signs of the differences with the new ones.
+
+    :param previous: The last non-zero signs (-1, 0 if unknown, or 1).
+    :param signs: The new signs (-1, 0, or 1, 0 means that the difference is 0 or null).
+    :return: (above, below) boolean arrays with the same shape as the inputs.
+    """
+    above = (previous < 0) & (signs > 0)
+    below = (previous > 0) & (signs < 0)
+    return above, below
+
+
+class CrossingDetector:
+    """
+    Detect the pairs of columns that crossed between consecutive results, see the module
+    docstring.
+
+    :param pairs: The (left, right) pairs, where both sides are columns (`Column` or `str`), or
+        the right side is a number.
+    :param id_column: The column that identifies the rows.
+    :param max_missed: The number of consecutive results a ticker can be missing from before its
+        signs are forgotten.
+    """
+
+    def __init__(
+        self,
+        pairs: Sequence[tuple[Column | str, Column | str | float]],
+        id_column: str = 'ticker',
+        max_missed: int = 10,
+    ) -> None:
+        self.pairs = [(_operand(left), _operand(right)) for left, right in pairs]
+        self.id_column = id_column
+        self.max_missed = max_missed
+
+        # every column (and constant) once, and the position of both sides of the pairs in it
+        positions: dict[str | float, int] = {}
+        for pair in self.pairs:
+            for x in pair:
+                positions.setdefault(x, len(positions))
+        self._operands: list[str | float] = list(positions)
+        self._left = [positions[left] for left, _ in self.pairs]
+        self._right = [positions[right] for _, right in self.pairs]
+
+        self._ids: pd.Index | None = None
+        self._signs: np.ndarray | None = None  # int8, tickers x pairs
+        self._missed: np.ndarray | None = None  # the number of results each ticker was missing from
+
+    @property
+    def columns(self) -> list[str]:
+        """
+        The columns that the query must select.
+        """
+        return [x for x in self._operands if isinstance(x, str)]
+
+    def reset(self) -> None:
+        self._ids = None
+        self._signs = None
+        self._missed = None
+
+    def _differences(self, df: pd.DataFrame) -> np.ndarray:
+        import numpy as np
+
+        values = np.empty((len(df), len(self._operands)), dtype='float64')
+        for i, x in enumerate(self._operands):
+            if isinstance(x, str):
+                values[:, i] = df[x].astype('float64')
+            else:
+                values[:, i] = x
+        return values[:, self._left] - values[:, self._right]
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Store the state of a new result, and return the crossings since the previous one.
+
+        :return: A DataFrame with the columns `ticker` (the `id_column`), `left`, `right`, and
+            `direction` (`above` or `below`), with one row per ticker and pair that crossed.
+        """
+        import numpy as np
+        import pandas as pd
+
+        df = df.loc[:, ~df.columns.duplicated()].drop_duplicates(self.id_column)
+        ids = pd.Index(df[self.id_column])
+        with np.errstate(invalid='ignore'):
+            signs = np.sign(self._differences(df))
+        signs = np.nan_to_num(signs, nan=0).astype('int8')
+
+        previous = np.zeros_like(signs)
+        old_ids, old_signs, old_missed = self._ids, self._signs, self._missed
+        kept = None
+        if old_ids is not None and old_signs is not None and old_missed is not None:
+            positions = ids.get_indexer(old_ids)
+            missing = positions == -1
+            previous[positions[~missing]] = old_signs[~missing]
+            # the tickers that aren't in this result keep their last known signs, for a while
+            kept = missing & (old_missed < self.max_missed)
+        above, below = crossings(previous, signs)
+        self._ids = ids
+        self._signs = np.where(signs != 0, signs, previous)
+        self._missed = np.zeros(len(ids), dtype='int64')
+        if kept is not None and kept.any():
+            self._ids = ids.append(old_ids[kept])  # pyright: ignore [reportOptionalSubscript]
+            self._signs = np.concatenate([self._signs, old_signs[kept]])  # pyright: ignore
+            self._missed = np.concatenate([self._missed, old_missed[kept] + 1])  # pyright: ignore
+
+        rows, pairs = np.nonzero(above | below)
+        return pd.DataFrame(
+            {
+                self.id_column: ids.to_numpy()[rows],
+                'left': [self.pairs[i][0] for i in pairs.tolist()],
+                'right': [self.pairs[i][1] for i in pairs.tolist()],
+                'direction': np.where(above[rows, pairs], 'above', 'below'),
+            }
+        )
@@ -0,0 +1,265 @@
+"""
+Conversion of the JSON returned by the scanner API into columns with the right dtypes.
+
+The type of each field is looked up in the `tradingview_screener.fields` registry, fields that
+aren't in the registry get the dtype inferred by pandas.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from tradingview_screener.fields import field_type
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    import numpy as np
+    import pandas as pd
+
+    from tradingview_screener.derived import Derived
+    from tradingview_screener.fields import FieldType
+    from tradingview_screener.models import ScreenerDict, ScreenerDictV2
+
+
+DTYPES: dict[FieldType, str] = {
+    'number': 'float64',
+    'price': 'float64',
+    'fundamental_price': 'float64',
+    'percent': 'float64',
+    'integer': 'Int64',  # nullable, because any field can be null
+    'time': 'datetime64[s, UTC]',  # the API returns UNIX timestamps (in seconds)
+    'date': 'datetime64[s]',  # the API returns integers like `20260821`
+    'bool': 'boolean',
+}
+# the maximum relative error allowed when downcasting a float64 column to float32 in compact mode
+COMPACT_RTOL = 1e-6
+# in compact mode, string columns with fewer unique values than this ratio become categoricals
+COMPACT_CATEGORY_RATIO = 0.5
+
+
+def split_response(
+    json_obj: ScreenerDict | ScreenerDictV2, columns: Sequence[str] = ()
+) -> tuple[list[str], list[str], list[tuple]]:
+    """
+    Transpose the rows of a response into columns.
+
+    :param json_obj: The response from `/scan` or `/scan2`.
+    :param columns: The columns that were selected in the query (only used for `/scan`, because
+        the `/scan2` response already contains the list of fields).
+    :return: a tuple of: (fields, tickers, one tuple of values for each field)
+    """
+    rows: list[dict]
+    if 'fields' in json_obj:  # /scan2
+        fields = list(json_obj['fields'])
+        rows = json_obj.get('symbols') or []  # pyright: ignore [reportAssignmentType]
+        key = 'f'
+    else:
+        fields = list(columns)
+        rows = json_obj.get('data') or []  # pyright: ignore [reportAssignmentType]
+        key = 'd'
+
+    tickers = [row['s'] for row in rows]
+    if rows:
+        values = list(zip(*[row[key] for row in rows]))
+    else:
+        values = [() for _ in fields]
+    return fields, tickers, values
+
+
+def epoch_to_datetime(values: Sequence) -> np.ndarray:
+    """
+    Convert UNIX timestamps (in seconds, None for nulls) into a `datetime64[s]` array.
+    """
+    import numpy as np
+
+    seconds = np.array(values, dtype='float64')
+    nat = np.isnan(seconds)
+    seconds[nat] = 0
+    out = seconds.astype('int64').view('datetime64[s]')
+    out[nat] = np.datetime64('NaT')
+    return out
+
+
+def date_int_to_datetime(values: Sequence) -> np.ndarray:
+    """
+    Convert dates encoded as integers (`YYYYMMDD`, None for nulls) into a `datetime64[s]` array.
+
+    >>> date_int_to_datetime([20260821, None])
+    array(['2026-08-21T00:00:00', 'NaT'], dtype='datetime64[s]')
+    """
+    import numpy as np
+
+    ints = np.array(values, dtype='float64')
+    nat = np.isnan(ints)
+    ints[nat] = 19700101
+    ints = ints.astype('int64')
+
+    months = (ints // 10000 - 1970) * 12 + (ints // 100 % 100 - 1)  # months since epoch
+    out = months.astype('datetime64[M]').astype('datetime64[s]')
+    out += (ints % 100 - 1).astype('timedelta64[D]')
+    out[nat] = np.datetime64('NaT')
+    return out
+
+
+def to_series(name: str, values: Sequence, screener: str = 'stocks') -> pd.Series:
+    """
+    Create a Series from the raw values of a field, with a dtype that matches its type.
+
+    If the values don't match the type from the registry (which shouldn't happen), the dtype is
+    inferred by pandas instead.
+    """
+    import numpy as np
+    import pandas as pd
+
+    typ = field_type(name, screener)
+    dtype = DTYPES.get(typ) if typ is not None else None
+    try:
+        if dtype == 'float64':
+            # numpy converts `None` to NaN when the dtype is float
+            return pd.Series(np.array(values, dtype='float64'), name=name, copy=False)
+        elif dtype == 'Int64' or dtype == 'boolean':
+            return pd.Series(pd.array(values, dtype=dtype), name=name)
+        elif typ == 'time':
+            series = pd.Series(epoch_to_datetime(values), name=name, copy=False)
+            return series.dt.tz_localize('UTC')
+        elif typ == 'date':
+            return pd.Series(date_int_to_datetime(values), name=name, copy=False)
+    except (TypeError, ValueError):
+        pass
+    return pd.Series(values, name=name, dtype=object if not len(values) else None)
+
+
+def to_dataframe(
+    json_obj: ScreenerDict | ScreenerDictV2,
+    columns: Sequence[str] = (),
+    screener: str = 'stocks',
+    compact: bool = False,
+    derived: Sequence[Derived] = (),
+) -> pd.DataFrame:
+    """
+    Convert the response of the scanner API into a DataFrame (with the `ticker` as the first
+    column).
+
+    :param json_obj: The response from `/scan` or `/scan2`.
+    :param columns: The columns that were selected in the query (only used for `/scan`).
+    :param screener: The name of the screener, used to look up the field types.
+    :param compact: Downcast the columns to the smallest dtypes that can hold them, see
+        `compact_dataframe()`.
+    :param derived: Columns to compute from the other columns, see `tradingview_screener.derived`.
+    """
+    fields, tickers, values = split_response(json_obj, columns)
+    time = json_obj.get('time')
+    return columns_to_dataframe(fields, tickers, values, screener, time, compact, derived)
+
+
+def columns_to_dataframe(
+    fields: Sequence[str],
+    tickers: Sequence[str],
+    values: Sequence[Sequence],
+    screener: str = 'stocks',
+    time: str | None = None,
+    compact: bool = False,
+    derived: Sequence[Derived] = (),
+) -> pd.DataFrame:
+    """
+    Build the DataFrame from the columns of a response (see `split_response()`).
+
+    :param time: The server time of the snapshot (only returned by `/scan2`), which is stored in
+        `df.attrs['time']`.
+    :param derived: Columns to compute from the other columns (before compacting the DataFrame).
+    """
+    import pandas as pd
+
+    series = [pd.Series(tickers, name='ticker', dtype=object if not len(tickers) else None)]
+    series += [to_series(name, vals, screener) for name, vals in zip(fields, values)]
+
+    # build the frame from positions rather than names, so duplicated columns are kept
+    df = pd.DataFrame(dict(enumerate(series)))
+    df.columns = pd.Index(['ticker', *fields])
+    if time is not None:
+        df.attrs['time'] = pd.Timestamp(time)
+    if derived:
+        from tradingview_screener.derived import add_derived
+
+        add_derived(df, derived)
+    if compact:
+        df = compact_dataframe(df, screener)
+    return df
+
+
+def _smallest_int_dtype(lo: int, hi: int, nullable: bool) -> str:
+    import numpy as np
+
+    # `UInt8`/`Int8` are the nullable versions of `uint8`/`int8`
+    prefix = ('UInt' if nullable else 'uint') if lo >= 0 else ('Int' if nullable else 'int')
+    for bits in (8, 16, 32, 64):
+        info = np.iinfo(f'{prefix.lower()}{bits}')
+        if info.min <= lo and hi <= info.max:
+            return f'{prefix}{bits}'
+    return 'Float64' if nullable else 'float64'
+
+
+def _compact_series(s: pd.Series, typ: FieldType | None) -> pd.Series:
+    import numpy as np
+    import pandas as pd
+
+    is_number = typ in ('number', 'integer') and s.dtype == 'float64'
+    if isinstance(s.dtype, pd.Int64Dtype) or is_number:
+        # integers (and numbers that happen to be integers, like volumes) -> smallest int type
+        values = s.to_numpy(dtype='float64', na_value=np.nan)
+        valid = values[~np.isnan(values)]
+        if valid.size and (valid == np.round(valid)).all():
+            dtype = _smallest_int_dtype(int(valid.min()), int(valid.max()), valid.size < s.size)
+            return s.astype(dtype)
+
+    if s.dtype == 'float64':
+        # prices and ratios -> float32, but only if it doesn't lose (too much) precision
+        values = s.to_numpy()
+        downcast = values.astype('float32')
+        with np.errstate(over='ignore', invalid='ignore'):
+            if np.allclose(downcast, values, rtol=COMPACT_RTOL, atol=0, equal_nan=True):
+                return pd.Series(downcast, index=s.index, name=s.name, copy=False)
+        return s
+
+    if typ == 'set' or s.dtype.kind not in 'OT':
+        return s
+
+    # low-cardinality strings (`exchange`, `type`, `sector`, `currency`, etc.) -> categorical
+    valid = s.dropna()
+    if (
+        len(valid) > 1
+        and all(isinstance(x, str) for x in valid)
+        and valid.nunique() <= len(valid) * COMPACT_CATEGORY_RATIO
+    ):
+        return s.astype('category')
+    return s
+
+
+def compact_dataframe(df: pd.DataFrame, screener: str = 'stocks') -> pd.DataFrame:
+    """
+    Downcast every column to the smallest dtype that can hold it, which is useful when keeping many
+    snapshots in memory:
+
+    - prices and ratios are stored as `float32` (if the relative error is below `COMPACT_RTOL`)
+    - integers (like volumes) are stored in the narrowest integer type that fits
+    - low-cardinality strings (like `exchange`, `type`, `sector`, `currency`) become categoricals
+
+    The number of bytes saved is stored in `df.attrs['memory_saved']`, and the new memory usage
+    in `df.attrs['memory_usage']`.
+    """
+    import pandas as pd
+
+    before = int(df.memory_usage(deep=True).sum())
+    series = [
+        _compact_series(df.iloc[:, i], field_type(str(name), screener) if i else None)
+        for i, name in enumerate(df.columns)
+    ]
+    new = pd.DataFrame(dict(enumerate(series)))
+    new.columns = df.columns
+    new.attrs.update(df.attrs)
+
+    after = int(new.memory_usage(deep=True).sum())
+    new.attrs['memory_usage'] = after
+    new.attrs['memory_saved'] = before - after
+    return new
@@ -0,0 +1,381 @@
+"""
+Columns computed on the client from the columns returned by the API.
+
+A `Derived` column is a name, the columns it's computed from, and a vectorized function of them
+(it's called once per result with whole Series, never per row). They are computed while the
+response is decoded, before the DataFrame is compacted:
+
+>>> _, df = (
+...     Query()
+...     .select('name', 'close', 'VWAP', 'bid', 'ask', 'Recommend.All')
+...     .get_scanner_data(
+...         derived=[
+...             ratio('close', 'VWAP'),
+...             spread('ask', 'bid', relative=True, name='spread_pct'),
+...             technical_rating('Recommend.All'),
+...         ]
+...     )
+... )
+>>> df[['ticker', 'close/VWAP', 'spread_pct', 'Recommend.All.label']]
+        ticker  close/VWAP  spread_pct  Recommend.All.label
+0  NASDAQ:NVDA    1.004213    0.000147           Strong Buy
+...
+
+Any other function can be used too:
+
+>>> Derived('range_pct', ['high', 'low', 'close'], lambda high, low, close: (high - low) / close)
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import importlib
+import operator
+from types import CodeType, MethodType
+from typing import TYPE_CHECKING
+
+from tradingview_screener.column import Column, ColumnName
+from tradingview_screener.util import format_technical_rating
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+    import pandas as pd
+
+    from tradingview_screener.models import FilterOperationDict
+
+
+def _name(x: Column | str) -> str:
+    return x.name if isinstance(x, Column) else x
+
+
+def _describe_value(x) -> str:
+    """
+    A description of a value that is the same in every process (unlike `repr()` of most objects).
+    """
+    if x is None or isinstance(x, (bool, int, float, complex, str, bytes)):
+        return repr(x)
+    if isinstance(x, (list, tuple)):
+        return f'[{", ".join(_describe_value(v) for v in x)}]'
+    if isinstance(x, (set, frozenset)):
+        return f'{{{", ".join(sorted(_describe_value(v) for v in x))}}}'
+    if isinstance(x, dict):
+        items = sorted(f'{_describe_value(k)}: {_describe_value(v)}' for k, v in x.items())
+        return f'{{{", ".join(items)}}}'
+    if isinstance(x, Column):
+        return f'Column({x.name!r})'
+    if isinstance(x, CodeType):
+        # the bytecode, and everything it refers to (but not the line numbers)
+        consts = _describe_value(x.co_consts)
+        payload = x.co_code + f'{consts}|{x.co_names}|{x.co_varnames}'.encode()
+        return hashlib.blake2b(payload, digest_size=8).hexdigest()
+    if callable(x):
+        return _describe_function(x)
+    raise TypeError(f"Can't identify {x!r}, use plain values in the functions of derived columns")
+
+
+def _describe_function(func: Callable) -> str:
+    """
+    A description of a function that changes whenever it computes something else: its name, a
+    digest of its code, and the values it was bound to (closures, defaults, and partial arguments).
+    """
+    if isinstance(func, functools.partial):
+        args = [_describe_value(a) for a in func.args]
+        args += [f'{k}={_describe_value(v)}' for k, v in sorted(func.keywords.items())]
+        return f'partial({_describe_function(func.func)}, {", ".join(args)})'
+    if isinstance(func, MethodType):  # the object it's bound to must be a plain value too
+        return f'{_describe_value(func.__self__)}.{_describe_function(func.__func__)}'
+
+    module = getattr(func, '__module__', None)
+    qualname = getattr(func, '__qualname__', None)
+    code = getattr(func, '__code__', None)
+    if not isinstance(code, CodeType):
+        # builtins and ufuncs (like `numpy.log`), as long as they can be imported by their name
+        try:
+            obj = importlib.import_module(module)  # pyright: ignore [reportArgumentType]
+            for part in qualname.split('.'):  # pyright: ignore [reportOptionalMemberAccess]
+                obj = getattr(obj, part)
+        except (AttributeError, ImportError, TypeError, ValueError):
+            obj = None
+        if obj is not func:
+            raise TypeError(f"Can't identify the function {func!r}, use a plain function")
+        return f'{module}.{qualname}'
+
+    bound = [f'{k}={_describe_value(v)}' for k, v in sorted((func.__kwdefaults__ or {}).items())]
+    bound += [f'defaults={_describe_value(func.__defaults__)}'] if func.__defaults__ else []
+    for name, cell in zip(code.co_freevars, func.__closure__ or ()):
+        try:
+            bound.append(f'{name}={_describe_value(cell.cell_contents)}')
+        except ValueError:  # an empty cell
+            bound.append(f'{name}=<empty>')
+    return f'{module}.{qualname}#{_describe_value(code)}[{", ".join(bound)}]'
+
+
+class Derived:
+    """
+    A column computed from other columns.
+
+    :param name: The name of the new column.
+    :param inputs: The columns that are passed to `func` (as Series, in this order).
+    :param func: A vectorized function of the inputs, that returns a Series or an array.
+    """
+
+    def __init__(self, name: str, inputs: Sequence[Column | str], func: Callable) -> None:
+        self.name = name
+        self.inputs = [_name(c) for c in inputs]
+        self.func = func
+
+    def __repr__(self) -> str:
+        return f'<Derived {self.name!r} inputs={self.inputs}>'
+
+    def definition(self) -> str:
+        """
+        A description of how the column is computed, which is the same in every process (used by
+        `Query.fingerprint()`). The function is identified by its name, a digest of its code, and
+        the values it was bound to (like the arguments of `spread()`).
+
+        :raises TypeError: If the function can't be identified (like a method of an object).
+        """
+        return f'{_describe_function(self.func)}({", ".join(map(repr, self.inputs))})'
+
+    def compute(self, df: pd.DataFrame) -> pd.Series:
+        import pandas as pd
+
+        missing = [c for c in self.inputs if c not in df.columns]
+        if missing:
+            raise KeyError(f'{self.name!r} needs the columns {missing}, add them to the query')
+        if df.columns.has_duplicates:
+            df = df.loc[:, ~df.columns.duplicated()]
+        result = self.func(*[df[c] for c in self.inputs])
+        return pd.Series(result, index=df.index, name=self.name)
+
+
+def add_derived(df: pd.DataFrame, derived: Sequence[Derived]) -> pd.DataFrame:
+    """
+    Compute the derived columns (in order, so they can use the ones before them), and append
+    them to the DataFrame (in place).
+    """
+    for d in derived:
+        df[d.name] = d.compute(df)
+    return df
+
+
+def _numeric(s: pd.Series) -> pd.Series:
+    # float64, so nulls are NaN and the divisions by zero are `inf` rather than errors
+    return s.astype('float64')
+
+
+def ratio(numerator: Column | str, denominator: Column | str, name: str | None = None) -> Derived:
+    """
+    `numerator / denominator` (like `close / VWAP`), the divisions by zero are null.
+    """
+
+    def func(a: pd.Series, b: pd.Series) -> pd.Series:
+        import numpy as np
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = _numeric(a) / _numeric(b)
+        return result.where(np.isfinite(result))
+
+    a, b = _name(numerator), _name(denominator)
+    return Derived(name or f'{a}/{b}', [a, b], func)
+
+
+def spread(
+    a: Column | str, b: Column | str, name: str | None = None, relative: bool = False
+) -> Derived:
+    """
+    `a - b` (like `ask - bid`), or if `relative`, the difference relative to the midpoint:
+    `(a - b) / ((a + b) / 2)`.
+    """
+
+    def func(x: pd.Series, y: pd.Series) -> pd.Series:
+        import numpy as np
+
+        x, y = _numeric(x), _numeric(y)
+        if not relative:
+            return x - y
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = (x - y) / ((x + y) / 2)
+        return result.where(np.isfinite(result))
+
+    x, y = _name(a), _name(b)
+    return Derived(name or (f'({x}-{y})/mid' if relative else f'{x}-{y}'), [x, y], func)
+
+
+def technical_rating(column: Column | str, name: str | None = None) -> Derived:
+    """
+    The label of a technical rating (see `util.format_technical_rating()`), as a categorical.
+    """
+    c = _name(column)
+    return Derived(name or f'{c}.label', [c], format_technical_rating)
+
+
+_PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2, '**': 3, 'neg': 4, 'abs': 5, 'column': 5, 'value': 5}
+
+
+class Expression(Derived):
+    """
+    An arithmetic expression of columns, built with the operators of `Column`:
+
+    >>> (Column('high') - Column('low')) / Column('ATR')
+    <Expression '(high - low) / ATR' inputs=['high', 'low', 'ATR']>
+    >>> Query().select('name', col('close') / col('price_52_week_high'))
+
+    The columns it uses are fetched along with the selected columns (once, even if they are used
+    by many expressions), and the ones that weren't selected are dropped from the result.
+    Divisions by zero are null.
+    """
+
+    def __init__(self, op: str, operands: tuple, name: str | None = None) -> None:
+        self.op = op
+        self.operands = operands
+        inputs = list(dict.fromkeys(self._leaves()))
+        super().__init__(name or self._format(), inputs, self._evaluate)
+
+    def __repr__(self) -> str:
+        return f'<Expression {self.name!r} inputs={self.inputs}>'
+
+    def definition(self) -> str:
+        if self.op == 'column':
+            return f'col({self.operands[0]!r})'
+        if self.op == 'value':
+            return repr(self.operands[0])
+        return f'{self.op}({", ".join(operand.definition() for operand in self.operands)})'
+
+    @classmethod
+    def wrap(cls, x: Expression | Column | str | float) -> Expression:
+        """
+        Convert a `Column` or a column name into an expression, and numbers into constants.
+        """
+        if isinstance(x, Expression):
+            return x
+        if isinstance(x, (Column, str)):
+            return cls('column', (_name(x),))
+        return cls('value', (x,))
+
+    def alias(self, name: str) -> Expression:
+        """
+        Rename the column of the expression.
+        """
+        return Expression(self.op, self.operands, name)
+
+    def _leaves(self) -> list:
+        if self.op == 'column':
+            return [self.operands[0]]
+        if self.op == 'value':
+            return []
+        return [leaf for operand in self.operands for leaf in operand._leaves()]
+
+    def _format(self, parent: int = 0, right: bool = False) -> str:
+        op, precedence = self.op, _PRECEDENCE[self.op]
+        if op in ('column', 'value'):
+            return str(self.operands[0])
+        if op == 'abs':
+            return f'abs({self.operands[0]._format()})'
+        if op == 'neg':
+            text = f'-{self.operands[0]._format(precedence)}'
+        else:
+            left, other = self.operands
+            # `a - (b - c)`, `a / (b * c)`, and `(a ** b) ** c` need the parentheses
+            text = (
+                f'{left._format(precedence, right=op == "**")} {op} '
+                f'{other._format(precedence, right=op != "**")}'
+            )
+        needs_parentheses = precedence < parent or (precedence == parent and right)
+        return f'({text})' if needs_parentheses else text
+
+    def _compute(self, columns: dict[str, pd.Series]):
+        op = self.op
+        if op == 'column':
+            return _numeric(columns[self.operands[0]])
+        if op == 'value':
+            return self.operands[0]
+        if op == 'neg':
+            return -self.operands[0]._compute(columns)
+        if op == 'abs':
+            return abs(self.operands[0]._compute(columns))
+        left, right = (operand._compute(columns) for operand in self.operands)
+        return _OPERATORS[op](left, right)
+
+    def _evaluate(self, *series: pd.Series):
+        import numpy as np
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result = self._compute(dict(zip(self.inputs, series)))
+        if np.ndim(result) == 0:  # an expression without columns
+            return result
+        return result.where(np.isfinite(result))
+
+    def _binary(self, op: str, other, reflected: bool = False) -> Expression:
+        other = Expression.wrap(other)
+        return Expression(op, (other, self) if reflected else (self, other))
+
+    def __add__(self, other) -> Expression:
+        return self._binary('+', other)
+
+    def __radd__(self, other) -> Expression:
+        return self._binary('+', other, reflected=True)
+
+    def __sub__(self, other) -> Expression:
+        return self._binary('-', other)
+
+    def __rsub__(self, other) -> Expression:
+        return self._binary('-', other, reflected=True)
+
+    def __mul__(self, other) -> Expression:
+        return self._binary('*', other)
+
+    def __rmul__(self, other) -> Expression:
+        return self._binary('*', other, reflected=True)
+
+    def __truediv__(self, other) -> Expression:
+        return self._binary('/', other)
+
+    def __rtruediv__(self, other) -> Expression:
+        return self._binary('/', other, reflected=True)
+
+    def __pow__(self, other) -> Expression:
+        return self._binary('**', other)
+
+    def __rpow__(self, other) -> Expression:
+        return self._binary('**', other, reflected=True)
+
+    # comparisons build filters that are evaluated on the client (see `planner`)
+    def _filter(self, operation: str, right) -> FilterOperationDict:
+        right = ColumnName(right.name) if isinstance(right, Column) else right
+        return {'left': self, 'operation': operation, 'right': right}  # pyright: ignore
+
+    def __gt__(self, other) -> FilterOperationDict:
+        return self._filter('greater', other)
+
+    def __ge__(self, other) -> FilterOperationDict:
+        return self._filter('egreater', other)
+
+    def __lt__(self, other) -> FilterOperationDict:
+        return self._filter('less', other)
+
+    def __le__(self, other) -> FilterOperationDict:
+        return self._filter('eless', other)
+
+    def between(self, left: float, right: float) -> FilterOperationDict:
+        return self._filter('in_range', [left, right])
+
+    def not_between(self, left: float, right: float) -> FilterOperationDict:
+        return self._filter('not_in_range', [left, right])
+
+    def __neg__(self) -> Expression:
+        return Expression('neg', (self,))
+
+    def __abs__(self) -> Expression:
+        return Expression('abs', (self,))
+
+
+_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '**': operator.pow,
+}
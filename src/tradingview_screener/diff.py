@@ -0,0 +1,154 @@
+"""
+Detect the changes between consecutive results of a query.
+
+Rather than keeping (and comparing) the whole previous DataFrame, `ChangeTracker` keeps a single
+64-bit hash per ticker and column, and reports:
+
+- `entered`: the tickers that weren't in the previous result, with the values of all the tracked
+  columns
+- `exited`: the tickers that are no longer in the result (without values)
+- `changed`: the tickers whose tracked columns changed, with the new values of those columns only
+
+Examples:
+
+>>> tracker = ChangeTracker(key_columns=['close', 'volume'])
+>>> tracker.update(df1)
+[<ChangeEvent entered 'NASDAQ:AAPL' {'close': 210.5, 'volume': 51000000}>, ...]
+>>> tracker.update(df2)
+[<ChangeEvent changed 'NASDAQ:AAPL' {'close': 211.0}>, <ChangeEvent exited 'NYSE:KO' {}>]
+
+See also `Query.watch()`, which polls a query and yields these events as they happen.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    import numpy as np
+    import pandas as pd
+    from typing_extensions import Literal
+
+
+class ChangeEvent:
+    """
+    A ticker that entered or exited the result, or whose values changed.
+    """
+
+    __slots__ = ('kind', 'ticker', 'values')
+
+    def __init__(
+        self, kind: Literal['entered', 'exited', 'changed'], ticker: str, values: dict
+    ) -> None:
+        self.kind = kind
+        self.ticker = ticker
+        self.values = values
+
+    def __repr__(self) -> str:
+        return f'<ChangeEvent {self.kind} {self.ticker!r} {self.values!r}>'
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ChangeEvent):
+            return NotImplemented
+        return (self.kind, self.ticker, self.values) == (other.kind, other.ticker, other.values)
+
+
+def _hash_column(s: pd.Series) -> np.ndarray:
+    import pandas as pd
+
+    if s.dtype == object:
+        # lists (like the values of `set` fields) can't be hashed
+        s = s.map(lambda x: repr(x) if isinstance(x, (list, dict)) else x)
+    return pd.util.hash_pandas_object(s, index=False).to_numpy()  # pyright: ignore
+
+
+def hash_columns(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """
+    Hash every value of the given columns.
+
+    :return: A `uint64` array with one row per row of the DataFrame, and one column per column.
+    """
+    import numpy as np
+
+    if not columns:
+        return np.empty((len(df), 0), dtype='uint64')
+    return np.column_stack([_hash_column(df[c]) for c in columns])
+
+
+class ChangeTracker:
+    """
+    Compare each result of a query with the previous one, see the module docstring.
+
+    :param key_columns: The columns to track (defaults to all the columns of the first result,
+        except for the `id_column`).
+    :param id_column: The column that identifies the rows.
+    :param emit_initial: Report all the tickers of the first result as `entered`.
+    """
+
+    def __init__(
+        self,
+        key_columns: Sequence[str] | None = None,
+        id_column: str = 'ticker',
+        emit_initial: bool = True,
+    ) -> None:
+        self.key_columns = list(key_columns) if key_columns is not None else None
+        self.id_column = id_column
+        self.emit_initial = emit_initial
+        self._ids: pd.Index | None = None
+        self._hashes: np.ndarray | None = None
+
+    def reset(self) -> None:
+        self._ids = None
+        self._hashes = None
+
+    def update(self, df: pd.DataFrame) -> list[ChangeEvent]:
+        """
+        Store the state of a new result, and return the changes since the previous one.
+        """
+        import numpy as np
+        import pandas as pd
+
+        df = df.loc[:, ~df.columns.duplicated()]
+        df = df.drop_duplicates(self.id_column)
+        if self.key_columns is None:
+            self.key_columns = [c for c in df.columns if c != self.id_column]
+        columns = self.key_columns
+
+        ids = pd.Index(df[self.id_column])
+        hashes = hash_columns(df, columns)
+        previous_ids, previous_hashes = self._ids, self._hashes
+        self._ids, self._hashes = ids, hashes
+
+        if previous_ids is None or previous_hashes is None:
+            if not self.emit_initial:
+                return []
+            positions = np.full(len(ids), -1)
+        else:
+            positions = previous_ids.get_indexer(ids)
+
+        events = []
+        entered = np.flatnonzero(positions == -1)
+        if len(entered):
+            values = {c: df[c].iloc[entered].tolist() for c in columns}
+            tickers = ids[entered].tolist()
+            for i, ticker in enumerate(tickers):
+                events.append(ChangeEvent('entered', ticker, {c: values[c][i] for c in columns}))
+
+        if previous_ids is None or previous_hashes is None:
+            return events
+
+        matched = np.flatnonzero(positions != -1)
+        differences = hashes[matched] != previous_hashes[positions[matched]]
+        changed_rows = np.flatnonzero(differences.any(axis=1))
+        if len(changed_rows):
+            rows = matched[changed_rows]
+            values = {c: df[c].iloc[rows].tolist() for c in columns}
+            for i, (row, mask) in enumerate(zip(ids[rows].tolist(), differences[changed_rows])):
+                changed = {c: values[c][i] for c, diff in zip(columns, mask) if diff}
+                events.append(ChangeEvent('changed', row, changed))
+
+        exited = np.flatnonzero(ids.get_indexer(previous_ids) == -1)
+        events.extend(ChangeEvent('exited', t, {}) for t in previous_ids[exited].tolist())
+        return events
@@ -0,0 +1,256 @@
+"""
+A compact registry of the fields available in each screener, along with their types.
+
+The registry doesn't cover all the 3000+ fields (the full list is on the
+[Fields](https://shner-elmo.github.io/TradingView-Screener/fields/stocks.html) page), but it covers
+the most popular ones, and the technical indicators are matched by pattern (`EMA20`, `RSI7`,
+`Perf.W`, etc.), so a field that isn't in the registry isn't necessarily invalid.
+
+Examples:
+
+>>> field_type('close')
+'price'
+>>> field_type('sector.tr')
+'text'
+>>> field_type('24h_close_change|5', 'crypto')
+'percent'
+>>> field_type('strike', 'options')
+'price'
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from typing_extensions import Literal, TypeAlias
+
+    FieldType: TypeAlias = Literal[
+        'number',
+        'integer',
+        'price',
+        'fundamental_price',
+        'percent',
+        'time',
+        'date',
+        'bool',
+        'set',
+        'text',
+    ]
+
+
+SCREENERS = ('stocks', 'crypto', 'coin', 'forex', 'futures', 'bond', 'cfd', 'options')
+
+# the fields are stored as space-separated strings (grouped by type) to keep the module compact,
+# they get expanded into a `{field: type}` dictionary the first time they're needed.
+_COMMON: dict[FieldType, str] = {
+    'price': 'close open high low VWAP ask bid change_abs change_from_open_abs',
+    'percent': 'change change_from_open gap',
+    'number': 'volume Value.Traded relative_volume_10d_calc',
+    'integer': 'pricescale minmov minmove2',
+    'set': 'typespecs',
+    'text': (
+        'name description type subtype currency exchange market logoid update_mode fractional '
+        'source-logoid ticker-view'
+    ),
+}
+_TECHNICALS: dict[FieldType, str] = {
+    'price': (
+        'price_52_week_high price_52_week_low High.All Low.All High.1M Low.1M High.3M Low.3M '
+        'High.6M Low.6M ATR BB.upper BB.lower KltChnl.upper KltChnl.lower DonchCh20.Upper '
+        'DonchCh20.Lower Ichimoku.BLine Ichimoku.CLine Ichimoku.Lead1 Ichimoku.Lead2 P.SAR'
+    ),
+    'percent': 'ATRP Volatility.D Volatility.W Volatility.M',
+    'number': (
+        'RSI Stoch.K Stoch.D Stoch.RSI.K Stoch.RSI.D CCI20 ADX ADX+DI ADX-DI AO Mom MACD.macd '
+        'MACD.signal MACD.hist W.R BBPower UO ROC Aroon.Up Aroon.Down Recommend.All Recommend.MA '
+        'Recommend.Other TechRating_1D MARating_1D OsRating_1D average_volume_10d_calc '
+        'average_volume_30d_calc average_volume_60d_calc average_volume_90d_calc '
+        'relative_volume_intraday'
+    ),
+}
+_REGISTRY_SPEC: dict[str, dict[FieldType, str]] = {
+    'stocks': {
+        'price': (
+            'premarket_close premarket_open premarket_high premarket_low postmarket_close '
+            'postmarket_open postmarket_high postmarket_low premarket_change_abs '
+            'postmarket_change_abs price_target_average price_target_high price_target_low'
+        ),
+        'fundamental_price': (
+            'market_cap_basic market_cap_calc total_revenue total_revenue_ttm net_income '
+            'net_income_ttm total_debt total_assets total_current_assets total_liabilities_fq '
+            'enterprise_value_fq gross_profit ebitda free_cash_flow cash_n_short_term_invest_fq '
+            'earnings_per_share_basic_ttm earnings_per_share_diluted_ttm earnings_per_share_fq '
+            'earnings_per_share_forecast_next_fq dividends_per_share_fq '
+            'dps_common_stock_prim_issue_fy book_value_per_share_fq revenue_per_employee'
+        ),
+        'percent': (
+            'premarket_change postmarket_change premarket_gap dividends_yield_current '
+            'dividends_yield dividend_payout_ratio_ttm earnings_per_share_diluted_yoy_growth_ttm '
+            'total_revenue_yoy_growth_ttm net_income_yoy_growth_ttm return_on_equity '
+            'return_on_assets return_on_invested_capital gross_margin operating_margin net_margin '
+            'after_tax_margin pre_tax_margin float_shares_percent_current'
+        ),
+        'number': (
+            'premarket_volume postmarket_volume price_earnings_ttm price_book_fq '
+            'price_sales_current price_free_cash_flow_ttm price_earnings_growth_ttm '
+            'enterprise_value_ebitda_ttm debt_to_equity current_ratio quick_ratio beta_1_year '
+            'beta_3_year beta_5_year total_shares_outstanding float_shares_outstanding '
+            'shares_outstanding_current'
+        ),
+        'integer': 'number_of_employees',
+        'time': (
+            'earnings_release_date earnings_release_next_date earnings_release_trading_date_fq '
+            'earnings_release_next_trading_date_fq ex_dividend_date_recent '
+            'ex_dividend_date_upcoming'
+        ),
+        'bool': 'is_primary',
+        'text': (
+            'sector industry country fundamental_currency_code AnalystRating isin '
+            'recommendation_mark'
+        ),
+    },
+    'crypto': {
+        'percent': '24h_close_change 24h_vol_change',
+        'number': '24h_vol dex_trading_volume_24h dex_total_liquidity',
+        'fundamental_price': 'fully_diluted_value market_cap_calc',
+        'integer': 'dex_txs_count_24h dex_txs_count_uniq_24h',
+        'text': 'centralization currency_id blockchain-id provider-id base_currency',
+    },
+    'coin': {
+        'percent': '24h_close_change socialdominance',
+        'number': '24h_vol_cmc circulating_supply total_supply 24h_vol_to_market_cap',
+        'fundamental_price': 'market_cap_calc fully_diluted_value',
+        'integer': 'crypto_total_rank',
+        'set': 'crypto_common_categories',
+        'text': 'fundamental_currency_code base_currency',
+    },
+    'forex': {
+        'text': 'base_currency currency_id',
+    },
+    'futures': {
+        'number': 'open_interest',
+        'text': 'underlying_symbol',
+    },
+    'bond': {
+        'percent': 'yield_to_worst yield_to_maturity close_pct current_coupon',
+        'price': 'close_net',
+        'date': 'maturity_date',
+        'text': (
+            'isin-displayed fundamental_currency_code redemption_type bond_issuer_type '
+            'bond_snp_rating_lt bond_fitch_rating_lt country'
+        ),
+    },
+    'cfd': {},
+    'options': {
+        'price': 'strike theoPrice',
+        'number': 'delta gamma rho theta vega iv bid_iv ask_iv open_interest',
+        'date': 'expiration',
+        'text': 'option-type root underlying_symbol',
+    },
+}
+# screeners that also have the usual technical indicators
+_WITH_TECHNICALS = ('stocks', 'crypto', 'coin', 'forex', 'futures', 'cfd')
+
+# fields that are matched by pattern, e.g.: `EMA20`, `RSI7`, `Perf.YTD`, `Pivot.M.Classic.S1`
+_PATTERNS: list[tuple[re.Pattern, FieldType]] = [
+    (re.compile(r'(EMA|SMA|HullMA|VWMA)\d+'), 'price'),
+    (re.compile(r'Pivot\.M\.\w+\.(Middle|[RS]\d)'), 'price'),
+    (re.compile(r'Perf\.(W|1M|3M|6M|YTD|Y|5Y|10Y|All)'), 'percent'),
+    (re.compile(r'(RSI|Mom|CCI|ADX|ROC|W\.R)\d+'), 'number'),
+    (re.compile(r'Rec\.\w+'), 'number'),
+]
+# the modifiers that can be appended to a field:
+# `close|5` (timeframe), `close[1]` (previous bar), and `sector.tr` (translated to a string)
+_TIMEFRAME_RE = re.compile(r'\|\w+$')
+_OFFSET_RE = re.compile(r'\[\d+\]$')
+
+_registry: dict[str, dict[str, FieldType]] | None = None
+
+
+def _load_registry() -> dict[str, dict[str, FieldType]]:
+    global _registry
+    if _registry is None:
+        _registry = {}
+        for screener, spec in _REGISTRY_SPEC.items():
+            fields: dict[str, FieldType] = {}
+            groups = [_COMMON, _TECHNICALS] if screener in _WITH_TECHNICALS else [_COMMON]
+            for dct in [*groups, spec]:
+                for typ, names in dct.items():
+                    fields.update(dict.fromkeys(names.split(), typ))
+            _registry[screener] = fields
+    return _registry
+
+
+def screener_from_url(url: str) -> str:
+    """
+    Get the name of the screener that a scanner URL belongs to (the names in `SCREENERS`).
+
+    Every country (and the `global` endpoint) maps to `'stocks'`.
+
+    >>> screener_from_url('https://scanner.tradingview.com/crypto/scan')
+    'crypto'
+    >>> screener_from_url('https://scanner.tradingview.com/italy/scan')
+    'stocks'
+    """
+    market = url.split('/')[3] if url.count('/') >= 4 else ''
+    if market in SCREENERS:
+        return market
+    return 'stocks'
+
+
+def base_name(name: str) -> str:
+    """
+    Remove the timeframe and bar-offset modifiers from a field name.
+
+    >>> base_name('close|5')
+    'close'
+    >>> base_name('close[1]')
+    'close'
+    """
+    return _OFFSET_RE.sub('', _TIMEFRAME_RE.sub('', name))
+
+
+def field_type(name: str, screener: str = 'stocks') -> FieldType | None:
+    """
+    Get the type of a field, or None if the field isn't in the registry.
+
+    :param name: The field name, may contain modifiers like `close|5`, `close[1]`, `sector.tr`.
+    :param screener: One of `SCREENERS`, defaults to `'stocks'`.
+    """
+    name = base_name(name)
+    if name.endswith('.tr'):
+        return 'text'
+
+    typ = _load_registry().get(screener, {}).get(name)
+    if typ is not None:
+        return typ
+
+    if screener in _WITH_TECHNICALS:
+        for pattern, typ in _PATTERNS:
+            if pattern.fullmatch(name):
+                return typ
+    return None
+
+
+def validate_fields(names: Iterable[str], screener: str = 'stocks') -> None:
+    """
+    Make sure that all the given fields exist in the registry of the screener.
+
+    :raises ValueError: If one or more fields are unknown (with the closest matches as suggestion).
+    """
+    import difflib
+
+    known = _load_registry().get(screener, {})
+    errors = []
+    for name in names:
+        if field_type(name, screener) is None:
+            suggestions = difflib.get_close_matches(base_name(name), known, n=3)
+            hint = f' (did you mean: {", ".join(map(repr, suggestions))}?)' if suggestions else ''
+            errors.append(f'{name!r}{hint}')
+
+    if errors:
+        raise ValueError(f'Unknown field(s) in the {screener!r} screener: {"; ".join(errors)}')
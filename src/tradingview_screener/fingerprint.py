@@ -0,0 +1,181 @@
+"""
+A canonical form of queries, and a short stable digest of it, to use as a cache key.
+
+Two queries can mean the same thing while being different dictionaries, for example:
+
+>>> q1 = Query().where(col('close') > 5, col('type') == 'stock')
+>>> q2 = Query().where(col('type') == 'stock', Column('close') > 5)
+>>> q1 == q2
+False
+>>> q1.fingerprint() == q2.fingerprint()
+True
+
+The canonical form:
+
+- merges the `filter` list into the `filter2` tree (both are joined with AND)
+- flattens nested groups with the same operator, unwraps groups with a single operand, removes
+  duplicated operands, and sorts the operands (AND and OR are commutative)
+- an empty OR (which is never true, see `Query.optimize()`) makes the whole AND around it an
+  empty OR, and an empty AND (which is always true) is dropped
+- sorts the values of `isin()`, `has()`, and `has_none_of()`, and the markets, tickers, and indexes
+- converts `Column` objects to their names, tuples to lists, and fills in the default values
+  (`range`, `nullsFirst`, etc.)
+
+The order of the `columns` is kept, because it changes the order of the columns in the result.
+The derived columns (see `Query.select()`) are part of the digest too, by name and definition
+(see `Derived.definition()`), and the queries with functions that can't be identified raise a
+`TypeError` rather than getting a digest that could be shared with a different query.
+Note that redundant bounds aren't merged, use `Query.optimize()` for that.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+from typing import TYPE_CHECKING
+
+from tradingview_screener.column import Column
+from tradingview_screener.derived import Derived
+from tradingview_screener.optimizer import UNSATISFIABLE
+from tradingview_screener.query import DEFAULT_RANGE
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from tradingview_screener.models import QueryDict
+
+
+_SET_OPERATIONS = ('has', 'has_none_of')
+_LIST_OPERATIONS = ('in_range', 'not_in_range')
+
+
+def stable_dumps(obj) -> str:
+    """
+    Serialize an object to JSON deterministically (sorted keys, no whitespace), to compare or hash
+    canonical forms.
+    """
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def _plain(obj):
+    """
+    Convert `Column` objects to names, computed columns (in the filters evaluated on the client)
+    to their definitions, and tuples/sets to lists.
+    """
+    if isinstance(obj, Column):
+        return obj.name
+    if isinstance(obj, Derived):
+        return {'derived': obj.definition()}
+    if isinstance(obj, dict):
+        return {k: _plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(x) for x in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted((_plain(x) for x in obj), key=stable_dumps)
+    return obj
+
+
+def _canonical_expression(expr: dict) -> dict:
+    expr = {'right': None, **expr}  # `right` is optional for `empty` and `nempty`
+    op, right = expr['operation'], expr['right']
+    if op in _SET_OPERATIONS:
+        values = [right] if isinstance(right, str) else right
+        expr['right'] = sorted(set(values), key=stable_dumps)
+    elif (
+        op in _LIST_OPERATIONS
+        and isinstance(right, list)
+        and all(isinstance(x, str) for x in right)
+    ):
+        # `isin()` on strings, the order doesn't matter (unlike `between(1, 5)`)
+        expr['right'] = sorted(set(right))
+    return expr
+
+
+def _canonical_node(node: dict) -> dict | None:
+    if 'expression' in node:
+        return {'expression': _canonical_expression(node['expression'])}
+    return _canonical_group(node['operation']['operator'], node['operation']['operands'])
+
+
+def _never() -> dict:
+    return {'operation': copy.deepcopy(UNSATISFIABLE)}
+
+
+def _canonical_group(operator: str, operands: list) -> dict | None:
+    """
+    :return: The canonical node, None if it's always true, or `_never()` if it's never true (an
+        empty OR, like the filter that `Query.optimize()` produces for an unsatisfiable query).
+    """
+    children = {}
+    for operand in operands:
+        node = _canonical_node(operand)
+        if node is None:  # always true
+            if operator == 'or':
+                return None
+            continue
+        if node.get('operation') == UNSATISFIABLE:
+            if operator == 'and':
+                return _never()
+            continue
+        if 'operation' in node and node['operation']['operator'] == operator:
+            nodes = node['operation']['operands']
+        else:
+            nodes = [node]
+        for child in nodes:
+            children[stable_dumps(child)] = child
+
+    if not children:
+        return _never() if operator == 'or' else None
+    if len(children) == 1:
+        return next(iter(children.values()))
+    return {
+        'operation': {'operator': operator, 'operands': [children[k] for k in sorted(children)]}
+    }
+
+
+def canonicalize(query: QueryDict) -> dict:
+    """
+    Get the canonical form of a query (see the module docstring).
+    """
+    dct: dict = _plain(copy.deepcopy(query))  # pyright: ignore [reportAssignmentType]
+
+    operands = [{'expression': expr} for expr in dct.pop('filter', None) or []]
+    if dct.get('filter2'):
+        operands.append({'operation': dct.pop('filter2')})
+    node = _canonical_group('and', operands)
+    if node is not None:
+        dct['filter2'] = node.get('operation', {'operator': 'and', 'operands': [node]})
+    else:
+        dct.pop('filter2', None)
+
+    if 'markets' in dct:
+        dct['markets'] = sorted(set(dct['markets']))
+    symbols = {k: v for k, v in (dct.pop('symbols', None) or {}).items() if v}
+    for key in ('tickers', 'symbolset'):
+        if key in symbols:
+            symbols[key] = sorted(set(symbols[key]))
+    if symbols:
+        dct['symbols'] = symbols
+    if 'sort' in dct:
+        dct['sort'] = {'nullsFirst': False, **dct['sort']}
+    dct.setdefault('range', DEFAULT_RANGE.copy())
+    if not dct.get('ignore_unknown_fields'):
+        dct.pop('ignore_unknown_fields', None)
+    return dct
+
+
+def fingerprint(query: QueryDict, url: str = '', derived: Sequence[Derived] = ()) -> str:
+    """
+    Get a short digest (32 hex characters) of the canonical form of a query, to use as its
+    identity in caches, archives, etc.
+
+    :param query: The query dictionary (`Query.query`).
+    :param url: The URL of the query (`Query.url`), which contains the market.
+    :param derived: The derived columns of the query (`Query.derived`), in order.
+    """
+    obj: dict = {'url': url, 'query': canonicalize(query)}
+    if derived:
+        obj['derived'] = [[d.name, d.definition()] for d in derived]
+    payload = stable_dumps(obj)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
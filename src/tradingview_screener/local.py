@@ -0,0 +1,279 @@
+"""
+Evaluate the filters and the sorting of a query locally, over columns of values that were already
+fetched (like the ones returned by `decode.split_response()`).
+
+This is what allows answering a query without sending a request, when a looser query that was
+already sent has every row that the new one needs (see `tradingview_screener.cache`).
+
+Only the operations with an unambiguous meaning are supported (comparisons, `in_range`,
+`not_in_range`, `empty`, `nempty`, `match`, `nmatch`, `smatch`, `has`, and `has_none_of`, and
+`regex`, which only exists on the client), the others (like `crosses` or `above%`) raise a
+`ValueError`. Like in SQL, a null value never matches a comparison.
+
+Examples:
+
+>>> columns = {'close': [5, 25, None, 40], 'type': ['stock', 'stock', 'fund', 'fund']}
+>>> evaluate(And(col('close') > 20, col('type') == 'stock')['operation'], columns)
+array([False,  True, False, False])
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import TYPE_CHECKING
+
+from tradingview_screener.column import ColumnName
+from tradingview_screener.fields import field_type
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+
+    import numpy as np
+
+    from tradingview_screener.models import (
+        ExpressionDict,
+        FilterOperationDict,
+        OperationComparisonDict,
+        OperationDict,
+        SortByDict,
+    )
+
+
+_COMPARISONS = {
+    'greater': '__gt__',
+    'egreater': '__ge__',
+    'less': '__lt__',
+    'eless': '__le__',
+    'equal': '__eq__',
+    'nequal': '__ne__',
+}
+SUPPORTED_OPERATIONS = frozenset(
+    [
+        *_COMPARISONS,
+        'in_range',
+        'not_in_range',
+        'empty',
+        'nempty',
+        'match',
+        'nmatch',
+        'smatch',
+        'has',
+        'has_none_of',
+        'regex',  # `Column.regex()`, the API doesn't support it
+    ]
+)
+
+
+def _is_column(x) -> bool:
+    # strings on the right side can also be the names of other columns (`close > 'VWAP'`)
+    return isinstance(x, ColumnName) or (isinstance(x, str) and field_type(x) is not None)
+
+
+def _nodes(filter2: OperationComparisonDict):
+    for node in filter2['operands']:
+        yield node
+        if 'operation' in node:
+            yield from _nodes(node['operation'])  # pyright: ignore [reportTypedDictNotRequiredAccess]
+
+
+def referenced_columns(filter2: OperationComparisonDict | None) -> set[str]:
+    """
+    Get the names of all the columns that a `filter2` tree needs.
+    """
+    names = set()
+    for node in _nodes(filter2) if filter2 else ():
+        expr = node.get('expression')
+        if expr is None:
+            continue
+        names.add(expr['left'])
+        if _is_column(expr.get('right')):
+            names.add(expr['right'])
+    return names
+
+
+def is_supported(filter2: OperationComparisonDict | None) -> bool:
+    """
+    Check if all the expressions of a `filter2` tree can be evaluated locally.
+    """
+    for node in _nodes(filter2) if filter2 else ():
+        expr = node.get('expression')
+        if expr is not None and expr['operation'] not in SUPPORTED_OPERATIONS:
+            return False
+    return True
+
+
+def _as_float(values: Sequence) -> np.ndarray | None:
+    import numpy as np
+
+    try:
+        return np.array(values, dtype='float64')
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_object(values: Sequence) -> np.ndarray:
+    import numpy as np
+
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = list(values)
+    return arr
+
+
+def _is_null(x) -> bool:
+    return x is None or (isinstance(x, float) and math.isnan(x))
+
+
+def _not_null(values: Sequence) -> np.ndarray:
+    import numpy as np
+
+    return np.fromiter((not _is_null(x) for x in values), dtype=bool, count=len(values))
+
+
+def _compare(left: Sequence, op: str, right) -> np.ndarray:
+    import numpy as np
+
+    if isinstance(right, (int, float)):
+        numbers = _as_float(left)
+        if numbers is None:
+            raise ValueError(f'Cannot compare a column of strings with {right!r}')
+        # NaN (null) is never equal to anything, but it's "not equal" to everything
+        return getattr(numbers, _COMPARISONS[op])(right) & ~np.isnan(numbers)
+
+    if op not in ('equal', 'nequal'):
+        raise ValueError(f'Cannot apply {op!r} to {right!r}')
+    result = _as_object(left) == right
+    return (~result if op == 'nequal' else result) & _not_null(left)
+
+
+def _compare_columns(left: Sequence, op: str, right: Sequence) -> np.ndarray:
+    import numpy as np
+
+    a, b = _as_float(left), _as_float(right)
+    if a is None or b is None:
+        if op not in ('equal', 'nequal'):
+            raise ValueError(f'Cannot apply {op!r} to columns of strings')
+        a, b = _as_object(left), _as_object(right)
+        result = a == b
+        if op == 'nequal':
+            result = ~result
+        return result & _not_null(left) & _not_null(right)
+    result = getattr(a, _COMPARISONS[op])(b)
+    return result & ~np.isnan(a) & ~np.isnan(b)
+
+
+def _evaluate_expression(expr: FilterOperationDict, columns: Mapping[str, Sequence]) -> np.ndarray:
+    import numpy as np
+
+    op, right = expr['operation'], expr.get('right')
+    if op not in SUPPORTED_OPERATIONS:
+        raise ValueError(f'The {op!r} operation cannot be evaluated locally')
+    left = columns[expr['left']]
+
+    if op in _COMPARISONS:
+        if _is_column(right):
+            return _compare_columns(left, op, columns[right])
+        return _compare(left, op, right)
+
+    if op in ('empty', 'nempty'):
+        not_null = _not_null(left)
+        return not_null if op == 'nempty' else ~not_null
+
+    if op in ('in_range', 'not_in_range'):
+        values = list(right)
+        numbers = _as_float(left)
+        if len(values) == 2 and all(isinstance(x, (int, float)) for x in values):
+            # `between(a, b)`, which is inclusive
+            if numbers is None:
+                raise ValueError('Cannot apply `between()` to a column of strings')
+            result = (numbers >= values[0]) & (numbers <= values[1])
+        else:
+            allowed = set(values)
+            result = np.fromiter((x in allowed for x in left), dtype=bool, count=len(left))
+        if op == 'not_in_range':
+            result = ~result
+        return result & _not_null(left)
+
+    if op in ('match', 'nmatch', 'smatch'):
+        # `LOWER(column) LIKE '%pattern%'`
+        pattern = str(right).lower()
+        result = np.fromiter(
+            (isinstance(x, str) and pattern in x.lower() for x in left), dtype=bool, count=len(left)
+        )
+        return result if op != 'nmatch' else ~result & _not_null(left)
+
+    if op == 'regex':
+        regex = re.compile(right)
+        return np.fromiter(
+            (isinstance(x, str) and regex.search(x) is not None for x in left),
+            dtype=bool,
+            count=len(left),
+        )
+
+    # `has` and `has_none_of` on sets (lists of strings)
+    wanted = {right} if isinstance(right, str) else set(right)
+    result = np.fromiter(
+        (bool(x) and not wanted.isdisjoint(x) for x in left), dtype=bool, count=len(left)
+    )
+    return result if op == 'has' else ~result
+
+
+def _evaluate_node(node: ExpressionDict | OperationDict, columns: Mapping[str, Sequence], n: int):
+    if 'expression' in node:
+        return _evaluate_expression(node['expression'], columns)  # pyright: ignore
+    return evaluate(node['operation'], columns, n)  # pyright: ignore
+
+
+def evaluate(
+    filter2: OperationComparisonDict | None, columns: Mapping[str, Sequence], n: int | None = None
+) -> np.ndarray:
+    """
+    Evaluate a `filter2` tree over columns of values.
+
+    :param filter2: The tree to evaluate, None matches everything.
+    :param columns: A mapping from column names to their values (a dictionary of lists, or a
+        DataFrame with the raw values), it must contain every column in `referenced_columns()`.
+    :param n: The number of rows (only needed if it can't be taken from the columns).
+    :return: A boolean array with one item per row.
+    """
+    import numpy as np
+
+    if n is None:
+        n = len(next(iter(columns.values()))) if columns else 0
+    if filter2 is None:
+        return np.ones(n, dtype=bool)
+
+    is_and = filter2['operator'] == 'and'
+    result = np.full(n, is_and)  # an empty AND is true, and an empty OR is false
+    for node in filter2['operands']:
+        mask = _evaluate_node(node, columns, n)
+        result = result & mask if is_and else result | mask
+    return result
+
+
+def sort_positions(sort: SortByDict | None, columns: Mapping[str, Sequence], n: int) -> np.ndarray:
+    """
+    Get the order of the rows according to the `sort` of a query (the positions are stable, so
+    the rows with the same value keep their order).
+    """
+    import numpy as np
+
+    if sort is None:
+        return np.arange(n)
+
+    values = columns[sort['sortBy']]
+    not_null = _not_null(values)
+    valid = np.flatnonzero(not_null)
+    descending = sort['sortOrder'] == 'desc'
+    numbers = _as_float(values)
+    if numbers is not None:
+        keys = numbers[valid]
+        order = valid[np.argsort(-keys if descending else keys, kind='stable')]
+    else:
+        # `sorted()` is stable even with `reverse=True`
+        keyed = sorted(valid.tolist(), key=values.__getitem__, reverse=descending)
+        order = np.array(keyed, dtype='int64')
+
+    nulls = np.flatnonzero(~not_null)
+    parts = [nulls, order] if sort.get('nullsFirst') else [order, nulls]
+    return np.concatenate(parts).astype('int64')
@@ -0,0 +1,158 @@
+"""
+Cache the constituents of indexes (and other symbolsets), and query them by ticker.
+
+With `Query.set_index()`, the server resolves the constituents of the index on every request.
+When many queries (with different columns) run over the same indexes, `MembershipCache` resolves
+each index once per `ttl` (by fetching only the `name` of its constituents), and rewrites the
+queries to use the cached tickers instead (see `Query.set_tickers()`):
+
+>>> members = MembershipCache(ttl=3600)
+>>> q = Query().select('name', 'close', 'RSI').set_index('SYML:SP;SPX')
+>>> members.apply(q).get_scanner_data()  # the first call resolves the index
+(503, ...)
+>>> members.apply(Query().select('name', 'VWAP').set_index('SYML:SP;SPX')).get_scanner_data()
+(503, ...)  # a single request
+
+The unions and intersections of indexes are computed locally:
+
+>>> members.intersection('SYML:SP;SPX', 'SYML:NASDAQ;NDX')
+['NASDAQ:AAPL', 'NASDAQ:MSFT', ...]
+>>> q = Query().select('name', 'close')
+>>> members.apply(q, 'SYML:SP;SPX', 'SYML:NASDAQ;NDX', how='intersection').get_scanner_data()
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+    from typing_extensions import Literal
+
+    from tradingview_screener.models import SymbolsDict
+    from tradingview_screener.query import Query
+
+
+# the maximum number of constituents fetched per index
+MAX_MEMBERS = 100_000
+
+
+class MembershipCache:
+    """
+    A thread-safe cache of the tickers of symbolsets, see the module docstring.
+
+    :param ttl: The number of seconds the constituents of an index stay valid.
+    """
+
+    def __init__(self, ttl: float = 3600.0) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, tuple[float, list[str]]] = {}  # {index: (created, tickers)}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, index: str) -> list[str] | None:
+        with self._lock:
+            entry = self._entries.get(index)
+            if entry is None or entry[0] < time.monotonic() - self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, index: str, tickers: list[str]) -> None:
+        """
+        Store the constituents of an index.
+        """
+        with self._lock:
+            self._entries[index] = (time.monotonic(), list(tickers))
+
+    def invalidate(self, index: str | None = None) -> None:
+        """
+        Forget the constituents of an index (or of every index).
+        """
+        with self._lock:
+            if index is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(index, None)
+
+    def members(self, index: str, session: requests.Session | None = None, **kwargs) -> list[str]:
+        """
+        Get the tickers of an index (like `'SYML:SP;SPX'`), from the cache or from the server.
+
+        :param kwargs: kwargs to pass to `Query.get_scanner_data_raw()`
+        """
+        from tradingview_screener.query import Query
+
+        tickers = self._get(index)
+        if tickers is None:
+            q = Query().select('name').set_index(index).limit(MAX_MEMBERS)
+            json_obj = q.get_scanner_data_raw(session=session, **kwargs)
+            key = 'symbols' if 'fields' in json_obj else 'data'
+            tickers = [row['s'] for row in json_obj[key]]  # pyright: ignore
+            self.put(index, tickers)
+        return list(tickers)
+
+    def union(self, *indexes: str, session: requests.Session | None = None, **kwargs) -> list[str]:
+        """
+        The tickers that are in any of the indexes (in order of appearance).
+        """
+        tickers = [t for index in indexes for t in self.members(index, session, **kwargs)]
+        return list(dict.fromkeys(tickers))
+
+    def intersection(
+        self, *indexes: str, session: requests.Session | None = None, **kwargs
+    ) -> list[str]:
+        """
+        The tickers that are in all the indexes (in the order of the first one).
+        """
+        if not indexes:
+            return []
+        first, *others = (self.members(index, session, **kwargs) for index in indexes)
+        common = set(first).intersection(*others)
+        return [t for t in first if t in common]
+
+    def difference(
+        self, index: str, *others: str, session: requests.Session | None = None, **kwargs
+    ) -> list[str]:
+        """
+        The tickers of the first index that aren't in any of the others.
+        """
+        excluded = set(self.union(*others, session=session, **kwargs))
+        return [t for t in self.members(index, session, **kwargs) if t not in excluded]
+
+    def apply(
+        self,
+        query: Query,
+        *indexes: str,
+        how: Literal['union', 'intersection'] = 'union',
+        session: requests.Session | None = None,
+        **kwargs,
+    ) -> Query:
+        """
+        Get a copy of the query over the cached tickers of the indexes.
+
+        :param indexes: The indexes, defaults to the ones of the query (see `Query.set_index()`).
+        :param how: How to combine the indexes.
+        :param kwargs: kwargs to pass to `Query.get_scanner_data_raw()` (to resolve the indexes)
+        """
+        q = query.copy()
+        symbols: SymbolsDict = {**q.query.get('symbols', {})}  # `copy()` is shallow
+        if not indexes:
+            indexes = tuple(symbols.get('symbolset', []))
+            if not indexes:
+                raise ValueError('The query has no index, see `Query.set_index()`')
+        combine = self.union if how == 'union' else self.intersection
+        tickers = combine(*indexes, session=session, **kwargs)
+
+        symbols.pop('symbolset', None)
+        q.query['symbols'] = symbols
+        if q.query.get('preset') == 'index_components_market_pages':
+            del q.query['preset']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        return q.set_tickers(*tickers)
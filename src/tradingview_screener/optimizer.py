@@ -0,0 +1,419 @@
+"""
+Simplify the filters of a query before sending it, see `Query.optimize()`.
+
+The optimizer works on `filter2` trees (the `filter` list is merged into it, since both are joined
+with AND anyway), and it:
+
+- flattens nested groups with the same operator, and unwraps groups with a single operand
+- removes duplicated expressions
+- merges the numeric bounds on the same column (`greater`, `egreater`, `less`, `eless`, `equal`,
+  and `in_range`), e.g. `close > 5 AND close > 10 AND close < 20` -> `close > 10 AND close < 20`,
+  or `close > 5 OR close > 10` -> `close > 5`
+- merges the sets of values on the same column, e.g. `type IN (stock, fund) AND type = stock`
+  -> `type = stock`
+- removes `nempty` when another condition on the same column already excludes nulls
+- detects the filters that can never be true, like `close > 10 AND close < 5`
+
+Examples:
+
+>>> optimize_filter2(
+...     {
+...         'operator': 'and',
+...         'operands': [
+...             {'expression': {'left': 'close', 'operation': 'greater', 'right': 5}},
+...             {'expression': {'left': 'close', 'operation': 'greater', 'right': 10}},
+...         ],
+...     }
+... )
+{'operator': 'and', 'operands': [{'expression': {'left': 'close', 'operation': 'greater', 'right': 10}}]}
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+from typing import TYPE_CHECKING
+
+from tradingview_screener.column import ColumnName
+from tradingview_screener.fields import SCREENERS, field_type
+
+if TYPE_CHECKING:
+    from typing import Optional, Union
+
+    from typing_extensions import Literal, TypeAlias
+
+    from tradingview_screener.models import (
+        ExpressionDict,
+        FilterOperationDict,
+        OperationComparisonDict,
+        OperationDict,
+        QueryDict,
+    )
+
+    Node: TypeAlias = Union[ExpressionDict, OperationDict]
+    # (lower, lower_inclusive, upper, upper_inclusive), a `None` bound means infinity
+    Interval: TypeAlias = tuple[Optional[float], bool, Optional[float], bool]
+
+
+# the `filter2` of a query that can never match anything (an OR without operands is false)
+UNSATISFIABLE: OperationComparisonDict = {'operator': 'or', 'operands': []}
+
+_LOWER_OPS = {'greater': False, 'egreater': True}  # {operation: inclusive}
+_UPPER_OPS = {'less': False, 'eless': True}
+EVERYTHING: Interval = (None, False, None, False)  # the interval without bounds
+
+
+def _key(obj) -> str:
+    return json.dumps(obj, sort_keys=True, default=str)
+
+
+def _is_number(x) -> bool:
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+def _is_literal(x) -> bool:
+    # strings on the right side can also be the names of other columns (`close > 'VWAP'`), either
+    # passed as a `Column` (so they are a `ColumnName`), or as a string that is a known field
+    if not isinstance(x, str) or isinstance(x, ColumnName):
+        return False
+    return all(field_type(x, screener) is None for screener in SCREENERS)
+
+
+def to_interval(expr: FilterOperationDict) -> Interval | None:
+    """
+    Convert an expression into an interval, if it's a numeric comparison with a constant.
+    """
+    op, right = expr['operation'], expr.get('right')
+    if op in _LOWER_OPS and _is_number(right):
+        return (right, _LOWER_OPS[op], None, False)
+    if op in _UPPER_OPS and _is_number(right):
+        return (None, False, right, _UPPER_OPS[op])
+    if op == 'equal' and _is_number(right):
+        return (right, True, right, True)
+    if (
+        op == 'in_range'
+        and isinstance(right, list)
+        and len(right) == 2
+        and all(_is_number(x) for x in right)
+    ):
+        return (right[0], True, right[1], True)
+    return None
+
+
+def allowed_values(expr: FilterOperationDict) -> set | None:
+    """
+    Get the set of values that an expression allows, if it's a `equal` or `in_range` on strings.
+    """
+    op, right = expr['operation'], expr.get('right')
+    if op == 'equal' and _is_literal(right):
+        return {right}
+    if op == 'in_range' and isinstance(right, list) and right and all(map(_is_literal, right)):
+        return set(right)
+    return None
+
+
+def is_empty(iv: Interval) -> bool:
+    """
+    Check if no number is in an interval.
+    """
+    lo, lo_incl, hi, hi_incl = iv
+    if lo is None or hi is None:
+        return False
+    return lo > hi or (lo == hi and not (lo_incl and hi_incl))
+
+
+def intersect(a: Interval, b: Interval) -> Interval:
+    """
+    Get the interval of the numbers that are in both intervals.
+    """
+    lo, lo_incl, hi, hi_incl = a
+    if b[0] is not None:
+        if lo is None or b[0] > lo:
+            lo, lo_incl = b[0], b[1]
+        elif b[0] == lo:
+            lo_incl = lo_incl and b[1]
+    if b[2] is not None:
+        if hi is None or b[2] < hi:
+            hi, hi_incl = b[2], b[3]
+        elif b[2] == hi:
+            hi_incl = hi_incl and b[3]
+    return (lo, lo_incl, hi, hi_incl)
+
+
+def _union(intervals: list[Interval]) -> list[Interval]:
+    """
+    Merge the overlapping (or adjacent) intervals.
+    """
+    intervals = sorted(intervals, key=lambda iv: (iv[0] is not None, iv[0] or 0, not iv[1]))
+    merged = [intervals[0]]
+    for lo, lo_incl, hi, hi_incl in intervals[1:]:
+        cur_lo, cur_lo_incl, cur_hi, cur_hi_incl = merged[-1]
+        overlaps = (
+            cur_hi is None
+            or lo is None
+            or lo < cur_hi
+            or (lo == cur_hi and (lo_incl or cur_hi_incl))
+        )
+        if not overlaps:
+            merged.append((lo, lo_incl, hi, hi_incl))
+            continue
+        if cur_hi is not None and (hi is None or hi > cur_hi):
+            cur_hi, cur_hi_incl = hi, hi_incl
+        elif hi == cur_hi:
+            cur_hi_incl = cur_hi_incl or hi_incl
+        merged[-1] = (cur_lo, cur_lo_incl, cur_hi, cur_hi_incl)
+    return merged
+
+
+def _interval_to_exprs(column: str, iv: Interval) -> list[FilterOperationDict]:
+    lo, lo_incl, hi, hi_incl = iv
+    if lo is None and hi is None:
+        return [{'left': column, 'operation': 'nempty', 'right': None}]
+    if lo is not None and lo == hi:
+        return [{'left': column, 'operation': 'equal', 'right': lo}]
+    if lo is not None and hi is not None and lo_incl and hi_incl:
+        return [{'left': column, 'operation': 'in_range', 'right': [lo, hi]}]
+
+    exprs: list[FilterOperationDict] = []
+    if lo is not None:
+        exprs.append(
+            {'left': column, 'operation': 'egreater' if lo_incl else 'greater', 'right': lo}
+        )
+    if hi is not None:
+        exprs.append({'left': column, 'operation': 'eless' if hi_incl else 'less', 'right': hi})
+    return exprs
+
+
+def _values_to_expr(column: str, values: set) -> FilterOperationDict:
+    if len(values) == 1:
+        return {'left': column, 'operation': 'equal', 'right': next(iter(values))}
+    return {'left': column, 'operation': 'in_range', 'right': sorted(values)}
+
+
+def _prune_or(
+    node: OperationDict, intervals: dict[str, Interval]
+) -> OperationDict | Literal[False]:
+    """
+    Remove the branches of an OR (on a single column) that contradict the bounds of the column
+    in the parent AND, e.g. `(x < 5 OR x > 10) AND x BETWEEN 6 AND 9` is never true.
+    """
+    operation = node['operation']
+    if operation['operator'] != 'or':
+        return node
+
+    branches = []
+    for operand in operation['operands']:
+        expr = operand.get('expression')
+        iv = to_interval(expr) if expr else None  # pyright: ignore [reportArgumentType]
+        if expr is None or iv is None or expr['left'] not in intervals:
+            return node  # not an OR of bounds on a column with bounds
+        branches.append((operand, iv))
+
+    column = branches[0][0]['expression']['left']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+    if any(op['expression']['left'] != column for op, _ in branches):  # pyright: ignore
+        return node
+
+    kept = [op for op, iv in branches if not is_empty(intersect(intervals[column], iv))]
+    if not kept:
+        return False
+    return {'operation': {'operator': 'or', 'operands': kept}}
+
+
+def _merge_and(operands: list[Node]) -> list[Node] | bool:
+    """
+    Intersect the bounds and the sets of values of each column, return False if a column can't
+    satisfy all of its conditions.
+    """
+    intervals: dict[str, Interval] = {}
+    values: dict[str, set] = {}
+    # the columns with mergeable conditions, their merged expressions are inserted where the
+    # column name is in `kept` (where the first condition was)
+    slots: set[str] = set()
+    kept: list[Node | str] = []
+    null_checks: dict[str, list[str]] = {}
+
+    for node in operands:
+        if 'operation' in node:
+            kept.append(node)
+            continue
+        expr = node['expression']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        column = expr['left']
+        if not isinstance(column, str):
+            kept.append(node)
+            continue
+
+        iv = to_interval(expr)
+        vals = allowed_values(expr) if iv is None else None
+        if iv is not None:
+            intervals[column] = intersect(intervals.get(column, EVERYTHING), iv)
+        elif vals is not None:
+            values[column] = values[column] & vals if column in values else vals
+        elif expr['operation'] in ('empty', 'nempty'):
+            null_checks.setdefault(column, []).append(expr['operation'])
+            kept.append(node)
+            continue
+        else:
+            kept.append(node)
+            continue
+        if column not in slots:
+            slots.add(column)
+            kept.append(column)
+
+    for column, checks in null_checks.items():
+        if 'empty' in checks and ('nempty' in checks or column in slots):
+            return False  # a column can't be both null and not null
+
+    result: list[Node] = []
+    for item in kept:
+        if not isinstance(item, str):
+            expr = item.get('expression')
+            if expr and expr['operation'] == 'nempty' and expr['left'] in slots:
+                continue  # comparisons already exclude nulls
+            if 'operation' in item:
+                item = _prune_or(item, intervals)  # pyright: ignore [reportArgumentType]
+                if item is False:
+                    return False
+            result.append(item)
+            continue
+
+        column = item
+        if column in intervals:
+            iv = intervals[column]
+            if is_empty(iv):
+                return False
+            result.extend({'expression': e} for e in _interval_to_exprs(column, iv))
+        if column in values:
+            if not values[column]:
+                return False
+            result.append({'expression': _values_to_expr(column, values[column])})
+    return result
+
+
+def _merge_or(operands: list[Node]) -> list[Node] | bool:
+    """
+    Unite the bounds and the sets of values of each column.
+    """
+    intervals: dict[str, list[Interval]] = {}
+    values: dict[str, set] = {}
+    slots: set[str] = set()
+    kept: list[Node | str] = []
+
+    for node in operands:
+        expr = node.get('expression')
+        if expr is None or not isinstance(expr['left'], str):
+            kept.append(node)
+            continue
+
+        column = expr['left']
+        # `nempty` is the same as `-inf < x < inf`, so `x > 5 OR x IS NOT NULL` -> `x IS NOT NULL`
+        iv = EVERYTHING if expr['operation'] == 'nempty' else to_interval(expr)
+        vals = allowed_values(expr) if iv is None else None
+        if iv is not None:
+            if not is_empty(iv):
+                intervals.setdefault(column, []).append(iv)
+        elif vals is not None:
+            values[column] = values.get(column, set()) | vals
+        else:
+            kept.append(node)
+            continue
+        if column not in slots:
+            slots.add(column)
+            kept.append(column)
+
+    result: list[Node] = []
+    for item in kept:
+        if not isinstance(item, str):
+            result.append(item)
+            continue
+
+        column = item
+        for iv in _union(intervals[column]) if column in intervals else []:
+            exprs = _interval_to_exprs(column, iv)
+            if len(exprs) == 1:
+                result.append({'expression': exprs[0]})
+            else:
+                group: OperationComparisonDict = {
+                    'operator': 'and',
+                    'operands': [{'expression': e} for e in exprs],
+                }
+                result.append({'operation': group})
+        if column in values:
+            result.append({'expression': _values_to_expr(column, values[column])})
+    return result
+
+
+def _optimize_group(operator: Literal['and', 'or'], operands: list[Node]) -> Node | bool:
+    flat: list[Node] = []
+    seen: set[str] = set()
+
+    def add(node: Node) -> None:
+        key = _key(node)
+        if key not in seen:
+            seen.add(key)
+            flat.append(node)
+
+    for operand in operands:
+        node = _optimize_node(operand)
+        if isinstance(node, bool):
+            if node == (operator == 'or'):
+                return node  # `x OR true` is true, and `x AND false` is false
+            continue  # `x OR false` is `x`, and `x AND true` is `x`
+        if 'operation' in node and node['operation']['operator'] == operator:  # pyright: ignore
+            for child in node['operation']['operands']:  # pyright: ignore
+                add(child)
+        else:
+            add(node)
+
+    merged = _merge_and(flat) if operator == 'and' else _merge_or(flat)
+    if isinstance(merged, bool):
+        return merged
+    if not merged:
+        return operator == 'and'  # an empty AND is true, and an empty OR is false
+    if len(merged) == 1:
+        return merged[0]
+    return {'operation': {'operator': operator, 'operands': merged}}
+
+
+def _optimize_node(node: Node) -> Node | bool:
+    if 'expression' in node:
+        return node
+    operation = node['operation']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+    return _optimize_group(operation['operator'], list(operation['operands']))
+
+
+def optimize_filter2(filter2: OperationComparisonDict) -> OperationComparisonDict | None:
+    """
+    Simplify a `filter2` tree.
+
+    :return: The simplified tree, `UNSATISFIABLE` if it can never be true, or None if it's always
+        true (so there is no need to filter).
+    """
+    node = _optimize_group(filter2['operator'], list(filter2['operands']))
+    if node is True:
+        return None
+    if node is False:
+        return copy.deepcopy(UNSATISFIABLE)
+    if 'operation' in node:
+        return node['operation']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+    return {'operator': 'and', 'operands': [node]}
+
+
+def optimize_query(query: QueryDict) -> QueryDict:
+    """
+    Return a copy of the query with the `filter` list merged into `filter2`, and simplified.
+    """
+    query = copy.deepcopy(query)
+    operands: list[Node] = [{'expression': expr} for expr in query.pop('filter', [])]
+    if 'filter2' in query:
+        operands.append({'operation': query['filter2']})
+
+    filter2 = optimize_filter2({'operator': 'and', 'operands': operands})
+    if filter2 is None:
+        query.pop('filter2', None)
+    else:
+        query['filter2'] = filter2
+    return query
+
+
+def is_unsatisfiable(query: QueryDict) -> bool:
+    return query.get('filter2') == UNSATISFIABLE
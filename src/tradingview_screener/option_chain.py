@@ -0,0 +1,131 @@
+"""
+Fetch complete option chains, for many underlyings at once.
+
+`screeners.options()` returns a single page (50 contracts by default) for one underlying, a full
+chain (SPX has tens of thousands of contracts) needs many pages, and fetching them one after the
+other is slow. `get_option_chain()` fetches all the pages of all the underlyings concurrently,
+and returns them as a single DataFrame.
+
+Examples:
+
+>>> chain = get_option_chain('NASDAQ:AAPL', 'NASDAQ:TSLA')
+>>> chain.loc[('AAPL', pd.Timestamp('2026-08-21'), 200.0, 'call'), ['bid', 'ask', 'iv', 'delta']]
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from tradingview_screener.screeners import options
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    import pandas as pd
+    import requests
+
+    from tradingview_screener.models import ScreenerDictV2
+
+
+PAGE_SIZE = 5000
+CHAIN_INDEX = ['root', 'expiration', 'strike', 'option-type']
+
+
+def _fetch_page(
+    underlying: str,
+    start: int,
+    end: int,
+    columns: list[str] | None,
+    session: requests.Session,
+    kwargs: dict,
+) -> ScreenerDictV2:
+    # the pages must come from a single stable order, otherwise the same contract can show up on
+    # two pages while another one is missing
+    q = options(underlying).order_by('name')
+    if columns is not None:
+        q.query['columns'] = columns
+    q.query['range'] = [start, end]
+    return q.get_scanner_data_raw(session=session, **kwargs)  # pyright: ignore [reportReturnType]
+
+
+def get_option_chain(
+    *underlyings: str,
+    columns: Iterable[str] | None = None,
+    page_size: int = PAGE_SIZE,
+    max_workers: int = 8,
+    session: requests.Session | None = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Fetch every contract of the option chains of the given underlyings.
+
+    The first page of each underlying is requested right away, and as soon as it arrives (and we
+    know how many contracts the chain has) the remaining pages are requested as well, all of them
+    through a thread pool that shares a single `requests.Session`.
+
+    :param underlyings: One or more underlying symbols, e.g. ``'NASDAQ:AAPL'``.
+    :param columns: The columns to fetch (defaults to the columns of `screeners.options()`), the
+        index columns (`root`, `expiration`, `strike`, `option-type`) are always added.
+    :param page_size: The number of contracts to fetch per request.
+    :param max_workers: The maximum number of concurrent requests.
+    :param session: The session used to send the requests, a new one is created by default.
+    :param kwargs: kwargs to pass to `requests.post()`
+    :return: A DataFrame indexed by (`root`, `expiration`, `strike`, `option-type`), with one row
+        per contract, and the `ticker` and `underlying` columns.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    import pandas as pd
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    from tradingview_screener.decode import to_dataframe
+
+    if columns is not None:
+        columns = list(dict.fromkeys([*CHAIN_INDEX, *columns]))  # dedupe and keep the order
+
+    own_session = session is None
+    if session is None:
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_maxsize=max_workers))
+
+    pages: dict[tuple[str, int], ScreenerDictV2] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {
+                executor.submit(_fetch_page, u, 0, page_size, columns, session, kwargs): (u, 0)
+                for u in dict.fromkeys(underlyings)
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    underlying, start = pending.pop(future)
+                    page = pages[underlying, start] = future.result()
+                    if start != 0:
+                        continue
+                    for start in range(page_size, page['totalCount'], page_size):
+                        args = (underlying, start, start + page_size, columns, session, kwargs)
+                        pending[executor.submit(_fetch_page, *args)] = (underlying, start)
+    finally:
+        if own_session:
+            session.close()
+
+    # merge the rows of all the pages (in order) and decode them in one go
+    rows = []
+    underlying_col = []
+    fields: list[str] = []
+    for (underlying, _), page in sorted(pages.items()):
+        page_rows = page.get('symbols') or []
+        rows.extend(page_rows)
+        underlying_col.extend([underlying] * len(page_rows))
+        fields = page.get('fields', fields)
+    merged = {'totalCount': len(rows), 'fields': fields, 'symbols': rows}
+    times = [page['time'] for page in pages.values() if 'time' in page]
+    if times:
+        merged['time'] = min(times)
+
+    df = to_dataframe(merged, screener='options')  # pyright: ignore [reportArgumentType]
+    df.insert(1, 'underlying', pd.Series(underlying_col, dtype=object))
+    if not set(CHAIN_INDEX).issubset(df.columns):
+        return df
+    return df.set_index(CHAIN_INDEX).sort_index()
@@ -0,0 +1,277 @@
+"""
+Fast strike/expiration lookups over an option chain.
+
+Filtering a chain DataFrame with a boolean mask scans every row, which adds up when running
+millions of lookups. `OptionSurface` splits the chain into one slice per (root, expiration,
+option-type), with the strikes stored in a sorted array, so every lookup is a binary search.
+
+Examples:
+
+>>> from tradingview_screener.option_chain import get_option_chain
+>>> surface = OptionSurface(get_option_chain('NASDAQ:AAPL'))
+>>> surface.expirations()
+[numpy.datetime64('2026-04-24'), numpy.datetime64('2026-05-01'), ...]
+>>> surface.lookup('2026-08-21', 200, 'call', 'iv')
+0.2714
+>>> surface.atm('2026-08-21', spot=203.5)
+{'ticker': 'OPRA:AAPL260821C205.0', 'strike': 205.0, 'iv': 0.268, 'delta': 0.49, ...}
+>>> surface.nearest_delta('2026-08-21', -0.25, 'put')['strike']
+185.0
+>>> surface.interpolate('2026-08-21', [197.5, 202.5], columns=['iv', 'bid_iv', 'ask_iv'])
+{'iv': array([0.2731, 0.2702]), 'bid_iv': array([...]), 'ask_iv': array([...])}
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from tradingview_screener.decode import date_int_to_datetime, to_dataframe
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    import pandas as pd
+    from typing_extensions import Literal
+
+    from tradingview_screener.models import ScreenerDictV2
+
+
+_KEYS = ['root', 'expiration', 'option-type']
+
+
+def _to_date(expiration) -> np.datetime64:
+    if isinstance(expiration, (int, np.integer)):  # `20260821`
+        return date_int_to_datetime([expiration])[0].astype('datetime64[D]')
+    if hasattr(expiration, 'to_datetime64'):  # pd.Timestamp
+        expiration = expiration.to_datetime64()
+    return np.datetime64(expiration, 'D')
+
+
+class _Slice:
+    """
+    All the contracts of one (root, expiration, option-type), sorted by strike.
+    """
+
+    def __init__(self, tickers: np.ndarray, strikes: np.ndarray, columns: dict[str, np.ndarray]):
+        self.tickers = tickers
+        self.strikes = strikes
+        self.columns = columns
+        self._delta_order: np.ndarray | None = None
+        self._sorted_deltas: np.ndarray | None = None
+
+    def index_of(self, strike: float) -> int:
+        """
+        Get the position of the strike (or -1 if it doesn't exist).
+        """
+        i = int(np.searchsorted(self.strikes, strike))
+        if i < len(self.strikes) and self.strikes[i] == strike:
+            return i
+        return -1
+
+    def nearest_index(self, strike: float) -> int:
+        i = int(np.searchsorted(self.strikes, strike))
+        if i == 0:
+            return 0
+        if i == len(self.strikes):
+            return i - 1
+        return i if self.strikes[i] - strike < strike - self.strikes[i - 1] else i - 1
+
+    def nearest_delta_index(self, delta: float) -> int:
+        if self._delta_order is None or self._sorted_deltas is None:
+            # the contracts sorted by delta (computed once), ignoring the ones without a delta
+            deltas = self.columns['delta']
+            order = np.argsort(deltas, kind='stable')
+            self._delta_order = order[~np.isnan(deltas[order])]
+            self._sorted_deltas = deltas[self._delta_order]
+        order, sorted_deltas = self._delta_order, self._sorted_deltas
+        if not len(order):
+            raise ValueError('None of the contracts has a delta')
+
+        i = int(np.searchsorted(sorted_deltas, delta))
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(order)]
+        best = min(candidates, key=lambda j: abs(sorted_deltas[j] - delta))
+        return int(order[best])
+
+    def row(self, i: int) -> dict:
+        dct = {'ticker': self.tickers[i], 'strike': float(self.strikes[i])}
+        dct.update({name: values[i].item() for name, values in self.columns.items()})
+        return dct
+
+
+class OptionSurface:
+    """
+    An index over an option chain, for O(log n) lookups by strike and delta, and vectorized
+    interpolation across strikes.
+
+    :param chain: A chain DataFrame, like the one returned by `option_chain.get_option_chain()`
+        (with `root`, `expiration`, `strike`, and `option-type` either in the index or as columns).
+        Use `OptionSurface.from_response()` to build it from the `/scan2` response directly.
+    """
+
+    def __init__(self, chain: pd.DataFrame) -> None:
+        if 'strike' not in chain.columns:
+            chain = chain.reset_index()
+        missing = {*_KEYS, 'strike'}.difference(chain.columns)
+        if missing:
+            raise ValueError(f'The chain is missing the columns: {sorted(missing)}')
+
+        chain = chain.sort_values([*_KEYS, 'strike'], kind='stable')
+        value_columns = [
+            c for c in chain.columns if c not in (*_KEYS, 'strike') and chain[c].dtype.kind in 'fiu'
+        ]
+        expirations = chain['expiration'].to_numpy().astype('datetime64[D]')
+        strikes = chain['strike'].to_numpy(dtype='float64')
+        tickers = chain['ticker'].to_numpy() if 'ticker' in chain.columns else np.arange(len(chain))
+        values = {c: chain[c].to_numpy(dtype='float64', na_value=np.nan) for c in value_columns}
+
+        # {(root, expiration, option_type): _Slice}
+        self._slices: dict[tuple, _Slice] = {}
+        # {(expiration, option_type): [root, ...]}
+        self._roots: dict[tuple, list[str]] = {}
+        groups = chain.groupby(_KEYS, sort=False).indices
+        for key, positions in groups.items():
+            root, _, option_type = key  # pyright: ignore [reportGeneralTypeIssues]
+            expiration = expirations[positions[0]]
+            self._slices[root, expiration, option_type] = _Slice(
+                tickers[positions],
+                strikes[positions],
+                {name: arr[positions] for name, arr in values.items()},
+            )
+            self._roots.setdefault((expiration, option_type), []).append(root)
+
+    @classmethod
+    def from_response(cls, json_obj: ScreenerDictV2) -> OptionSurface:
+        """
+        Build the surface from a `/scan2` response, like the one returned by
+        `screeners.options(...).get_scanner_data_raw()`.
+        """
+        return cls(to_dataframe(json_obj, screener='options'))
+
+    def _slice(
+        self, expiration, option_type: Literal['call', 'put'], root: str | None = None
+    ) -> _Slice:
+        expiration = _to_date(expiration)
+        if root is None:
+            roots = self._roots.get((expiration, option_type), [])
+            if len(roots) != 1:
+                if not roots:
+                    raise KeyError(f'No {option_type} contracts expiring on {expiration}')
+                raise ValueError(
+                    f'There are multiple roots expiring on {expiration}: {roots}, '
+                    f'use the `root` argument to pick one'
+                )
+            root = roots[0]
+        try:
+            return self._slices[root, expiration, option_type]
+        except KeyError:
+            msg = f'No {option_type} contracts for {root!r} expiring on {expiration}'
+            raise KeyError(msg) from None
+
+    def expirations(self, root: str | None = None) -> list[np.datetime64]:
+        return sorted({exp for r, exp, _ in self._slices if root is None or r == root})
+
+    def strikes(
+        self, expiration, option_type: Literal['call', 'put'] = 'call', root: str | None = None
+    ) -> np.ndarray:
+        return self._slice(expiration, option_type, root).strikes
+
+    def lookup(
+        self,
+        expiration,
+        strike: float,
+        option_type: Literal['call', 'put'] = 'call',
+        column: str = 'iv',
+        root: str | None = None,
+    ) -> float:
+        """
+        Get the value of a column for a specific contract (NaN if the strike doesn't exist).
+        """
+        slc = self._slice(expiration, option_type, root)
+        i = slc.index_of(strike)
+        return float(slc.columns[column][i]) if i != -1 else float('nan')
+
+    def lookup_many(
+        self,
+        expiration,
+        strikes: Sequence[float] | np.ndarray,
+        option_type: Literal['call', 'put'] = 'call',
+        column: str = 'iv',
+        root: str | None = None,
+    ) -> np.ndarray:
+        """
+        The vectorized version of `lookup()`.
+        """
+        slc = self._slice(expiration, option_type, root)
+        strikes = np.asarray(strikes, dtype='float64')
+        positions = np.searchsorted(slc.strikes, strikes)
+        clipped = np.minimum(positions, len(slc.strikes) - 1)
+        found = (positions < len(slc.strikes)) & (slc.strikes[clipped] == strikes)
+        return np.where(found, slc.columns[column][clipped], np.nan)
+
+    def contract(
+        self,
+        expiration,
+        strike: float,
+        option_type: Literal['call', 'put'] = 'call',
+        root: str | None = None,
+    ) -> dict:
+        """
+        Get all the values of the contract with the strike closest to the one given.
+        """
+        slc = self._slice(expiration, option_type, root)
+        return slc.row(slc.nearest_index(strike))
+
+    def atm(
+        self,
+        expiration,
+        spot: float,
+        option_type: Literal['call', 'put'] = 'call',
+        root: str | None = None,
+    ) -> dict:
+        """
+        Get the at-the-money contract, i.e. the one with the strike closest to the spot price.
+        """
+        return self.contract(expiration, spot, option_type, root)
+
+    def nearest_delta(
+        self,
+        expiration,
+        delta: float,
+        option_type: Literal['call', 'put'] = 'call',
+        root: str | None = None,
+    ) -> dict:
+        """
+        Get the contract with the delta closest to the one given (e.g. `0.25` or `-0.25` for puts).
+        """
+        slc = self._slice(expiration, option_type, root)
+        return slc.row(slc.nearest_delta_index(delta))
+
+    def interpolate(
+        self,
+        expiration,
+        strikes: Sequence[float] | np.ndarray,
+        option_type: Literal['call', 'put'] = 'call',
+        columns: Iterable[str] = ('iv', 'bid_iv', 'ask_iv'),
+        root: str | None = None,
+    ) -> dict[str, np.ndarray]:
+        """
+        Linearly interpolate the columns across strikes (contracts with a null value are skipped),
+        strikes outside the range of the chain get NaN.
+
+        :return: A dictionary with an array of values (one per strike) for each column.
+        """
+        slc = self._slice(expiration, option_type, root)
+        strikes = np.asarray(strikes, dtype='float64')
+        result = {}
+        for column in columns:
+            values = slc.columns[column]
+            valid = ~np.isnan(values)
+            if not valid.any():
+                result[column] = np.full(len(strikes), np.nan)
+                continue
+            result[column] = np.interp(
+                strikes, slc.strikes[valid], values[valid], left=np.nan, right=np.nan
+            )
+        return result
@@ -0,0 +1,166 @@
+"""
+Page through the results of a query for an interactive UI, with read-ahead.
+
+Changing `Query.offset()` and sending a new request on every click costs a full round trip per
+page. `Pager` keeps the pages it fetched, and as soon as a page is shown, it fetches the next
+`read_ahead` pages in the background, so moving to the adjacent pages is usually instant:
+
+>>> pager = Pager(Query().select('name', 'close', 'change'), page_size=100, read_ahead=2)
+>>> pager.page(0)  # fetches the page 0, and pages 1 and 2 in the background
+>>> pager.next_page()  # already fetched (or in flight)
+>>> pager.count, pager.pages
+(4382, 44)
+
+When the query changes (compared with `Query.fingerprint()`, ignoring the `range`), all the
+pages are dropped on the next call, so editing the filters of `pager.query` in place is fine:
+
+>>> pager.query.where(col('change') > 5)
+>>> pager.page(0)  # a new request
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from tradingview_screener.fingerprint import fingerprint
+from tradingview_screener.query import DEFAULT_RANGE
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    import pandas as pd
+    import requests
+    from typing_extensions import Self
+
+    from tradingview_screener.query import Query
+
+
+class Pager:
+    """
+    A cache of the pages of a query, with read-ahead, see the module docstring.
+
+    :param query: The query (its `range` is ignored).
+    :param page_size: The number of rows per page.
+    :param read_ahead: The number of pages after the current one to fetch in the background.
+    :param max_pages: The maximum number of pages to keep, the least recently used ones are
+        dropped first.
+    :param max_workers: The number of requests sent concurrently.
+    :param session: A session shared by all the requests.
+    :param kwargs: kwargs to pass to `Query.get_scanner_data()`
+    """
+
+    def __init__(
+        self,
+        query: Query,
+        page_size: int = 100,
+        read_ahead: int = 2,
+        max_pages: int = 50,
+        max_workers: int = 4,
+        session: requests.Session | None = None,
+        **kwargs,
+    ) -> None:
+        if page_size <= 0:
+            raise ValueError('The page size must be positive')
+        if max_pages <= read_ahead:
+            raise ValueError('`max_pages` must be larger than `read_ahead`')
+        self.query = query
+        self.page_size = page_size
+        self.read_ahead = read_ahead
+        self.max_pages = max_pages
+        self.session = session
+        self.kwargs = kwargs
+        self.count: int | None = None  # the number of rows that matched
+        self.current = 0
+        self.hits = 0  # the pages that were already fetched (or in flight)
+        self.misses = 0
+        self._pages: OrderedDict[int, Future[pd.DataFrame]] = OrderedDict()
+        self._generation = 0  # incremented when the query changes
+        self._fingerprint = self._query_fingerprint()
+        self._executor = ThreadPoolExecutor(max_workers)
+        self._lock = threading.Lock()
+
+    @property
+    def pages(self) -> int | None:
+        """
+        The number of pages (unknown until the first page is fetched).
+        """
+        return None if self.count is None else math.ceil(self.count / self.page_size)
+
+    def _query_fingerprint(self) -> str:
+        q = self.query
+        return fingerprint({**q.query, 'range': DEFAULT_RANGE}, q.url, q.derived)
+
+    def invalidate(self) -> None:
+        """
+        Drop all the pages (this is done automatically when the query changes).
+        """
+        with self._lock:
+            for future in self._pages.values():
+                future.cancel()
+            self._pages.clear()
+            self._generation += 1
+            self._fingerprint = self._query_fingerprint()
+            self.count = None
+
+    def _fetch(self, query: Query, generation: int) -> pd.DataFrame:
+        count, df = query.get_scanner_data(session=self.session, **self.kwargs)
+        if generation == self._generation:
+            self.count = count
+        return df
+
+    def _submit(self, n: int) -> Future[pd.DataFrame]:
+        future = self._pages.get(n)
+        # the failed requests are sent again
+        if future is None or future.cancelled() or (future.done() and future.exception()):
+            q = self.query.copy()
+            q.query['range'] = [n * self.page_size, (n + 1) * self.page_size]
+            future = self._executor.submit(self._fetch, q, self._generation)
+            self._pages[n] = future
+        self._pages.move_to_end(n)
+        while len(self._pages) > self.max_pages:
+            _, evicted = self._pages.popitem(last=False)
+            evicted.cancel()
+        return future
+
+    def page(self, n: int) -> pd.DataFrame:
+        """
+        Get a page (starting from 0), and fetch the next `read_ahead` pages in the background.
+
+        Note that the cached DataFrames are returned as is (without a copy).
+        """
+        if n < 0:
+            raise IndexError(f'Page {n} is out of range')
+        if self._query_fingerprint() != self._fingerprint:
+            self.invalidate()
+        with self._lock:
+            if n in self._pages:
+                self.hits += 1
+            else:
+                self.misses += 1
+            future = self._submit(n)
+            for m in range(n + 1, n + 1 + self.read_ahead):
+                if self.count is not None and m * self.page_size >= self.count:
+                    break
+                self._submit(m)
+            self._pages.move_to_end(n)  # the most recently used page
+        self.current = n
+        return future.result()
+
+    def next_page(self) -> pd.DataFrame:
+        return self.page(self.current + 1)
+
+    def previous_page(self) -> pd.DataFrame:
+        return self.page(max(self.current - 1, 0))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,323 @@
+"""
+Split the filters of a query between the server and the client.
+
+Some filters can't be sent to the API: comparisons of computed columns (see `derived.Expression`)
+and regexes (`Column.regex()`). Rather than fetching everything and filtering in pandas by hand,
+`Query.get_scanner_data()` plans such queries automatically:
+
+>>> Query().select('name', 'close').where(
+...     col('type') == 'stock',
+...     col('close') / col('price_52_week_high') > 0.95,
+...     col('name').regex(r'^[A-Z]{4}$'),
+... ).limit(20).get_scanner_data()
+
+- the filters that the API supports (the operations of `models.FilterOperationDict`) are pushed
+  down to the server, including the supported parts of the groups that can't be sent as a whole
+  (the server gets a looser filter, so it returns every row that could match, and fewer rows than
+  without it)
+- the rest (the "residual") is evaluated on the client, over the raw columns of the response (see
+  `tradingview_screener.local`), and the columns it needs are fetched along with the selected
+  ones (and dropped afterwards)
+- since the residual can drop rows, the `range` is widened: the rows are fetched in pages from the
+  start, and the size of the next page is estimated from the ratio of rows that matched so far,
+  until there are enough rows or the server has no more rows
+
+The `count` returned with such queries is exact only when all the rows were fetched, otherwise
+it's estimated from the ratio of rows that matched (and `df.attrs['count_estimated']` is True).
+
+Use `plan()` to see how a query is split:
+
+>>> plan(q.query)
+<Plan server=3 residual=2 helpers=['price_52_week_high']>
+"""
+
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+from tradingview_screener.decode import split_response
+from tradingview_screener.derived import Derived, Expression
+from tradingview_screener.local import SUPPORTED_OPERATIONS, _is_column, evaluate, is_supported
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    import numpy as np
+
+    from tradingview_screener.models import (
+        FilterOperationDict,
+        OperationComparisonDict,
+        QueryDict,
+        ScreenerDict,
+        ScreenerDictV2,
+    )
+    from tradingview_screener.optimizer import Node
+    from tradingview_screener.query import Query
+
+
+# the operations of `models.FilterOperationDict`
+SERVER_OPERATIONS = frozenset(
+    [
+        'greater',
+        'egreater',
+        'less',
+        'eless',
+        'equal',
+        'nequal',
+        'in_range',
+        'not_in_range',
+        'empty',
+        'nempty',
+        'crosses',
+        'crosses_above',
+        'crosses_below',
+        'match',
+        'nmatch',
+        'smatch',
+        'has',
+        'has_none_of',
+        'above%',
+        'below%',
+        'in_range%',
+        'not_in_range%',
+        'in_day_range',
+        'in_week_range',
+        'in_month_range',
+    ]
+)
+# the size of the first page is the number of rows needed divided by this ratio
+INITIAL_SELECTIVITY = 0.5
+# the smallest ratio of matching rows used to estimate the size of the next page
+MIN_SELECTIVITY = 0.01
+
+
+def is_pushable(expr: FilterOperationDict) -> bool:
+    """
+    Check if the server can evaluate an expression.
+    """
+    return (
+        isinstance(expr['left'], str)
+        and expr['operation'] in SERVER_OPERATIONS
+        and not isinstance(expr.get('right'), Derived)
+    )
+
+
+def _expressions(node: Node):
+    if 'expression' in node:
+        yield node['expression']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+    else:
+        for operand in node['operation']['operands']:  # pyright: ignore
+            yield from _expressions(operand)
+
+
+def _is_pushable_tree(node: Node) -> bool:
+    return all(is_pushable(expr) for expr in _expressions(node))
+
+
+def _relax(node: Node) -> Node | None:
+    """
+    Get a filter that the server supports, and that matches every row that `node` matches, or
+    None if it would match everything.
+    """
+    if 'expression' in node:
+        return node if is_pushable(node['expression']) else None  # pyright: ignore
+    group = node['operation']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+    operands = [_relax(operand) for operand in group['operands']]
+    if group['operator'] == 'or' and any(operand is None for operand in operands):
+        return None  # one of the branches can be anything
+    operands = [operand for operand in operands if operand is not None]
+    if not operands:
+        return None
+    return {'operation': {'operator': group['operator'], 'operands': operands}}  # pyright: ignore
+
+
+def needs_planning(query: QueryDict) -> bool:
+    """
+    Check if a query has filters that the server can't evaluate.
+    """
+    nodes: list[Node] = [{'expression': expr} for expr in query.get('filter', [])]
+    if query.get('filter2'):
+        nodes.append({'operation': query['filter2']})  # pyright: ignore
+    return not all(_is_pushable_tree(node) for node in nodes)
+
+
+class Plan:
+    """
+    How a query is split between the server and the client (see the module docstring).
+
+    :ivar server_query: The query that is sent (without the residual filters, and with the
+        helper columns).
+    :ivar residual: The filters that are evaluated on the client (joined with AND).
+    :ivar helpers: The columns that are only fetched for the residual filters.
+    :raises ValueError: If a residual filter has operations that can only be evaluated by the
+        server (like `crosses_above`).
+    """
+
+    def __init__(self, query: QueryDict) -> None:
+        server_query: QueryDict = {**query}  # pyright: ignore [reportAssignmentType]
+        residual: list[Node] = []
+
+        pushed = []
+        for expr in query.get('filter', []):
+            (pushed if is_pushable(expr) else residual).append({'expression': expr})
+        server_query['filter'] = [node['expression'] for node in pushed]  # pyright: ignore
+
+        filter2 = query.get('filter2')
+        if filter2 is not None and not _is_pushable_tree({'operation': filter2}):
+            relaxed = _relax({'operation': filter2})
+            if relaxed is None:
+                server_query.pop('filter2')
+            else:
+                server_query['filter2'] = relaxed['operation']  # pyright: ignore
+            operands = (
+                filter2['operands'] if filter2['operator'] == 'and' else [{'operation': filter2}]
+            )
+            residual += [n for n in operands if not _is_pushable_tree(n)]  # pyright: ignore
+
+        self.residual: OperationComparisonDict | None = (
+            {'operator': 'and', 'operands': residual} if residual else None  # pyright: ignore
+        )
+        if not is_supported(self.residual):
+            # checked before any request is sent
+            unsupported = sorted(
+                {
+                    expr['operation']
+                    for node in residual
+                    for expr in _expressions(node)
+                    if expr['operation'] not in SUPPORTED_OPERATIONS
+                }
+            )
+            raise ValueError(
+                f'The filters {unsupported} are only supported by the server, and they are in a '
+                "group (like an OR) with filters that the server can't evaluate"
+            )
+
+        columns = list(query.get('columns', []))
+        needed = []
+        for node in residual:
+            for expr in _expressions(node):
+                left, right = expr['left'], expr.get('right')
+                needed += left.inputs if isinstance(left, Derived) else [left]
+                if isinstance(right, Derived):
+                    needed += right.inputs
+                elif _is_column(right):
+                    needed.append(right)
+        self.helpers = [c for c in dict.fromkeys(needed) if c not in columns]
+        server_query['columns'] = columns + self.helpers
+        self.server_query = server_query
+        self.columns = columns
+
+    def __repr__(self) -> str:
+        n = len(self.residual['operands']) if self.residual else 0
+        filter2 = self.server_query.get('filter2')
+        pushed = len(self.server_query.get('filter', [])) + (
+            len(filter2['operands']) if filter2 else 0
+        )
+        return f'<Plan server={pushed} residual={n} helpers={self.helpers}>'
+
+    def _client_filter(
+        self, filter2: OperationComparisonDict, expressions: dict[str, Expression]
+    ) -> OperationComparisonDict:
+        """
+        Replace the expressions with the keys of their values (in `expressions`), so the filter
+        can be evaluated by `local.evaluate()`.
+        """
+        operands = []
+        for node in filter2['operands']:
+            if 'operation' in node:
+                operation = self._client_filter(node['operation'], expressions)  # pyright: ignore
+                operands.append({'operation': operation})
+                continue
+            expr = dict(node['expression'])  # pyright: ignore [reportTypedDictNotRequiredAccess]
+            if isinstance(expr.get('right'), Derived):
+                # `a > b` -> `a - b > 0`, so the expression is always on the left
+                expr['left'] = Expression.wrap(expr['left']) - expr['right']  # pyright: ignore
+                expr['right'] = 0
+            if isinstance(expr['left'], Expression):
+                # a key that can't be the name of a real column
+                key = f'\0{len(expressions)}'
+                expressions[key] = expr['left']
+                expr['left'] = key
+            operands.append({'expression': expr})
+        return {'operator': filter2['operator'], 'operands': operands}  # pyright: ignore
+
+    def evaluate(self, fields: Sequence[str], values: Sequence[Sequence], n: int) -> np.ndarray:
+        """
+        Evaluate the residual filters over the columns of a response (see
+        `decode.split_response()`).
+
+        :return: A boolean array with one item per row.
+        """
+        import pandas as pd
+
+        columns: dict = {}  # {name: values}
+        for name, vals in zip(fields, values):
+            columns.setdefault(name, vals)
+        if self.residual is None:
+            return evaluate(None, columns, n)
+
+        expressions: dict[str, Expression] = {}
+        residual = self._client_filter(self.residual, expressions)
+        inputs = {c for expr in expressions.values() for c in expr.inputs}
+        df = pd.DataFrame({c: pd.Series(columns[c], dtype=object) for c in inputs}, index=range(n))
+        for key, expr in expressions.items():
+            columns[key] = expr.compute(df).to_numpy(dtype='float64', na_value=float('nan'))
+        return evaluate(residual, columns, n)
+
+
+def plan(query: QueryDict) -> Plan:
+    """
+    Split the filters of a query between the server and the client.
+    """
+    return Plan(query)
+
+
+def fetch(
+    query: Query, max_rows: int = 100_000, **kwargs
+) -> tuple[ScreenerDict | ScreenerDictV2, bool]:
+    """
+    Send a query that has filters that the server can't evaluate, and apply them on the client.
+
+    :param max_rows: The maximum number of rows to fetch from the server.
+    :param kwargs: kwargs to pass to `Query.get_scanner_data_raw()`
+    :return: A tuple of: (response, count_estimated). The response is like the ones from
+        `Query.get_scanner_data_raw()`, with the rows that matched in the `range` of the query,
+        and only its columns.
+    """
+    from tradingview_screener.query import DEFAULT_RANGE
+
+    p = Plan(query.query)
+    start, end = query.query.get('range', DEFAULT_RANGE)
+    server = query.copy()
+    server.query = p.server_query
+
+    rows: list[dict] = []
+    fetched = 0
+    page = max(math.ceil(end / INITIAL_SELECTIVITY), 1)
+    while True:
+        server.query['range'] = [fetched, fetched + page]
+        json_obj = server.get_scanner_data_raw(**kwargs)
+        key = 'f' if 'fields' in json_obj else 'd'
+        rows_key = 'symbols' if key == 'f' else 'data'
+        page_rows: list[dict] = json_obj.get(rows_key) or []  # pyright: ignore
+        fields, tickers, values = split_response(json_obj, p.server_query['columns'])
+        mask = p.evaluate(fields, values, len(tickers))
+        rows += [row for row, matched in zip(page_rows, mask.tolist()) if matched]
+        fetched += len(page_rows)
+        total = json_obj['totalCount']
+        if len(rows) >= end or fetched >= total or not page_rows or fetched >= max_rows:
+            break
+        selectivity = max(len(rows) / fetched, MIN_SELECTIVITY)
+        page = min(math.ceil((end - len(rows)) / selectivity), max_rows - fetched)
+
+    estimated = fetched < total and len(page_rows) > 0
+    count = round(len(rows) / fetched * total) if estimated else len(rows)
+    n = len(p.columns)
+    result_rows = [{'s': row['s'], key: row[key][:n]} for row in rows[start:end]]
+    if key == 'd':
+        return {'totalCount': count, 'data': result_rows}, estimated  # pyright: ignore
+    response = {'totalCount': count, 'fields': p.columns, 'symbols': result_rows}
+    if 'time' in json_obj:
+        response['time'] = json_obj['time']
+    return response, estimated  # pyright: ignore [reportReturnType]
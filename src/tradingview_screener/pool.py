@@ -0,0 +1,228 @@
+"""
+Decode responses in a pool of processes, for when decoding (rather than the network) is the
+bottleneck.
+
+Parsing the JSON of a full-universe scan and converting it into columns is pure Python, so with
+many concurrent scans it saturates a single core (because of the GIL), even if the requests
+themselves are sent concurrently. `DecodePool` sends the response bodies to worker processes,
+which parse them and convert them into numpy arrays, and return the arrays through shared memory
+(instead of pickling them through a pipe). The parent process only builds the DataFrame from the
+arrays.
+
+Examples:
+
+>>> with DecodePool() as pool:
+...     futures = [pool.fetch(Query().set_markets(m).limit(100_000)) for m in markets]
+...     for future in as_completed(futures):
+...         count, df = future.result()
+
+Or, to decode bodies that were fetched some other way (e.g. with an async HTTP client):
+
+>>> count, df = pool.decode(body, columns=q.query['columns']).result()
+"""
+
+from __future__ import annotations
+
+import json
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from tradingview_screener import sharedmem
+from tradingview_screener.decode import columns_to_dataframe, split_response
+from tradingview_screener.fields import screener_from_url
+from tradingview_screener.optimizer import is_unsatisfiable
+from tradingview_screener.planner import needs_planning
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from concurrent.futures import Future
+
+    import numpy as np
+    import pandas as pd
+    import requests
+    from typing_extensions import Self
+
+    from tradingview_screener.query import Query
+
+    # (name, dtype, offset, length) of an array in the shared memory block, or
+    # (name, 'pickle', offset, length) of a pickled list
+    Layout = list[tuple[str, str, int, int]]
+
+
+def _encode_column(values: Sequence) -> tuple[np.ndarray, np.ndarray | None] | None:
+    """
+    Convert a column into a numpy array that can be copied into shared memory, and a mask of
+    the nulls (for strings), or None if the values are neither numbers nor strings.
+    """
+    import numpy as np
+
+    if all(x is None for x in values):
+        return None  # pandas keeps these as `object`
+    try:
+        arr = np.array(values)
+    except (TypeError, ValueError):  # lists of different lengths
+        arr = None
+    if arr is not None and arr.ndim == 1:
+        if arr.dtype.kind in 'biuf':  # no nulls, keep the inferred dtype
+            return arr, None
+        # numbers mixed with nulls (`float64` would also parse strings like '7203')
+        if arr.dtype.kind == 'O' and all(x is None or isinstance(x, (int, float)) for x in values):
+            return np.array(values, dtype='float64'), None  # `None` becomes NaN
+    if all(x is None or isinstance(x, str) for x in values):
+        nulls = np.fromiter((x is None for x in values), dtype=bool, count=len(values))
+        return np.array(['' if x is None else x for x in values], dtype=str), nulls
+    return None
+
+
+def _decode_worker(body: bytes | str, columns: Sequence[str]) -> dict:
+    """
+    Parse a response body and write its columns into a new shared memory block.
+
+    This runs in the worker processes, the parent process is responsible for unlinking the block.
+    """
+    json_obj = json.loads(body)
+    fields, tickers, values = split_response(json_obj, columns)
+
+    chunks: list[tuple[str, str, bytes | memoryview]] = []
+    for name, column in [('ticker', tickers), *zip(fields, values)]:
+        encoded = _encode_column(column)
+        if encoded is None:  # sets and mixed types
+            chunks.append((name, 'pickle', pickle.dumps(list(column), protocol=5)))
+            continue
+        arr, nulls = encoded
+        chunks.append((name, arr.dtype.str, arr.view('uint8').data))
+        if nulls is not None:
+            chunks.append((name, 'nulls', nulls.view('uint8').data))
+
+    layout: Layout = []
+    offset = 0
+    for name, kind, data in chunks:
+        layout.append((name, kind, offset, len(data)))
+        offset += len(data)
+
+    shm = sharedmem.create(max(offset, 1))
+    try:
+        for (_, _, start, length), (_, _, data) in zip(layout, chunks):
+            shm.buf[start : start + length] = data  # pyright: ignore [reportOptionalSubscript]
+    except BaseException:
+        # the block isn't tracked, and the parent process never gets its name
+        sharedmem.unlink(shm)
+        raise
+    shm.close()
+    return {
+        'shm': shm.name,
+        'layout': layout,
+        'fields': fields,
+        'totalCount': json_obj['totalCount'],
+        'time': json_obj.get('time'),
+    }
+
+
+def _read_columns(result: dict) -> list[list]:
+    """
+    Copy the columns out of the shared memory block of a worker, and unlink the block.
+    """
+    import numpy as np
+
+    shm = sharedmem.attach(result['shm'])
+    # the columns in the order of the layout, so duplicated fields are kept
+    columns: list[list] = []
+    try:
+        for name, kind, start, length in result['layout']:
+            data = shm.buf[start : start + length]  # pyright: ignore [reportOptionalSubscript]
+            if kind == 'pickle':
+                columns.append([name, pickle.loads(data)])
+            elif kind == 'nulls':
+                values = columns[-1][1].astype(object)
+                values[np.frombuffer(data, dtype=bool)] = None
+                columns[-1][1] = values
+            else:
+                columns.append([name, np.frombuffer(data, dtype=kind).copy()])
+            del data  # release the view, otherwise the block can't be closed
+    finally:
+        sharedmem.unlink(shm)
+    return columns
+
+
+class DecodePool:
+    """
+    A pool of processes that decode responses of the scanner API, see the module docstring.
+
+    :param max_workers: The number of worker processes (defaults to the number of CPUs).
+    :param max_requests: The number of requests that `fetch()` sends concurrently.
+    :param mp_context: The multiprocessing context of the workers (see `ProcessPoolExecutor`).
+    """
+
+    def __init__(self, max_workers: int | None = None, max_requests: int = 16, mp_context=None):
+        self._processes = ProcessPoolExecutor(max_workers, mp_context=mp_context)
+        self._threads = ThreadPoolExecutor(max_requests)
+
+    def _build(self, future: Future, screener: str, compact: bool) -> tuple[int, pd.DataFrame]:
+        result = future.result()
+        columns = _read_columns(result)
+        tickers = columns[0][1] if columns else []
+        values = [vals for _, vals in columns[1:]]
+        df = columns_to_dataframe(
+            result['fields'], tickers, values, screener, result['time'], compact
+        )
+        return result['totalCount'], df
+
+    def decode(
+        self,
+        body: bytes | str,
+        columns: Sequence[str] = (),
+        screener: str = 'stocks',
+        compact: bool = False,
+    ) -> Future[tuple[int, pd.DataFrame]]:
+        """
+        Decode a response body in a worker process.
+
+        :param body: The body of the response from `/scan` or `/scan2`.
+        :param columns: The columns that were selected in the query (only used for `/scan`).
+        :param screener: The name of the screener, used to look up the field types.
+        :param compact: Downcast the columns to save memory (see `decode.compact_dataframe()`).
+        :return: A future of (total_count, dataframe), like `Query.get_scanner_data()`.
+        """
+        future = self._processes.submit(_decode_worker, body, list(columns))
+        # the DataFrame is built by a thread, so the caller isn't blocked
+        return self._threads.submit(self._build, future, screener, compact)
+
+    def _fetch(
+        self, query: Query, session: requests.Session | None, compact: bool, kwargs: dict
+    ) -> tuple[int, pd.DataFrame]:
+        if is_unsatisfiable(query.query):
+            return query.get_scanner_data(compact=compact)
+        if needs_planning(query.query):
+            # some filters are evaluated on the client, see `tradingview_screener.planner`
+            return query.get_scanner_data(compact=compact, session=session, **kwargs)
+        body = query._send(session, **kwargs).content
+        columns = query.query.get('columns', ())
+        screener = screener_from_url(query.url)
+        result = self._processes.submit(_decode_worker, body, list(columns))
+        return self._build(result, screener, compact)
+
+    def fetch(
+        self,
+        query: Query,
+        session: requests.Session | None = None,
+        compact: bool = False,
+        **kwargs,
+    ) -> Future[tuple[int, pd.DataFrame]]:
+        """
+        Send a query (in a thread), and decode its response in a worker process.
+
+        :param kwargs: kwargs to pass to `requests.post()`
+        :return: A future of (total_count, dataframe), like `Query.get_scanner_data()`.
+        """
+        return self._threads.submit(self._fetch, query, session, compact, kwargs)
+
+    def close(self) -> None:
+        self._threads.shutdown()
+        self._processes.shutdown()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -6,14 +6,19 @@ import copy
 import pprint
 from typing import TYPE_CHECKING
 
-import requests
-
 from tradingview_screener.column import Column
+from tradingview_screener.fields import screener_from_url, validate_fields
+from tradingview_screener.optimizer import is_unsatisfiable, optimize_query
 
 if TYPE_CHECKING:
     import pandas as pd
+    import requests
     from typing import Literal, Any
     from typing_extensions import Self
+    from collections.abc import AsyncIterator, Callable, Sequence
+    from tradingview_screener.cache import ResultCache
+    from tradingview_screener.derived import Derived
+    from tradingview_screener.diff import ChangeEvent
     from tradingview_screener.models import (
         QueryDict,
         SortByDict,
@@ -372,11 +377,55 @@ class Query:
         self.query: QueryDict = copy.deepcopy(STOCKS_QUERY)
         self.query['markets'] = [market]
         self.url = URL.format(market=market)
+        # the columns computed on the client (see `select()`), and the order of the result
+        self.derived: list[Derived] = []
+        self._output: list[str] = []
+
+    def select(self, *columns: Column | Derived | str, validate: bool = False) -> Self:
+        """
+        Select the columns (fields) to retrieve.
+
+        Examples:
 
-    def select(self, *columns: Column | str) -> Self:
-        self.query['columns'] = [
-            col.name if isinstance(col, Column) else Column(col).name for col in columns
-        ]
+        >>> Query().select('name', 'close', Column('volume'))
+
+        Pass `validate=True` to check the names against the field registry (see
+        `tradingview_screener.fields`) before sending anything, so a typo fails right away:
+        >>> Query().select('name', 'clsoe', validate=True)
+        ValueError: Unknown field(s) in the 'stocks' screener: 'clsoe' (did you mean: 'close'?)
+
+        Columns that the API doesn't have can be computed on the client, with the arithmetic
+        operators of `Column` (see `derived.Expression`). The columns they use are fetched along
+        with the others (once), and the ones that weren't selected are dropped from the result:
+        >>> Query().select('name', col('close') / col('price_52_week_high')).get_scanner_data()
+        (17580,
+                  ticker  name  close / price_52_week_high
+         0   NASDAQ:NVDA  NVDA                    0.962811
+         ...
+
+        :param columns: One or more `Column` objects, column names, or `derived.Derived`
+            columns (like expressions).
+        :param validate: Raise a `ValueError` if a column isn't in the field registry of the
+            screener. Note that the registry only covers the most popular fields, so it's off by
+            default.
+        """
+        from tradingview_screener.derived import Derived
+
+        names = []
+        self.derived = []
+        self._output = []
+        for col in columns:
+            if isinstance(col, Derived):
+                self.derived.append(col)
+                self._output.append(col.name)
+            else:
+                names.append(col.name if isinstance(col, Column) else Column(col).name)
+                self._output.append(names[-1])
+        # the inputs of the derived columns that weren't selected
+        helpers = [c for d in self.derived for c in d.inputs if c not in names]
+        self.query['columns'] = names + list(dict.fromkeys(helpers))
+        if validate:
+            validate_fields(self.query['columns'], screener_from_url(self.url))
         return self
 
     def where(self, *expressions: FilterOperationDict) -> Self:
@@ -682,17 +731,82 @@ class Query:
     #         self.query['price_conversion'] = {'to_currency': currency}
     #     return self
 
+    def optimize(self) -> Self:
+        """
+        Simplify the filters before sending the query (see `tradingview_screener.optimizer`).
+
+        The `where()` expressions are merged into the `where2()` tree, nested groups are flattened,
+        duplicates are removed, and the bounds on the same column are merged. If the filters can
+        never be true, the query is answered locally (with no rows) without sending any request.
+
+        Examples:
+
+        >>> q = Query().where(col('close') > 5, col('close') > 10, col('close') < 20).optimize()
+        >>> q.query['filter2']['operands'][-2:]
+        [{'expression': {'left': 'close', 'operation': 'greater', 'right': 10}},
+         {'expression': {'left': 'close', 'operation': 'less', 'right': 20}}]
+
+        >>> Query().where(col('close') > 10, col('close') < 5).optimize().get_scanner_data()
+        (0,
+         Empty DataFrame
+         Columns: [ticker, name, close, ...]
+         Index: [])
+        """
+        self.query = optimize_query(self.query)
+        return self
+
+    def fingerprint(self) -> str:
+        """
+        Get a short stable digest of the query, which is the same for all the queries that mean
+        the same thing (regardless of the order of the filters, `Column` vs `str`, etc.), so it can
+        be used as a cache key (see `tradingview_screener.fingerprint`).
+
+        >>> Query().where(col('close') > 5, col('volume') > 1e6).fingerprint()
+        'b18fa2b46b4173777f8040cf119c6602'
+        """
+        from tradingview_screener.fingerprint import fingerprint
+
+        return fingerprint(self.query, self.url, self.derived)
+
     def set_property(self, key: str, value: Any) -> Self:
         self.query[key] = value
         return self
 
-    def get_scanner_data_raw(self, **kwargs) -> ScreenerDict | ScreenerDictV2:
+    def _send(self, session: requests.Session | None = None, **kwargs) -> requests.Response:
+        # `requests` is imported lazily, so that processes which only build queries (and ship the
+        # `QueryDict` somewhere else) don't pay for its import time.
+        import requests
+
+        kwargs.setdefault('headers', HEADERS)
+        kwargs.setdefault('timeout', 20)
+        post = session.post if session is not None else requests.post
+        r = post(self.url, json=self.query, **kwargs)
+
+        if not r.ok:
+            # add the body to the error message for debugging purposes
+            r.reason += f'\n Body: {r.text}\n'
+            r.raise_for_status()
+        return r
+
+    def get_scanner_data_raw(
+        self,
+        session: requests.Session | None = None,
+        cache: ResultCache | None = None,
+        **kwargs,
+    ) -> ScreenerDict | ScreenerDictV2:
         """
         Perform a POST web-request and return the data from the API (dictionary).
 
         Note that you can pass extra keyword-arguments that will be forwarded to `requests.post()`,
         this can be very useful if you want to pass your own headers/cookies.
 
+        You can also pass a `requests.Session` to reuse its connections (and cookies) across many
+        requests, which is much faster when sending many queries.
+
+        If a `cache.ResultCache` is given, the query is answered from it when possible (either
+        with the response of the same query, or by filtering the response of a looser one),
+        otherwise the response is stored in it.
+
         >>> Query().select('close', 'volume').limit(5).get_scanner_data_raw()
         {
             'totalCount': 17559,
@@ -704,21 +818,37 @@ class Query:
                 {'s': 'NASDAQ:SBUX', 'd': [95.9, 157211696]},
             ],
         }
-        """
-        self.query.setdefault('range', DEFAULT_RANGE.copy())
-
-        kwargs.setdefault('headers', HEADERS)
-        kwargs.setdefault('timeout', 20)
-        r = requests.post(self.url, json=self.query, **kwargs)
 
-        if not r.ok:
-            # add the body to the error message for debugging purposes
-            r.reason += f'\n Body: {r.text}\n'
-            r.raise_for_status()
-
-        return r.json()
+        The queries with filters that the server can't evaluate (see `planner`) are rejected,
+        use `get_scanner_data()` or `planner.fetch()` for them.
+        """
+        from tradingview_screener.planner import needs_planning
 
-    def get_scanner_data(self, **kwargs) -> tuple[int, pd.DataFrame]:
+        if needs_planning(self.query):
+            raise ValueError(
+                "The query has filters that the server can't evaluate, use `get_scanner_data()` "
+                'or `planner.fetch()` instead (see `planner`)'
+            )
+        self.query.setdefault('range', DEFAULT_RANGE.copy())
+        if is_unsatisfiable(self.query):
+            # no need to ask the server, see `Query.optimize()`
+            if '/scan2' in self.url:
+                columns = list(self.query.get('columns', []))
+                return {'totalCount': 0, 'fields': columns, 'symbols': []}  # pyright: ignore
+            return {'totalCount': 0, 'data': []}
+        if cache is not None:
+            cached = cache.get(self.query, self.url)
+            if cached is not None:
+                return cached
+
+        json_obj = self._send(session, **kwargs).json()
+        if cache is not None:
+            cache.put(self.query, self.url, json_obj)
+        return json_obj
+
+    def get_scanner_data(
+        self, compact: bool = False, derived: Sequence[Derived] = (), **kwargs
+    ) -> tuple[int, pd.DataFrame]:
         """
         Perform a POST web-request and return the data from the API as a DataFrame (along with
         the number of rows/tickers that matched your query).
@@ -731,38 +861,252 @@ class Query:
         Note that to get live-data you have to authenticate, which is done by passing your cookies.
         Have a look in the README at the "Real-Time Data Access" sections.
 
-        :param kwargs: kwargs to pass to `requests.post()`
+        ### Compact mode
+
+        If you keep many results in memory, pass `compact=True` to downcast the columns to the
+        smallest dtypes that can hold them (`float32` prices, narrow integers, and categorical
+        strings), the number of bytes saved is stored in `df.attrs['memory_saved']`.
+        >>> _, df = Query().select('close', 'volume', 'exchange').get_scanner_data(compact=True)
+        >>> df.attrs['memory_saved']
+        4514
+
+        ### Dates and server time
+
+        Timestamp fields (like `earnings_release_next_trading_date_fq`) and date fields (like the
+        options `expiration`) are converted to `datetime64` columns. The `/scan2` endpoint (used
+        by `screeners.options()`) also returns the time of the snapshot, which is stored in
+        `df.attrs['time']`.
+
+        ### Client-side filters
+
+        Filters on computed columns (like `col('close') / col('VWAP') > 1.02`) and regexes
+        (`Column.regex()`) can't be sent to the API, so they are evaluated on the client, while
+        everything else is still filtered by the server (see `tradingview_screener.planner`).
+
+        ### Derived columns
+
+        Columns like ratios and spreads can be computed (vectorized) while the response is
+        decoded, see `tradingview_screener.derived`:
+        >>> q = Query().select('close', 'VWAP')
+        >>> _, df = q.get_scanner_data(derived=[ratio('close', 'VWAP')])
+        >>> df['close/VWAP']
+
+        :param compact: Downcast the columns to save memory (see `decode.compact_dataframe()`).
+        :param derived: Columns to compute from the selected columns.
+        :param kwargs: kwargs to pass to `get_scanner_data_raw()` (like `session` or `cache`), and
+            the rest to `requests.post()`
         :return: a tuple consisting of: (total_count, dataframe)
         """
-        import pandas as pd
+        from tradingview_screener.planner import fetch, needs_planning
 
-        json_obj = self.get_scanner_data_raw(**kwargs)
-        rows_count = json_obj['totalCount']
-
-        if '/scan2' in self.url:
-            columns = ['ticker', *json_obj['fields']]
-            rows = json_obj.get('symbols')
-            if rows:
-                df = pd.DataFrame(([row['s'], *row['f']] for row in rows), columns=columns)
-            else:
-                df = pd.DataFrame([], columns=columns)
+        count_estimated = False
+        if needs_planning(self.query):
+            # some filters must be evaluated on the client, see `tradingview_screener.planner`
+            json_obj, count_estimated = fetch(self, **kwargs)
         else:
-            rows = json_obj['data']
-            columns = ['ticker', *self.query.get('columns', ())]  # pyright: ignore [reportArgumentType]
-            df = pd.DataFrame(([row['s'], *row['d']] for row in rows), columns=columns)
-
-        return rows_count, df
+            json_obj = self.get_scanner_data_raw(**kwargs)
+        df = self._to_dataframe(json_obj, compact, derived)
+        if count_estimated:
+            df.attrs['count_estimated'] = True
+        return json_obj['totalCount'], df
+
+    def _to_dataframe(
+        self,
+        json_obj: ScreenerDict | ScreenerDictV2,
+        compact: bool = False,
+        derived: Sequence[Derived] = (),
+    ) -> pd.DataFrame:
+        """
+        Decode a response of this query, and compute its derived columns.
+        """
+        from tradingview_screener.decode import to_dataframe
+
+        df = to_dataframe(
+            json_obj,
+            self.query.get('columns', ()),  # pyright: ignore [reportArgumentType]
+            screener=screener_from_url(self.url),
+            compact=compact,
+            derived=[*self.derived, *derived],
+        )
+        if self.derived:
+            # drop the helper columns, and put the derived columns where they were selected
+            output = ['ticker', *self._output, *(d.name for d in derived)]
+            df = df.loc[:, list(dict.fromkeys(output))]
+        return df
+
+    async def watch(
+        self,
+        interval: float,
+        key_columns: Sequence[str] | None = None,
+        on_error: Callable[[BaseException], object] | None = None,
+        **kwargs,
+    ) -> AsyncIterator[ChangeEvent]:
+        """
+        Poll the query every `interval` seconds, and yield only what changed between the results:
+        the tickers that `entered` or `exited` the result, and the ones whose `key_columns`
+        `changed` (with only the new values of the columns that changed).
+
+        The previous result isn't kept, only a hash of each value (see `diff.ChangeTracker`). The
+        first result is reported as `entered` events.
+
+        A failed request (like a timeout) doesn't stop the polling: the error is passed to
+        `on_error` (or reported as a `RuntimeWarning`), and the next result is compared with the
+        last one that succeeded. To stop on the first error, raise it from `on_error`.
+
+        >>> q = Query().select('name', 'close', 'volume').where(col('change') > 5)
+        >>> async for event in q.watch(10, key_columns=['close']):
+        ...     print(event.kind, event.ticker, event.values)
+        entered NASDAQ:AAPL {'close': 210.5}
+        ...
+        changed NASDAQ:AAPL {'close': 211.0}
+        exited NYSE:KO {}
+
+        :param interval: The number of seconds between the requests (if a request takes longer,
+            the next one is skipped, see `scheduler.Scheduler`).
+        :param key_columns: The columns to compare (defaults to all the selected columns).
+        :param on_error: A function that is called with the error of every failed request.
+        :param kwargs: kwargs to pass to `get_scanner_data()` (like `session` or `compact`)
+        """
+        import asyncio
+        import warnings
+
+        from tradingview_screener.diff import ChangeTracker
+        from tradingview_screener.scheduler import Scheduler
+
+        tracker = ChangeTracker(key_columns)
+        scheduler = Scheduler(
+            1, session=kwargs.pop('session', None), cache=kwargs.pop('cache', None)
+        )
+        job = scheduler.add(self, interval, **kwargs)
+        results = scheduler.results(job)
+        # the task starts at the first `await`, so `results` is already subscribed by then
+        task = asyncio.create_task(scheduler.run())
+        try:
+            async for result in results:
+                if result.error is not None:
+                    if on_error is not None:
+                        on_error(result.error)
+                    else:
+                        warnings.warn(f'Polling failed: {result.error!r}', RuntimeWarning)
+                    continue
+                for event in tracker.update(result.df):  # pyright: ignore [reportArgumentType]
+                    yield event
+        finally:
+            await results.aclose()  # pyright: ignore [reportAttributeAccessIssue]
+            scheduler.stop()
+            await task
+
+    async def astream(
+        self,
+        batch_rows: int = 2000,
+        prefetch: int = 4,
+        session: requests.Session | None = None,
+        compact: bool = False,
+        derived: Sequence[Derived] = (),
+        **kwargs,
+    ) -> AsyncIterator[pd.DataFrame]:
+        """
+        Page through the `range` of the query, and yield each page as a DataFrame (in order) as
+        soon as it's decoded, so the consumer can process a page while the next ones are fetched.
+
+        Up to `prefetch` pages are requested concurrently (from threads, so the event loop isn't
+        blocked). The number of rows that matched is stored in `df.attrs['count']`, and the
+        position of the first row of the page in `df.attrs['offset']`.
+
+        >>> q = Query().select('name', 'close', 'volume').limit(20_000)
+        >>> async for batch in q.astream(batch_rows=2000):
+        ...     writer.write(batch)
+
+        :param batch_rows: The number of rows per page.
+        :param prefetch: The maximum number of pages requested at once.
+        :param session: A session shared by all the requests, a new one is created by default.
+        :param compact: Downcast the columns to save memory (see `decode.compact_dataframe()`).
+        :param derived: Columns to compute from the selected columns (see `derived`).
+        :param kwargs: kwargs to pass to `get_scanner_data_raw()`
+        """
+        import asyncio
+        from collections import deque
+
+        import requests
+
+        from tradingview_screener.planner import needs_planning
+
+        if batch_rows <= 0 or prefetch <= 0:
+            raise ValueError('`batch_rows` and `prefetch` must be positive')
+        if needs_planning(self.query):
+            raise ValueError("Queries with client-side filters can't be streamed, see `planner`")
+
+        def fetch(start: int, end: int) -> tuple[int, pd.DataFrame]:
+            page = self.copy()
+            page.query['range'] = [start, end]
+            json_obj = page.get_scanner_data_raw(session=session, **kwargs)
+            df = page._to_dataframe(json_obj, compact, derived)
+            df.attrs['count'] = json_obj['totalCount']
+            df.attrs['offset'] = start
+            return json_obj['totalCount'], df
+
+        start, end = self.query.get('range', DEFAULT_RANGE)
+        own_session = session is None
+        session = session if session is not None else requests.Session()
+        tasks: list[asyncio.Task] = []
+        pending: deque[tuple[int, asyncio.Task]] = deque()  # (offset, task) in order
+        offset = start
+        try:
+            while True:
+                while len(pending) < prefetch and offset < end:
+                    page_end = min(offset + batch_rows, end)
+                    task = asyncio.create_task(asyncio.to_thread(fetch, offset, page_end))
+                    pending.append((offset, task))
+                    tasks.append(task)
+                    offset = page_end
+                if not pending:
+                    break
+                page_offset, task = pending.popleft()
+                total, df = await task
+                if total < end:
+                    end = total
+                    # the pages past the end were only requested because it wasn't known yet
+                    for o, t in pending:
+                        if o >= end:
+                            t.cancel()
+                    pending = deque((o, t) for o, t in pending if o < end)
+                if page_offset < end or page_offset == start:  # the first page, even if empty
+                    yield df
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if own_session:
+                session.close()
 
     def copy(self) -> Query:
         new = Query()
         new.query = self.query.copy()
+        new.url = self.url
+        new.derived = self.derived.copy()
+        new._output = self._output.copy()
         return new
 
     def __repr__(self) -> str:
         return f'< {pprint.pformat(self.query)}\n url={self.url!r} >'
 
     def __eq__(self, other) -> bool:
-        return isinstance(other, Query) and self.query == other.query and self.url == other.url
+        return (
+            isinstance(other, Query)
+            and self.query == other.query
+            and self.url == other.url
+            and len(self.derived) == len(other.derived)
+            and all(_same_derived(a, b) for a, b in zip(self.derived, other.derived))
+        )
+
+
+def _same_derived(a: Derived, b: Derived) -> bool:
+    if a is b:
+        return True
+    try:
+        return a.name == b.name and a.definition() == b.definition()
+    except TypeError:  # the functions can't be compared
+        return False
 
 
 # TODO: Query should have no defaults (except limit), and a separate module should have all the
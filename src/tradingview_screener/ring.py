@@ -0,0 +1,243 @@
+"""
+Keep the last N values of some columns for every ticker, for rolling statistics.
+
+`RingBuffer` stores each column in a preallocated `snapshots x tickers` float64 array, and every
+new result overwrites the oldest snapshot, so the memory doesn't grow with the number of polls,
+and nothing is ever concatenated. The results are written straight from the columns of the
+response (see `decode.split_response()`), without building a DataFrame.
+
+Examples:
+
+>>> ring = RingBuffer(['close', 'relative_volume_10d_calc'], capacity=60)
+>>> q = Query().select('close', 'relative_volume_10d_calc').limit(10_000)
+>>> for _ in range(100):
+...     ring.update(q)
+...     time.sleep(10)
+>>> ring.zscore('relative_volume_10d_calc', 30).nlargest(5)  # the unusual volume right now
+NASDAQ:XYZ     6.2
+...
+>>> ring.velocity('close', 6)  # the change per second over the last minute
+>>> ring.window('close', 10)  # the raw values, oldest first (10 x tickers)
+
+The tickers get a slot the first time they appear (and keep it), a ticker that is missing from
+a snapshot gets NaN in it. The rolling statistics ignore the NaNs.
+"""
+
+from __future__ import annotations
+
+import time
+import warnings
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from tradingview_screener.decode import split_response
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    import numpy as np
+    import pandas as pd
+
+    from tradingview_screener.models import ScreenerDict, ScreenerDictV2
+    from tradingview_screener.query import Query
+
+
+class RingBuffer:
+    """
+    A fixed-capacity history of numeric columns per ticker, see the module docstring.
+
+    :param columns: The columns to keep (they must be numeric).
+    :param capacity: The number of snapshots to keep.
+    :param max_tickers: The maximum number of tickers, new tickers beyond it are ignored.
+    """
+
+    def __init__(self, columns: Sequence[str], capacity: int, max_tickers: int = 100_000) -> None:
+        import numpy as np
+
+        if capacity <= 0:
+            raise ValueError('The capacity must be positive')
+        self.columns = list(columns)
+        self.capacity = capacity
+        self.max_tickers = max_tickers
+        self._slots: dict[str, int] = {}  # {ticker: column in the arrays}
+        self._tickers: list[str] = []
+        self._times = np.full(capacity, np.nan)
+        self._data = {c: np.full((capacity, 0), np.nan) for c in self.columns}
+        self._count = 0  # the number of snapshots ever appended
+
+    def __len__(self) -> int:
+        """
+        The number of snapshots held.
+        """
+        return min(self._count, self.capacity)
+
+    @property
+    def tickers(self) -> list[str]:
+        return list(self._tickers)
+
+    def _grow(self, n: int) -> None:
+        import numpy as np
+
+        size = next(iter(self._data.values())).shape[1] if self._data else 0
+        if n <= size:
+            return
+        new_size = min(max(n, 2 * size, 1024), self.max_tickers)
+        for c, arr in self._data.items():
+            grown = np.full((self.capacity, new_size), np.nan)
+            grown[:, :size] = arr
+            self._data[c] = grown
+
+    def _positions(self, tickers: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the slots of the tickers (assigning new ones), and the rows that have a slot.
+        """
+        import numpy as np
+
+        slots = self._slots
+        for ticker in tickers:
+            if ticker not in slots and len(slots) < self.max_tickers:
+                slots[ticker] = len(slots)
+                self._tickers.append(ticker)
+        self._grow(len(slots))
+        positions = np.fromiter((slots.get(t, -1) for t in tickers), 'int64', len(tickers))
+        rows = np.flatnonzero(positions != -1)
+        return positions[rows], rows
+
+    def append_columns(
+        self,
+        fields: Sequence[str],
+        tickers: Sequence[str],
+        values: Sequence[Sequence],
+        timestamp: float | None = None,
+    ) -> None:
+        """
+        Append a snapshot from the columns of a response (see `decode.split_response()`).
+
+        :param timestamp: The UNIX time of the snapshot (defaults to now).
+        """
+        import numpy as np
+
+        positions, rows = self._positions(tickers)
+        i = self._count % self.capacity
+        self._times[i] = time.time() if timestamp is None else timestamp
+        columns = dict(zip(fields, values))  # the first of duplicated fields is overwritten
+        for c, arr in self._data.items():
+            arr[i] = np.nan
+            if c in columns:
+                arr[i, positions] = np.array(columns[c], dtype='float64')[rows]
+        self._count += 1
+
+    def append_response(
+        self, json_obj: ScreenerDict | ScreenerDictV2, columns: Sequence[str] = ()
+    ) -> None:
+        """
+        Append the response of the scanner API.
+
+        :param columns: The columns that were selected in the query (only used for `/scan`).
+        """
+        fields, tickers, values = split_response(json_obj, columns)
+        server_time = json_obj.get('time')  # only returned by `/scan2`, like '2026-04-24T13:45:37Z'
+        timestamp = None
+        if isinstance(server_time, str):
+            timestamp = datetime.fromisoformat(server_time.replace('Z', '+00:00')).timestamp()
+        self.append_columns(fields, tickers, values, timestamp)
+
+    def append(self, df: pd.DataFrame, timestamp: float | None = None) -> None:
+        """
+        Append a DataFrame with a `ticker` column (like the ones from `Query.get_scanner_data()`).
+        """
+        fields = [c for c in self.columns if c in df.columns]
+        values = [df[c].astype('float64').to_numpy() for c in fields]
+        self.append_columns(fields, df['ticker'].tolist(), values, timestamp)
+
+    def update(self, query: Query, **kwargs) -> None:
+        """
+        Send a query and append its response (the filters that the server can't evaluate are
+        applied on the client, see `planner.fetch()`).
+
+        :param kwargs: kwargs to pass to `Query.get_scanner_data_raw()`
+        """
+        from tradingview_screener.planner import fetch, needs_planning
+
+        if needs_planning(query.query):
+            json_obj, _ = fetch(query, **kwargs)
+        else:
+            json_obj = query.get_scanner_data_raw(**kwargs)
+        self.append_response(json_obj, query.query.get('columns', ()))
+
+    def _order(self, n: int | None) -> np.ndarray:
+        import numpy as np
+
+        size = len(self)
+        n = size if n is None else min(n, size)
+        return np.arange(self._count - n, self._count) % self.capacity
+
+    def times(self, n: int | None = None) -> np.ndarray:
+        """
+        The UNIX times of the last `n` snapshots (or all of them), oldest first.
+        """
+        return self._times[self._order(n)]
+
+    def window(self, column: str, n: int | None = None) -> np.ndarray:
+        """
+        The values of the last `n` snapshots (or all of them), oldest first.
+
+        :return: A `n x tickers` array, the columns are in the order of `tickers`.
+        """
+        return self._data[column][self._order(n), : len(self._tickers)]
+
+    def sliding_windows(self, column: str, size: int) -> np.ndarray:
+        """
+        Every window of `size` consecutive snapshots, as a read-only view of `window()`.
+
+        :return: A `(snapshots - size + 1) x tickers x size` array.
+        """
+        from numpy.lib.stride_tricks import sliding_window_view
+
+        return sliding_window_view(self.window(column), size, axis=0)
+
+    def _series(self, values: np.ndarray) -> pd.Series:
+        import pandas as pd
+
+        return pd.Series(values, index=pd.Index(self._tickers, name='ticker'))
+
+    def mean(self, column: str, n: int | None = None) -> pd.Series:
+        import numpy as np
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN tickers
+            return self._series(np.nanmean(self.window(column, n), axis=0))
+
+    def std(self, column: str, n: int | None = None) -> pd.Series:
+        import numpy as np
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return self._series(np.nanstd(self.window(column, n), axis=0))
+
+    def zscore(self, column: str, n: int | None = None) -> pd.Series:
+        """
+        How many standard deviations the latest value is from the mean of the last `n` values.
+        """
+        import numpy as np
+
+        values = self.window(column, n)
+        with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+            warnings.simplefilter('ignore', RuntimeWarning)
+            mean = np.nanmean(values, axis=0)
+            std = np.nanstd(values, axis=0)
+            z = (values[-1] - mean) / std if len(values) else mean
+        return self._series(np.where(np.isfinite(z), z, np.nan))
+
+    def velocity(self, column: str, periods: int = 1) -> pd.Series:
+        """
+        The change per second of the values over the last `periods` snapshots.
+        """
+        import numpy as np
+
+        if len(self) <= periods:
+            return self._series(np.full(len(self._tickers), np.nan))
+        values = self.window(column, periods + 1)
+        times = self.times(periods + 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._series((values[-1] - values[0]) / (times[-1] - times[0]))
@@ -0,0 +1,318 @@
+"""
+Poll queries on a schedule, instead of writing a `while True: ...; sleep(n)` loop for each one.
+
+Examples:
+
+>>> scheduler = Scheduler(max_concurrency=4)
+>>> scheduler.add(Query().select('name', 'close').limit(500), interval=10, callback=print)
+>>> gainers = scheduler.add(
+...     Query().select('name', 'change').order_by('change', ascending=False),
+...     interval=30,
+...     priority=1,
+...     name='gainers',
+... )
+>>> async def main():
+...     asyncio.create_task(scheduler.run())
+...     async for result in scheduler.results(gainers):
+...         print(result.fetched, result.count, result.df.head())
+>>> asyncio.run(main())
+
+How the requests are scheduled:
+
+- the queries that have the same interval are spread evenly across it (the first one at 0, the
+  second one at `interval / n`, etc.), rather than being sent all at once
+- every run is scheduled from a fixed starting point (`start + phase + k * interval`), so the
+  schedule doesn't drift, no matter how long the requests take
+- if the previous request of a query is still in flight when its next run is due, that run is
+  skipped (and counted in `Job.skipped`) rather than piling up
+- the errors raised by the callbacks are caught (and kept in `Job.last_callback_error`), so a
+  failing callback doesn't stop the other jobs
+- when more runs are due than `max_concurrency`, the ones with the highest priority are sent first
+- all the requests share a single `requests.Session` (and `cache.ResultCache`, if one is given),
+  and are sent from threads, so the event loop isn't blocked
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import itertools
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable
+
+    import pandas as pd
+    import requests
+
+    from tradingview_screener.cache import ResultCache
+    from tradingview_screener.query import Query
+
+
+class Result:
+    """
+    The result of one run of a job (either `df` and `count`, or `error` are set).
+    """
+
+    def __init__(
+        self,
+        job: Job,
+        fetched: float,
+        count: int | None = None,
+        df: pd.DataFrame | None = None,
+        error: BaseException | None = None,
+    ) -> None:
+        self.job = job
+        self.fetched = fetched  # the UNIX time when the response arrived
+        self.count = count
+        self.df = df
+        self.error = error
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f'<Result {self.job.name!r} error={self.error!r}>'
+        return f'<Result {self.job.name!r} count={self.count} rows={len(self.df)}>'  # pyright: ignore
+
+
+class Job:
+    """
+    A query that is polled by a `Scheduler` (created by `Scheduler.add()`).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        query: Query,
+        interval: float,
+        priority: int,
+        callback: Callable[[Result], object] | None,
+        kwargs: dict,
+    ) -> None:
+        self.name = name
+        self.query = query
+        self.interval = interval
+        self.priority = priority
+        self.callback = callback
+        self.kwargs = kwargs
+
+        self.phase = 0.0  # the offset of the runs within the interval
+        self.next_run = 0.0  # in `time.monotonic()` seconds
+        self.in_flight = False
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.callback_errors = 0
+        self.last_result: Result | None = None
+        self.last_callback_error: Exception | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f'<Job {self.name!r} interval={self.interval} priority={self.priority} '
+            f'runs={self.runs} skipped={self.skipped} errors={self.errors}>'
+        )
+
+
+class Scheduler:
+    """
+    Poll many queries at fixed intervals, see the module docstring.
+
+    :param max_concurrency: The maximum number of requests in flight.
+    :param session: The session shared by all the requests, a new one is created by default.
+    :param cache: A cache shared by all the requests (note that it should have a `ttl` shorter
+        than the intervals, otherwise the runs would return the cached responses).
+    :param max_pending: The maximum number of results buffered for each `results()` iterator,
+        when an iterator falls behind, its oldest results are dropped.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        session: requests.Session | None = None,
+        cache: ResultCache | None = None,
+        max_pending: int = 100,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.session = session
+        self.cache = cache
+        self.max_pending = max_pending
+        self.jobs: dict[str, Job] = {}
+        self._counter = itertools.count()
+        self._start = time.monotonic()
+        self._subscribers: list[tuple[Job | None, asyncio.Queue]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._stopped: asyncio.Event | None = None
+
+    def add(
+        self,
+        query: Query,
+        interval: float,
+        priority: int = 0,
+        callback: Callable[[Result], object] | None = None,
+        name: str | None = None,
+        **kwargs,
+    ) -> Job:
+        """
+        Register a query to poll.
+
+        :param interval: The number of seconds between the runs.
+        :param priority: When many runs are due at once, the higher priorities are sent first.
+        :param callback: A function (or a coroutine function) that is called with every
+            `Result`, it's called from the event loop, so it shouldn't block.
+        :param name: The name of the job (defaults to `job-N`).
+        :param kwargs: kwargs to pass to `Query.get_scanner_data()` (like `compact=True`).
+        """
+        if interval <= 0:
+            raise ValueError('The interval must be positive')
+        name = name if name is not None else f'job-{next(self._counter)}'
+        if name in self.jobs:
+            raise ValueError(f'There is already a job named {name!r}')
+        self.jobs[name] = Job(name, query, interval, priority, callback, kwargs)
+        self._reschedule()
+        return self.jobs[name]
+
+    def remove(self, job: Job | str) -> None:
+        del self.jobs[job if isinstance(job, str) else job.name]
+        self._reschedule()
+
+    def _reschedule(self, now: float | None = None) -> None:
+        """
+        Spread the jobs with the same interval evenly across it, and compute their next run.
+        """
+        groups: dict[float, list[Job]] = {}
+        for job in self.jobs.values():
+            groups.setdefault(job.interval, []).append(job)
+
+        now = time.monotonic() if now is None else now
+        for interval, jobs in groups.items():
+            jobs.sort(key=lambda j: -j.priority)  # stable, so it keeps the order they were added
+            for i, job in enumerate(jobs):
+                job.phase = i * interval / len(jobs)
+                # the first `start + phase + k * interval` that isn't in the past
+                k = max(0, -(-(now - self._start - job.phase) // interval))
+                job.next_run = self._start + job.phase + k * interval
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _publish(self, result: Result) -> None:
+        for job, queue in self._subscribers:
+            if job is not None and job is not result.job:
+                continue
+            if queue.full():
+                queue.get_nowait()  # drop the oldest result of a slow consumer
+            queue.put_nowait(result)
+
+    async def _execute(self, job: Job) -> None:
+        try:
+            count, df = await asyncio.to_thread(
+                job.query.get_scanner_data, session=self.session, cache=self.cache, **job.kwargs
+            )
+            result = Result(job, time.time(), count, df)
+        except Exception as e:  # noqa: BLE001 (the errors are delivered with the results)
+            job.errors += 1
+            result = Result(job, time.time(), error=e)
+        finally:
+            job.in_flight = False
+        job.runs += 1
+        job.last_result = result
+
+        if job.callback is not None:
+            try:
+                value = job.callback(result)
+                if inspect.isawaitable(value):
+                    await value
+            except Exception as e:  # noqa: BLE001 (a failing callback mustn't stop the worker)
+                job.callback_errors += 1
+                job.last_callback_error = e
+        self._publish(result)
+
+    async def _worker(self, queue: asyncio.PriorityQueue) -> None:
+        while True:
+            _, _, job = await queue.get()
+            try:
+                await self._execute(job)
+            finally:
+                queue.task_done()
+
+    async def run(self, duration: float | None = None) -> None:
+        """
+        Run the jobs until `stop()` is called (or for `duration` seconds).
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._start = time.monotonic()
+        self._reschedule(now=self._start)  # the first runs are due right away
+        own_session = self.session is None
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.mount('https://', HTTPAdapter(pool_maxsize=self.max_concurrency))
+
+        deadline = time.monotonic() + duration if duration is not None else None
+        queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.max_concurrency)]
+        try:
+            while not self._stopped.is_set():
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                for job in list(self.jobs.values()):
+                    if job.next_run > now:
+                        continue
+                    while job.next_run <= now:
+                        job.next_run += job.interval
+                    if job.in_flight:
+                        job.skipped += 1
+                        continue
+                    job.in_flight = True
+                    queue.put_nowait((-job.priority, next(self._counter), job))
+
+                wakeups = [job.next_run for job in self.jobs.values()]
+                if deadline is not None:
+                    wakeups.append(deadline)
+                timeout = max(0.0, min(wakeups) - time.monotonic()) if wakeups else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            for job in self.jobs.values():
+                job.in_flight = False
+            if own_session:
+                self.session.close()
+                self.session = None
+            self._loop = None
+
+    def stop(self) -> None:
+        """
+        Stop `run()` (it can be called from any thread).
+        """
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+            self._wake()
+
+    async def results(self, job: Job | str | None = None) -> AsyncIterator[Result]:
+        """
+        Iterate over the results of a job (or of all the jobs), as they arrive.
+        """
+        if isinstance(job, str):
+            job = self.jobs[job]
+        queue: asyncio.Queue = asyncio.Queue(self.max_pending)
+        subscriber = (job, queue)
+        self._subscribers.append(subscriber)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.remove(subscriber)
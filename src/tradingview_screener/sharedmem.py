@@ -0,0 +1,78 @@
+"""
+Shared memory blocks that are managed explicitly (by `pool` and `snapshot`).
+
+On Python < 3.13 every process that creates or maps a block registers it with the resource
+tracker, which unlinks it when the process exits (even if it's still used by other processes),
+so the blocks created here aren't tracked, and their owners are responsible for unlinking them.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+
+def _untrack(shm: SharedMemory) -> SharedMemory:
+    from multiprocessing import resource_tracker
+
+    resource_tracker.unregister(shm._name, 'shared_memory')  # pyright: ignore
+    return shm
+
+
+def create(size: int, name: str | None = None) -> SharedMemory:
+    """
+    Create a new block (with a random name by default) that outlives this process.
+    """
+    from multiprocessing.shared_memory import SharedMemory
+
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, create=True, size=size, track=False)
+    return _untrack(SharedMemory(name, create=True, size=size))
+
+
+def attach(name: str) -> SharedMemory:
+    """
+    Map an existing block.
+    """
+    from multiprocessing.shared_memory import SharedMemory
+
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)
+    return _untrack(SharedMemory(name))
+
+
+def unlink(shm: SharedMemory) -> None:
+    """
+    Close and unlink a block that was created with `create()`.
+    """
+    shm.close()
+    if sys.version_info >= (3, 13) or sys.platform == 'win32':
+        shm.unlink()
+        return
+
+    # `SharedMemory.unlink()` would also unregister it from the resource tracker (which complains
+    # about blocks that it doesn't know)
+    import _posixshmem  # pyright: ignore
+
+    _posixshmem.shm_unlink(shm._name)  # pyright: ignore
+
+
+def detach(shm: SharedMemory) -> memoryview:
+    """
+    Take the memory of a mapped block out of its `SharedMemory` object, so it stays mapped for as
+    long as there are arrays that use it (rather than until the object is closed, which fails if
+    there still are such arrays).
+    """
+    import os
+
+    buf = memoryview(shm._mmap)  # pyright: ignore
+    shm._buf.release()  # pyright: ignore
+    shm._buf = None  # pyright: ignore
+    shm._mmap = None  # pyright: ignore
+    if shm._fd >= 0:  # pyright: ignore
+        os.close(shm._fd)  # pyright: ignore
+        shm._fd = -1  # pyright: ignore
+    return buf
@@ -0,0 +1,393 @@
+"""
+Share the latest result of a scan between processes, without copying it.
+
+One process (the poller) publishes each new DataFrame with `SnapshotPublisher`, which writes its
+columns into a new named shared memory block. Any number of processes read it with
+`SnapshotReader`, which maps the block and builds the DataFrame on top of it, so the memory use
+doesn't grow with the number of readers, and there is nothing to unpickle.
+
+Examples:
+
+In the poller:
+
+>>> publisher = SnapshotPublisher('tv-america')
+>>> while True:
+...     _, df = Query().select('name', 'close', 'volume').limit(10_000).get_scanner_data()
+...     publisher.publish(df)
+...     time.sleep(5)
+
+In the readers:
+
+>>> reader = SnapshotReader('tv-america')
+>>> snapshot = reader.latest()  # None until the first snapshot is published
+>>> snapshot.version, snapshot.published
+(42, 1776523537.31)
+>>> df = snapshot.to_dataframe()
+
+How the snapshots are kept consistent:
+
+- every snapshot is written into its own block (named `{name}_{version}`), which is never modified
+  after it's published, so a reader that mapped a block always sees a complete snapshot
+- the publisher owns a small control block (named `{name}`) with the version of the latest
+  snapshot, which is updated with a seqlock: the sequence number is odd while the version is being
+  written, so a reader that sees an odd or changed sequence number reads again
+- the publisher keeps the latest `keep` blocks (two by default, like a double buffer) and unlinks
+  the older ones. A reader that already mapped an unlinked block can keep using it (the memory is
+  released when the last reader closes it), and a reader that was about to map it reads the
+  version again.
+
+Numeric, boolean, datetime, nullable (`Int64`, `boolean`, etc.), and categorical columns are
+mapped without copying (as read-only arrays). String columns are stored as fixed-width unicode
+arrays, which `Snapshot.arrays` exposes without copying, but `to_dataframe()` converts them into
+Python strings. Anything else (like the lists of the `set` fields) is pickled.
+"""
+
+from __future__ import annotations
+
+import json
+import pickle
+import time
+from typing import TYPE_CHECKING
+
+from tradingview_screener import sharedmem
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+    import numpy as np
+    import pandas as pd
+    from typing_extensions import Self
+
+
+_MAGIC = 0x54565348_4D454D31  # 'TVSHMEM1'
+# the control block: (magic, sequence, version)
+_CONTROL_SIZE = 3 * 8
+_ALIGNMENT = 64
+_RETRIES = 1000
+
+
+def _control_view(shm: SharedMemory) -> np.ndarray:
+    import numpy as np
+
+    return np.ndarray((3,), dtype='uint64', buffer=shm.buf)  # pyright: ignore [reportArgumentType]
+
+
+def _encode_series(s: pd.Series) -> tuple[dict, list[tuple[str, np.ndarray | bytes]]]:
+    """
+    Convert a column into a description (for the metadata) and a list of (role, buffer).
+    """
+    import numpy as np
+    import pandas as pd
+
+    dtype = s.dtype
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        naive = s.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy()
+        return {'kind': 'datetimetz', 'tz': str(dtype.tz)}, [('values', naive)]
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = pickle.dumps(s.cat.categories, protocol=5)
+        meta = {'kind': 'category', 'ordered': bool(dtype.ordered)}
+        return meta, [('codes', s.cat.codes.to_numpy()), ('categories', categories)]
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufmM':
+        return {'kind': 'numpy'}, [('values', s.to_numpy())]
+    masked = (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)
+    if isinstance(s.array, masked):
+        # the nullable types (`Int64`, `UInt8`, `Float32`, `boolean`, etc.)
+        numpy_dtype = dtype.numpy_dtype  # pyright: ignore [reportAttributeAccessIssue]
+        values = s.to_numpy(dtype=numpy_dtype, na_value=numpy_dtype.type(0))
+        meta = {'kind': 'masked', 'dtype': str(dtype)}
+        return meta, [('values', values), ('mask', s.isna().to_numpy())]
+
+    nulls = s.isna().to_numpy()
+    values = s.tolist()
+    if all(isinstance(x, str) for x, null in zip(values, nulls) if not null):
+        strings = np.array([x if not null else '' for x, null in zip(values, nulls)], dtype=str)
+        return {'kind': 'string', 'dtype': str(dtype)}, [('values', strings), ('mask', nulls)]
+    return {'kind': 'pickle'}, [('values', pickle.dumps(values, protocol=5))]
+
+
+def _decode_series(meta: dict, buffers: dict, name) -> pd.Series:
+    import pandas as pd
+
+    kind = meta['kind']
+    if kind == 'numpy':
+        return pd.Series(buffers['values'], name=name, copy=False)
+    if kind == 'datetimetz':
+        naive = pd.Series(buffers['values'], name=name, copy=False)
+        return naive.dt.tz_localize('UTC').dt.tz_convert(meta['tz'])
+    if kind == 'category':
+        categories = pickle.loads(buffers['categories'])
+        dtype = pd.CategoricalDtype(categories, ordered=meta['ordered'])
+        return pd.Series(pd.Categorical.from_codes(buffers['codes'], dtype=dtype), name=name)
+    if kind == 'masked':
+        values, mask = buffers['values'], buffers['mask']
+        if values.dtype.kind == 'b':
+            array = pd.arrays.BooleanArray(values, mask)
+        elif values.dtype.kind == 'f':
+            array = pd.arrays.FloatingArray(values, mask)
+        else:
+            array = pd.arrays.IntegerArray(values, mask)
+        return pd.Series(array, name=name, copy=False)
+    if kind == 'string':
+        values = buffers['values'].astype(object)
+        values[buffers['mask']] = None
+        return pd.Series(values, name=name, dtype=meta['dtype'])
+    return pd.Series(pickle.loads(buffers['values']), name=name, dtype=object)
+
+
+class SnapshotPublisher:
+    """
+    Publish DataFrames into shared memory, see the module docstring.
+
+    :param name: The name of the control block, the readers use it to find the snapshots. If a
+        publisher with the same name didn't close (like one that crashed), its blocks are reused,
+        and the versions continue from its latest snapshot.
+    :param keep: The number of snapshots to keep (the latest one, and the ones before it that
+        readers might still be mapping).
+    """
+
+    def __init__(self, name: str, keep: int = 2) -> None:
+        if keep < 1:
+            raise ValueError('`keep` must be at least 1')
+        self.name = name
+        self.keep = keep
+        self.version = 0
+        self._blocks: list[SharedMemory] = []
+        try:
+            self._control = sharedmem.create(_CONTROL_SIZE, name)
+        except FileExistsError:
+            self._recover()
+        else:
+            self._header = _control_view(self._control)
+            self._header[:] = (_MAGIC, 0, 0)
+
+    def _recover(self) -> None:
+        """
+        Take over the blocks left behind by a publisher that didn't close (like one that crashed),
+        and continue from the version it published last.
+        """
+        self._control = sharedmem.attach(self.name)
+        if self._control.size < _CONTROL_SIZE or int(_control_view(self._control)[0]) != _MAGIC:
+            self._control.close()
+            raise FileExistsError(f'{self.name!r} exists, and is not a snapshot control block')
+        self._header = _control_view(self._control)
+        if self._header[1] % 2:  # it crashed in the middle of an update
+            self._header[1] += 1
+        self.version = int(self._header[2])
+
+        # a block that was written but never published
+        try:
+            sharedmem.unlink(sharedmem.attach(f'{self.name}_{self.version + 1}'))
+        except FileNotFoundError:
+            pass
+        # the latest snapshots (which readers might be using) are unlinked like the new ones
+        for version in range(max(self.version - self.keep + 1, 1), self.version + 1):
+            try:
+                self._blocks.append(sharedmem.attach(f'{self.name}_{version}'))
+            except FileNotFoundError:
+                pass
+
+    def publish(self, df: pd.DataFrame) -> int:
+        """
+        Write a DataFrame into a new block, and make it the latest snapshot.
+
+        :return: The version of the snapshot (starting from 1).
+        """
+        import numpy as np
+        import pandas as pd
+
+        index_names = None
+        if not isinstance(df.index, pd.RangeIndex):
+            index_names = list(df.index.names)
+            df = df.reset_index()
+
+        version = self.version + 1
+        columns = []
+        chunks: list[bytes | np.ndarray] = []
+        for i, name in enumerate(df.columns):
+            meta, buffers = _encode_series(df.iloc[:, i])
+            meta['name'] = name
+            meta['buffers'] = {}
+            for role, buffer in buffers:
+                meta['buffers'][role] = len(chunks)
+                chunks.append(buffer)
+            columns.append(meta)
+
+        # [metadata length][metadata][padding][buffer][padding][buffer]...
+        sizes = [b.nbytes if isinstance(b, np.ndarray) else len(b) for b in chunks]
+        offsets = []
+        offset = 0
+        for size in sizes:
+            offsets.append(offset)
+            offset += -(-size // _ALIGNMENT) * _ALIGNMENT
+        metadata = {
+            'version': version,
+            'published': time.time(),
+            'rows': len(df),
+            'index': index_names,
+            'attrs': {k: v for k, v in df.attrs.items() if isinstance(v, (int, float, str))},
+            'time': str(df.attrs['time']) if 'time' in df.attrs else None,
+            'columns': columns,
+            'chunks': [
+                [o, s, b.dtype.str if isinstance(b, np.ndarray) else None]
+                for o, s, b in zip(offsets, sizes, chunks)
+            ],
+        }
+        encoded = json.dumps(metadata, default=str).encode()
+        start = -(-(8 + len(encoded)) // _ALIGNMENT) * _ALIGNMENT
+
+        block = sharedmem.create(max(start + offset, 1), f'{self.name}_{version}')
+        buf = block.buf
+        assert buf is not None
+        buf[:8] = len(encoded).to_bytes(8, 'little')
+        buf[8 : 8 + len(encoded)] = encoded
+        for o, size, chunk in zip(offsets, sizes, chunks):
+            if isinstance(chunk, np.ndarray):
+                chunk = np.ascontiguousarray(chunk).view('uint8').data
+            buf[start + o : start + o + size] = chunk
+        self._blocks.append(block)
+
+        # the seqlock: readers retry while the sequence number is odd or has changed
+        self._header[1] += 1
+        self._header[2] = version
+        self._header[1] += 1
+        self.version = version
+
+        while len(self._blocks) > self.keep:
+            # the readers that already mapped it can keep using it
+            sharedmem.unlink(self._blocks.pop(0))
+        return version
+
+    def close(self) -> None:
+        """
+        Unlink all the blocks, the readers that already mapped a snapshot can keep using it.
+        """
+        for block in self._blocks:
+            sharedmem.unlink(block)
+        self._blocks.clear()
+        del self._header
+        sharedmem.unlink(self._control)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class Snapshot:
+    """
+    A mapped snapshot, its arrays are read-only views over the shared memory, which stays mapped
+    for as long as they (or the DataFrames built from them) are used.
+    """
+
+    def __init__(self, shm: SharedMemory) -> None:
+        import numpy as np
+
+        buf = sharedmem.detach(shm)
+        length = int.from_bytes(buf[:8], 'little')
+        metadata = json.loads(bytes(buf[8 : 8 + length]))
+        start = -(-(8 + length) // _ALIGNMENT) * _ALIGNMENT
+
+        self.version: int = metadata['version']
+        self.published: float = metadata['published']
+        self.rows: int = metadata['rows']
+        self._metadata = metadata
+
+        chunks: list[np.ndarray | bytes] = []
+        for offset, size, dtype in metadata['chunks']:
+            if dtype is None:
+                chunks.append(bytes(buf[start + offset : start + offset + size]))
+                continue
+            count = size // np.dtype(dtype).itemsize
+            arr = np.frombuffer(buf, dtype=dtype, count=count, offset=start + offset)
+            arr.flags.writeable = False
+            chunks.append(arr)
+        self.columns: list[tuple[dict, dict]] = [
+            (meta, {role: chunks[i] for role, i in meta['buffers'].items()})
+            for meta in metadata['columns']
+        ]
+
+    @property
+    def arrays(self) -> dict[str, np.ndarray]:
+        """
+        The raw values of the columns (the first one with each name), without copying.
+        """
+        result = {}
+        for meta, buffers in self.columns:
+            if 'values' in buffers and not isinstance(buffers['values'], bytes):
+                result.setdefault(meta['name'], buffers['values'])
+        return result
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Build the DataFrame of the snapshot, which shares the memory of the snapshot (except for
+        the string and pickled columns).
+        """
+        import pandas as pd
+
+        series = [_decode_series(meta, buffers, meta['name']) for meta, buffers in self.columns]
+        df = pd.DataFrame(dict(enumerate(series)), copy=False)
+        df.columns = pd.Index([meta['name'] for meta, _ in self.columns])
+        if self._metadata['index'] is not None:
+            df = df.set_index(self._metadata['index'])
+        df.attrs.update(self._metadata['attrs'])
+        if self._metadata['time'] is not None:
+            df.attrs['time'] = pd.Timestamp(self._metadata['time'])
+        return df
+
+
+class SnapshotReader:
+    """
+    Read the latest snapshot published with `SnapshotPublisher`, see the module docstring.
+
+    :param name: The name that was given to the publisher.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._control = sharedmem.attach(name)
+        self._header = _control_view(self._control)
+        if int(self._header[0]) != _MAGIC:
+            raise ValueError(f'{name!r} is not a snapshot control block')
+        self._snapshot: Snapshot | None = None
+
+    def version(self) -> int:
+        """
+        Get the version of the latest snapshot (0 if nothing was published yet).
+        """
+        for _ in range(_RETRIES):
+            seq = int(self._header[1])
+            if seq % 2:
+                continue  # the publisher is updating the version
+            version = int(self._header[2])
+            if int(self._header[1]) == seq:
+                return version
+        raise TimeoutError('Could not read a consistent version from the control block')
+
+    def latest(self) -> Snapshot | None:
+        """
+        Map the latest snapshot (or return the one that is already mapped, if it's the latest).
+        """
+        for _ in range(_RETRIES):
+            version = self.version()
+            if version == 0:
+                return None
+            if self._snapshot is not None and self._snapshot.version == version:
+                return self._snapshot
+            try:
+                shm = sharedmem.attach(f'{self.name}_{version}')
+            except FileNotFoundError:
+                continue  # it was replaced (and unlinked) in the meantime
+            self._snapshot = Snapshot(shm)
+            return self._snapshot
+        raise TimeoutError('Could not map the latest snapshot')
+
+    def close(self) -> None:
+        del self._header
+        self._control.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,190 @@
+"""
+Get the top k rows of a query across many markets, without fetching k rows from each market.
+
+To get the top 100 stocks by `Value.Traded` across 60 countries, the naive way is to send the
+query to every market with `limit(100)`, and merge the 6000 rows. `top_k()` instead:
+
+- sends the query to every market (concurrently) with the `sort` and a small `range`, so each
+  market returns its best rows first
+- merges the sorted streams with a heap, and keeps the k-th best value seen so far as the
+  threshold
+- only fetches the next page of a market if its last row is still better than the threshold
+  (its next rows can't be better than its last one), doubling the page size each time
+
+So markets that have nothing in the global top k are usually done after their first page.
+
+Examples:
+
+>>> q = Query().select('name', 'country').order_by('Value.Traded', ascending=False)
+>>> count, df = top_k(q, ['america', 'uk', 'germany', 'japan', 'india', ...], k=100)
+>>> df.attrs['rows_fetched'], df.attrs['requests']
+(412, 73)
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from tradingview_screener.local import _is_null
+from tradingview_screener.planner import needs_planning
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+    import pandas as pd
+    import requests
+
+    from tradingview_screener.derived import Derived
+    from tradingview_screener.models import SortByDict
+    from tradingview_screener.query import Query
+
+
+class _Stream:
+    """
+    The rows of one market that were fetched so far (best first).
+    """
+
+    def __init__(self, query: Query, page: int) -> None:
+        self.query = query
+        self.page = page  # the size of the next page
+        self.rows: list[dict] = []
+        self.count = 0  # the number of rows that matched in the market
+        self.exhausted = False
+        self.requests = 0
+
+    def fetch(self, session: requests.Session | None, kwargs: dict) -> None:
+        start = len(self.rows)
+        self.query.query['range'] = [start, start + self.page]
+        json_obj = self.query.get_scanner_data_raw(session=session, **kwargs)
+        key = 'symbols' if 'fields' in json_obj else 'data'
+        rows: list[dict] = json_obj.get(key) or []  # pyright: ignore [reportAssignmentType]
+        self.rows += rows
+        self.count = json_obj['totalCount']
+        self.exhausted = len(rows) < self.page or len(self.rows) >= self.count
+        self.requests += 1
+
+
+def _values(row: dict) -> list:
+    return row['d'] if 'd' in row else row['f']  # `/scan` or `/scan2`
+
+
+class _Reversed:
+    __slots__ = ('value',)
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def __lt__(self, other: _Reversed) -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _Reversed) and self.value == other.value
+
+
+def _sort_key(sort: SortByDict, position: int) -> Callable[[dict], tuple]:
+    """
+    Get a function that maps a row to a key that is larger for the rows that come first in the
+    order of `sort`.
+    """
+    descending = sort['sortOrder'] == 'desc'
+    nulls_first = sort.get('nullsFirst', False)
+
+    def key(row: dict) -> tuple:
+        value = _values(row)[position]
+        if _is_null(value):
+            return (nulls_first, 0)
+        return (not nulls_first, value if descending else _Reversed(value))
+
+    return key
+
+
+def _next_pages(streams: list[_Stream], key: Callable[[dict], tuple], k: int) -> list[_Stream]:
+    """
+    Get the streams whose next rows could still be in the top k, and grow their next page.
+    """
+    best = heapq.nlargest(k, (row for stream in streams for row in stream.rows), key=key)
+    threshold = key(best[-1]) if len(best) >= k else None
+    pending = []
+    for stream in streams:
+        if stream.exhausted or len(stream.rows) >= k:
+            continue
+        # the next rows of a stream can't be better than its last one
+        if threshold is None or threshold < key(stream.rows[-1]):
+            stream.page = min(2 * stream.page, k - len(stream.rows))
+            pending.append(stream)
+    return pending
+
+
+def top_k(
+    query: Query,
+    markets: Sequence[str],
+    k: int,
+    page_size: int | None = None,
+    session: requests.Session | None = None,
+    max_workers: int = 8,
+    compact: bool = False,
+    derived: Sequence[Derived] = (),
+    **kwargs,
+) -> tuple[int, pd.DataFrame]:
+    """
+    Get the top `k` rows of a query across many markets, see the module docstring.
+
+    :param query: A query with a `sort` (its `markets` and `range` are ignored).
+    :param markets: The markets to send the query to (see `Query.set_markets()`).
+    :param k: The number of rows to return.
+    :param page_size: The size of the first page of each market (defaults to twice the share of
+        each market, `2 * k / len(markets)`).
+    :param session: A session shared by all the requests, a new one is created by default.
+    :param max_workers: The number of requests sent concurrently.
+    :param compact: Downcast the columns to save memory (see `decode.compact_dataframe()`).
+    :param derived: Columns to compute from the selected columns (see `derived`).
+    :param kwargs: kwargs to pass to `Query.get_scanner_data_raw()`
+    :return: a tuple consisting of: (total_count, dataframe), where `total_count` is the sum of
+        the rows that matched in every market. The number of rows fetched and requests sent are
+        stored in `df.attrs['rows_fetched']` and `df.attrs['requests']`.
+    """
+    import requests
+
+    sort = query.query.get('sort')
+    if sort is None:
+        raise ValueError('The query must have a `sort`, see `Query.order_by()`')
+    if needs_planning(query.query):
+        raise ValueError('All the filters of the query must be supported by the server')
+
+    # the sort column is needed to merge the rows
+    columns = list(query.query.get('columns', []))
+    base = query.copy()
+    base.query['columns'] = columns if sort['sortBy'] in columns else [*columns, sort['sortBy']]
+    key = _sort_key(sort, base.query['columns'].index(sort['sortBy']))
+
+    page = min(page_size or math.ceil(2 * k / max(len(markets), 1)), k)
+    streams = [_Stream(base.copy().set_markets(market), max(page, 1)) for market in markets]
+    own_session = session is None
+    session = session if session is not None else requests.Session()
+    try:
+        with ThreadPoolExecutor(max_workers) as executor:
+            pending = streams
+            while pending:
+                list(executor.map(lambda stream: stream.fetch(session, kwargs), pending))
+                pending = _next_pages(streams, key, k)
+    finally:
+        if own_session:
+            session.close()
+
+    merged = heapq.merge(*[stream.rows for stream in streams], key=key, reverse=True)
+    top = list(itertools.islice(merged, k))
+    total = sum(stream.count for stream in streams)
+    if top and 'f' in top[0]:
+        rows = [{'s': row['s'], 'f': row['f'][: len(columns)]} for row in top]
+        response = {'totalCount': total, 'fields': columns, 'symbols': rows}
+    else:
+        rows = [{'s': row['s'], 'd': row['d'][: len(columns)]} for row in top]
+        response = {'totalCount': total, 'data': rows}
+    df = query._to_dataframe(response, compact, derived)  # pyright: ignore [reportArgumentType]
+    df.attrs['rows_fetched'] = sum(len(stream.rows) for stream in streams)
+    df.attrs['requests'] = sum(stream.requests for stream in streams)
+    return total, df
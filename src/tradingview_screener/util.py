@@ -1,16 +1,68 @@
 from __future__ import annotations
 
+import numbers
+from typing import TYPE_CHECKING, overload
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    import numpy as np
+    import pandas as pd
+
+
+# the labels of `format_technical_rating()`, from the lowest rating to the highest
+TECHNICAL_RATINGS = ['Strong Sell', 'Sell', 'Neutral', 'Buy', 'Strong Buy']
+# the lowest rating of every label (except the first one)
+TECHNICAL_RATING_EDGES = [-0.5, -0.1, 0.1, 0.5]
+
+
+@overload
+def format_technical_rating(rating: float | np.number) -> str: ...
+@overload
+def format_technical_rating(rating: pd.Series) -> pd.Series: ...
+@overload
+def format_technical_rating(rating: np.ndarray | Sequence[float]) -> pd.Categorical: ...
+
 
 # see issue: https://github.com/shner-elmo/TradingView-Screener/issues/12
-def format_technical_rating(rating: float) -> str:
-    if rating >= 0.5:
-        return 'Strong Buy'
-    elif rating >= 0.1:
-        return 'Buy'
-    elif rating >= -0.1:
-        return 'Neutral'
-    elif rating >= -0.5:
-        return 'Sell'
-    # elif x >= -0.1:
+def format_technical_rating(rating):
+    """
+    Convert a technical rating (like `Recommend.All` or `TechRating_1D`) into its label.
+
+    Arrays and Series are converted in a single pass, into an ordered categorical (nulls stay
+    null), so there is no need to `.apply()` this over a column:
+
+    >>> format_technical_rating(0.3)
+    'Buy'
+    >>> df['Recommend.All'] = format_technical_rating(df['Recommend.All'])
+    >>> format_technical_rating(np.array([0.6, -0.2, np.nan]))
+    ['Strong Buy', 'Sell', NaN]
+    Categories (5, object): ['Strong Sell' < 'Sell' < 'Neutral' < 'Buy' < 'Strong Buy']
+    """
+    if isinstance(rating, numbers.Real):  # including the numpy scalars
+        rating = float(rating)
+        if rating >= 0.5:
+            return 'Strong Buy'
+        elif rating >= 0.1:
+            return 'Buy'
+        elif rating >= -0.1:
+            return 'Neutral'
+        elif rating >= -0.5:
+            return 'Sell'
+        # elif x >= -0.1:
+        else:
+            return 'Strong Sell'
+
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(rating, pd.Series):
+        values = rating.to_numpy(dtype='float64', na_value=np.nan)
     else:
-        return 'Strong Sell'
+        values = np.asarray(rating, dtype='float64')
+    codes = np.searchsorted(TECHNICAL_RATING_EDGES, values, side='right')
+    codes[np.isnan(values)] = -1
+    labels = pd.Categorical.from_codes(codes, categories=TECHNICAL_RATINGS, ordered=True)
+    if isinstance(rating, pd.Series):
+        return pd.Series(labels, index=rating.index, name=rating.name)
+    return labels
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradingview_screener.aggregate import GroupBy, IncrementalAggregate, aggregate
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    n = 1000
+    change = rng.normal(size=n)
+    change[::17] = np.nan
+    sector = rng.choice(np.array(['Finance', 'Health Technology', 'Utilities', None]), size=n)
+    return pd.DataFrame(
+        {
+            'ticker': [f'NASDAQ:T{i}' for i in range(n)],
+            'sector': sector,
+            'exchange': rng.choice(['NASDAQ', 'NYSE'], size=n),
+            'change': change,
+            'market_cap_basic': rng.uniform(1e6, 1e12, size=n),
+        }
+    )
+
+
+def test_aggregate(df):
+    result = aggregate(
+        df,
+        'sector',
+        size=('change', 'size'),
+        n=('change', 'count'),
+        total=('change', 'sum'),
+        mean=('change', 'mean'),
+        low=('change', 'min'),
+        high=('change', 'max'),
+        median=('change', 'median'),
+        q90=('change', 0.9),
+        weighted=('change', 'wmean', 'market_cap_basic'),
+    )
+    groups = df.groupby('sector')['change']
+    valid = df.dropna(subset=['change', 'sector'])
+    weighted = valid.groupby('sector').apply(
+        lambda g: np.average(g['change'], weights=g['market_cap_basic'])
+    )
+    expected = pd.DataFrame(
+        {
+            'size': groups.size().astype('float64'),
+            'n': groups.count().astype('float64'),
+            'total': groups.sum(),
+            'mean': groups.mean(),
+            'low': groups.min(),
+            'high': groups.max(),
+            'median': groups.median(),
+            'q90': groups.quantile(0.9),
+            'weighted': weighted,
+        }
+    )
+    pd.testing.assert_frame_equal(result, expected, check_names=False)
+    assert result.index.tolist() == ['Finance', 'Health Technology', 'Utilities']
+
+    by_two = aggregate(df, ['exchange', 'sector'], n=('change', 'count'))
+    expected = df.groupby(['exchange', 'sector'])['change'].count().astype('float64')
+    assert by_two['n'].to_dict() == expected.to_dict()
+
+    with pytest.raises(ValueError, match='wmean'):
+        aggregate(df, 'sector', x=('change', 'wmean'))
+    with pytest.raises(ValueError, match='Unknown'):
+        aggregate(df, 'sector', x=('change', 'std'))
+
+
+def test_group_index_reuse(df):
+    by_sector = GroupBy('sector')
+    first = by_sector.aggregate(df, total=('change', 'sum'))
+
+    # the same rows with new values: only the values are aggregated again
+    df2 = df.assign(change=df['change'] * 2)
+    second = by_sector.aggregate(df2, total=('change', 'sum'))
+    assert by_sector.builds == 1
+    pd.testing.assert_series_equal(second['total'], first['total'] * 2)
+
+    # a row moved to another group
+    df3 = df2.copy()
+    df3.loc[0, 'sector'] = 'Utilities' if df3.loc[0, 'sector'] != 'Utilities' else 'Finance'
+    by_sector.aggregate(df3, total=('change', 'sum'))
+    assert by_sector.builds == 2
+
+
+def test_incremental_aggregate(df):
+    breadth = IncrementalAggregate('change', by='sector', weight='market_cap_basic')
+
+    def check(df):
+        valid = df.dropna(subset=['change'])
+        expected = aggregate(
+            df,
+            'sector',
+            count=('change', 'count'),
+            sum=('change', 'sum'),
+            mean=('change', 'mean'),
+            wmean=('change', 'wmean', 'market_cap_basic'),
+        )
+        result = breadth.result()
+        pd.testing.assert_frame_equal(
+            result[expected.columns].astype('float64'), expected, check_names=False
+        )
+        assert result['advancing'].sum() == (valid.dropna(subset=['sector'])['change'] > 0).sum()
+        total = breadth.total()
+        assert total['count'] == len(valid)
+        assert total['advancing'] == (valid['change'] > 0).sum()
+        assert total['declining'] == (valid['change'] < 0).sum()
+        assert total['sum'] == pytest.approx(valid['change'].sum())
+
+    assert breadth.update(df) == len(df)
+    check(df)
+
+    df2 = df.copy()
+    df2.loc[:9, 'change'] = 1.0  # 10 tickers moved
+    df2.loc[10, 'sector'] = 'Utilities' if df2.loc[10, 'sector'] != 'Utilities' else 'Finance'
+    df2 = df2.drop(index=[20, 21])  # 2 tickers exited
+    new = pd.DataFrame({'ticker': ['NYSE:NEW'], 'sector': ['Finance'], 'change': [5.0]})
+    df2 = pd.concat([df2, new.assign(market_cap_basic=1e9)], ignore_index=True)
+    assert breadth.update(df2) <= 14
+    check(df2)
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from tradingview_screener.bitmap import Bitmap, Universe
+
+
+def test_bitmap_set_algebra():
+    universe = Universe(['NYSE:KO', 'NASDAQ:AAPL'])
+    spx = universe.bitmap(['NASDAQ:AAPL', 'NASDAQ:MSFT', 'NYSE:KO', 'NYSE:JPM'])
+    response = {
+        'totalCount': 3,
+        'data': [{'s': t, 'd': []} for t in ['NASDAQ:MSFT', 'NASDAQ:AAPL', 'NASDAQ:PDD']],
+    }
+    momentum = universe.from_response(response)  # pyright: ignore [reportArgumentType]
+    # the universe grew past the first 64 tickers after `spx` was built
+    others = universe.bitmap([f'NYSE:T{i}' for i in range(100)])
+    earnings = universe.bitmap(['NASDAQ:MSFT', 'NYSE:T99'])
+
+    assert len(universe) == 105
+    assert len(spx.words) == 1 and len(others.words) == 2
+    assert (spx & momentum).tickers() == ['NASDAQ:AAPL', 'NASDAQ:MSFT']
+    assert (spx & momentum & ~earnings).tickers() == ['NASDAQ:AAPL']
+    assert (spx - earnings) == (spx & ~earnings)
+    assert len(spx | momentum | others) == 105
+    assert (spx ^ momentum).tickers() == ['NYSE:KO', 'NYSE:JPM', 'NASDAQ:PDD']
+    assert len(~spx) == 101
+    assert len(universe.all()) == 105 and not universe.empty()
+    assert 'NYSE:T99' in others and 'NYSE:T99' not in spx and 'NYSE:XYZ' not in spx
+
+    df = pd.DataFrame({'ticker': ['NYSE:JPM', 'NASDAQ:PDD', 'NYSE:KO'], 'close': [1, 2, 3]})
+    assert universe.from_dataframe(df) == universe.bitmap(['NYSE:KO', 'NASDAQ:PDD', 'NYSE:JPM'])
+    assert (spx - momentum).filter(df)['close'].tolist() == [1, 3]
+
+    with pytest.raises(ValueError, match='universes'):
+        _ = spx & Universe(['NYSE:KO']).bitmap(['NYSE:KO'])
+    assert isinstance(spx & spx, Bitmap)
@@ -0,0 +1,157 @@
+import numpy as np
+
+from tradingview_screener.cache import ResultCache, implies
+from tradingview_screener.column import col
+from tradingview_screener.local import evaluate, sort_positions
+from tradingview_screener.models import ScreenerDict, SortByDict
+from tradingview_screener.query import And, Or, Query
+
+ROWS = [
+    ('NASDAQ:AAPL', 'AAPL', 'stock', 210.5, 5.1e7),
+    ('NASDAQ:TSLA', 'TSLA', 'stock', 180.0, 9.0e7),
+    ('NYSE:KO', 'KO', 'stock', 15.0, 1.2e7),
+    ('AMEX:SPY', 'SPY', 'fund', 540.0, 6.0e7),
+    ('NYSE:XYZ', 'XYZ', 'stock', 25.0, 2.0e5),
+    ('NYSE:ABC', 'ABC', 'stock', None, 3.0e5),
+]
+
+
+def _loose_query() -> Query:
+    return (
+        Query()
+        .select('name', 'type', 'close', 'volume')
+        .where(col('close') > 10)
+        .where2(And(col('type').isin(['stock', 'fund'])))
+        .limit(5000)
+    )
+
+
+def _cache_with(query: Query, rows=ROWS) -> ResultCache:
+    data = [{'s': s, 'd': list(values)} for s, *values in rows if values[2] is not None]
+    cache = ResultCache()
+    response: ScreenerDict = {'totalCount': len(data), 'data': data}  # pyright: ignore
+    cache.put(query.query, query.url, response)
+    return cache
+
+
+def test_refine_locally():
+    loose = _loose_query()
+    cache = _cache_with(loose)
+
+    strict = (
+        Query()
+        .select('name', 'close')
+        .where(col('close') > 20, col('volume') > 1e6)
+        .where2(And(col('type') == 'stock'))
+        .order_by('volume', ascending=False)
+        .limit(50)
+    )
+    count, df = strict.get_scanner_data(cache=cache)  # answered without sending a request
+    assert count == 2
+    assert df['ticker'].tolist() == ['NASDAQ:TSLA', 'NASDAQ:AAPL']
+    assert df.columns.tolist() == ['ticker', 'name', 'close']
+    assert (cache.hits, cache.local_hits, cache.misses) == (0, 1, 0)
+
+    assert loose.get_scanner_data_raw(cache=cache)['totalCount'] == 5
+    assert cache.hits == 1
+
+    page = strict.offset(1).limit(2).get_scanner_data_raw(cache=cache)
+    assert page == {'totalCount': 2, 'data': [{'s': 'NASDAQ:AAPL', 'd': ['AAPL', 210.5]}]}
+
+
+def test_cannot_refine():
+    loose = _loose_query()
+    cache = _cache_with(loose)
+    queries = [
+        # looser filters
+        Query().select('name', 'close').where(col('close') > 5),
+        Query().select('name', 'close').where(col('close') > 20),  # no `type` filter
+        # missing columns
+        Query()
+        .select('name', 'change')
+        .where(col('close') > 20)
+        .where2(And(col('type').isin(['stock', 'fund']))),
+        Query()
+        .select('name')
+        .where(col('change') > 1)
+        .where2(And(col('type').isin(['stock', 'fund']))),
+        # another market
+        Query().set_markets('germany').select('name').where(col('close') > 20),
+        # can't be evaluated locally
+        Query().select('name').where(col('close').crosses(5), col('close') > 10),
+    ]
+    for q in queries:
+        assert cache.get(q.query, q.url) is None, q
+
+    # an incomplete result can only answer the same query
+    truncated = _loose_query().limit(2)
+    cache = _cache_with(truncated, ROWS[:2])
+    assert cache.get(truncated.query, truncated.url) is not None
+    q = _loose_query().where(col('close') > 20).limit(1)
+    assert cache.get(q.query, q.url) is None
+
+
+def test_expiry_and_eviction():
+    cache = ResultCache(ttl=0)
+    q = _loose_query()
+    cache.put(q.query, q.url, {'totalCount': 0, 'data': []})
+    assert cache.get(q.query, q.url) is None
+    assert len(cache) == 0
+
+    cache = ResultCache(max_entries=2)
+    for i in range(3):
+        q.limit(i + 1)
+        cache.put(q.query, q.url, {'totalCount': 0, 'data': []})
+    assert len(cache) == 2
+
+
+def test_implies():
+    def f(*exprs):
+        return And(*exprs)['operation']
+
+    assert implies(f(col('close') > 20), f(col('close') > 10))
+    assert implies(f(col('close').between(11, 12)), f(col('close') >= 10, col('close') < 13))
+    assert implies(f(col('close') > 20), f(col('close').not_empty()))
+    assert implies(f(col('type') == 'stock'), f(col('type').isin(['stock', 'fund'])))
+    assert implies(f(col('close') > 20, col('x') > 1), None)
+    assert not implies(f(col('close') > 10), f(col('close') > 20))
+    assert not implies(f(col('close') >= 10), f(col('close') > 10))
+    assert not implies(None, f(col('close') > 10))
+    assert not implies(f(col('type').isin(['stock', 'fund'])), f(col('type') == 'stock'))
+
+
+def test_evaluate():
+    columns = {
+        'close': [5, 25, None, 40],
+        'VWAP': [6, 20, 10, None],
+        'type': ['stock', 'stock', 'fund', None],
+        'typespecs': [['common'], ['preferred'], None, ['etf']],
+        'name': ['Apple', 'TESLA', 'Coca-Cola', None],
+    }
+
+    def check(operation, expected):
+        assert evaluate(operation['operation'], columns).tolist() == expected
+
+    check(And(col('close') > 20, col('type') == 'stock'), [False, True, False, False])
+    check(Or(col('close') < 10, col('type') == 'fund'), [True, False, True, False])
+    check(And(col('close') > col('VWAP')), [False, True, False, False])
+    check(And(col('close').between(5, 25)), [True, True, False, False])
+    check(And(col('type').not_in(['fund'])), [True, True, False, False])
+    check(And(col('type') != 'stock'), [False, False, True, False])
+    check(And(col('close').empty()), [False, False, True, False])
+    check(And(col('typespecs').has(['common', 'etf'])), [True, False, False, True])
+    check(And(col('typespecs').has_none_of('common')), [False, True, True, True])
+    check(And(col('name').like('cola')), [False, False, True, False])
+
+
+def test_sort_positions():
+    columns = {'close': [5, None, 40, 5], 'name': ['b', 'a', None, 'c']}
+    asc: SortByDict = {'sortBy': 'close', 'sortOrder': 'asc'}
+    desc: SortByDict = {'sortBy': 'close', 'sortOrder': 'desc'}
+    assert sort_positions(asc, columns, 4).tolist() == [0, 3, 2, 1]
+    assert sort_positions(desc, columns, 4).tolist() == [2, 0, 3, 1]
+    nulls_first: SortByDict = {**desc, 'nullsFirst': True}
+    assert sort_positions(nulls_first, columns, 4).tolist() == [1, 2, 0, 3]
+    names: SortByDict = {'sortBy': 'name', 'sortOrder': 'desc'}
+    assert sort_positions(names, columns, 4).tolist() == [3, 0, 1, 2]
+    assert np.array_equal(sort_positions(None, columns, 4), np.arange(4))
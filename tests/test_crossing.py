@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from tradingview_screener.column import Column
+from tradingview_screener.crossing import CrossingDetector
+
+
+def test_crossing_detector():
+    detector = CrossingDetector([('close', 'VWAP'), (Column('RSI'), 70)])
+    assert detector.columns == ['close', 'VWAP', 'RSI']
+
+    def update(close, vwap, rsi, tickers=('A', 'B', 'C')):
+        df = pd.DataFrame({'ticker': list(tickers), 'close': close, 'VWAP': vwap, 'RSI': rsi})
+        result = detector.update(df)
+        return list(result.itertuples(index=False, name=None))
+
+    assert update([1, 1, 3], [2, 2, 2], [60, 80, np.nan]) == []  # nothing to compare with
+    assert update([3, 2, 1], [2, 2, 2], [71, 60, 75]) == [
+        ('A', 'close', 'VWAP', 'above'),
+        ('A', 'RSI', 70, 'above'),
+        ('B', 'RSI', 70, 'below'),
+        ('C', 'close', 'VWAP', 'below'),
+    ]
+    # `B` touched the VWAP in the previous update, and was below it before that
+    assert update([3, 3, None], [2, 2, 2], [71, 60, 75]) == [('B', 'close', 'VWAP', 'above')]
+    # `C` was null in the previous result (and moved), and `D` is new
+    assert update([1, 3, 3, 1], [2, 2, 2, 2], [71, 75, 60, 99], tickers='ACBD') == [
+        ('A', 'close', 'VWAP', 'below'),
+        ('C', 'close', 'VWAP', 'above'),
+    ]
+    # `B` is missing from a result, and keeps its last known signs
+    assert update([1, 3], [2, 2], [71, 75], tickers='AC') == []
+    assert update([1, 1], [2, 2], [71, 75], tickers='AB') == [
+        ('B', 'close', 'VWAP', 'below'),
+        ('B', 'RSI', 70, 'above'),
+    ]
+
+
+def test_crossing_detector_forgets_missing_tickers():
+    detector = CrossingDetector([('close', 'VWAP')], max_missed=2)
+
+    def update(tickers, close):
+        df = pd.DataFrame({'ticker': list(tickers), 'close': close, 'VWAP': 2.0})
+        return detector.update(df)['ticker'].tolist()
+
+    assert update('AB', [1.0, 1.0]) == []
+    for _ in range(2):  # `B` is missing from 2 results, and is still known
+        assert update('A', [1.0]) == []
+    assert update('AB', [1.0, 3.0]) == ['B']
+
+    for i in range(3):  # then from 3 results, and is forgotten
+        assert update(['A', f'T{i}'], [1.0, 1.0]) == []
+    assert len(detector._ids) == 4  # pyright: ignore [reportArgumentType]
+    assert update('AB', [1.0, 1.0]) == []  # no crossing, `B` is new again
+    assert sorted(detector._ids) == ['A', 'B', 'T1', 'T2']  # pyright: ignore
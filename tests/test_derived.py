@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradingview_screener.column import col
+from tradingview_screener.decode import to_dataframe
+from tradingview_screener.derived import Derived, Expression, ratio, spread, technical_rating
+from tradingview_screener.query import Query
+from tradingview_screener.util import format_technical_rating
+
+
+def test_format_technical_rating():
+    values = [0.6, 0.5, 0.1, 0.0, -0.1, -0.3, -0.5, -0.9]
+    labels = [format_technical_rating(x) for x in values]
+    assert labels == [
+        'Strong Buy',
+        'Strong Buy',
+        'Buy',
+        'Neutral',
+        'Neutral',
+        'Sell',
+        'Sell',
+        'Strong Sell',
+    ]
+    assert format_technical_rating(np.float32(0.2)) == 'Buy'
+
+    categorical = format_technical_rating(np.array([*values, np.nan]))
+    assert list(categorical) == [*labels, np.nan]
+    assert categorical.ordered
+
+    s = pd.Series([0.2, None], index=['a', 'b'], dtype='Float64', name='Recommend.All')
+    result = format_technical_rating(s)
+    assert result.name == 'Recommend.All'
+    assert result.index.tolist() == ['a', 'b']
+    assert result.tolist()[0] == 'Buy'
+    assert result.isna().tolist() == [False, True]
+
+
+def test_derived_columns():
+    response = {
+        'totalCount': 2,
+        'data': [
+            {'s': 'NASDAQ:AAPL', 'd': [10.0, 8.0, 100.1, 99.9, 0.6, 1000]},
+            {'s': 'NYSE:KO', 'd': [5.0, 0.0, None, 50.0, -0.2, 3]},
+        ],
+    }
+    columns = ['close', 'VWAP', 'ask', 'bid', 'Recommend.All', 'volume']
+    df = to_dataframe(
+        response,  # pyright: ignore [reportArgumentType]
+        columns,
+        derived=[
+            ratio('close', 'VWAP'),
+            spread('ask', 'bid'),
+            spread('ask', 'bid', name='spread_pct', relative=True),
+            technical_rating('Recommend.All'),
+            Derived('dollar_volume', ['close', 'volume'], lambda close, vol: close * vol),
+        ],
+        compact=True,
+    )
+    assert df.columns.tolist() == [
+        'ticker',
+        *columns,
+        'close/VWAP',
+        'ask-bid',
+        'spread_pct',
+        'Recommend.All.label',
+        'dollar_volume',
+    ]
+    assert df['close/VWAP'].iloc[0] == 1.25
+    assert pd.isna(df['close/VWAP'].iloc[1])  # division by zero
+    assert df['ask-bid'].iloc[0] == pytest.approx(0.2, rel=1e-5)
+    assert df['spread_pct'].iloc[0] == pytest.approx(0.002, rel=1e-5)
+    assert pd.isna(df['spread_pct'].iloc[1])
+    assert df['Recommend.All.label'].tolist() == ['Strong Buy', 'Sell']
+    assert df['dollar_volume'].tolist() == [10000, 15]
+
+    with pytest.raises(KeyError, match='high'):
+        to_dataframe(response, columns, derived=[ratio('high', 'low')])  # pyright: ignore
+
+
+def test_expression():
+    expr = (col('high') - col('low')) / col('ATR')
+    assert isinstance(expr, Expression)
+    assert expr.name == '(high - low) / ATR'
+    assert expr.inputs == ['high', 'low', 'ATR']
+    assert (1 - col('a') - (col('b') - 2)).name == '1 - a - (b - 2)'
+    assert (-(col('a') + 1) * abs(col('b'))).name == '-(a + 1) * abs(b)'
+    assert (col('close') - 'open').alias('body').name == 'body'
+
+    df = pd.DataFrame({'high': [3, 5, None], 'low': [1, 5, 1], 'ATR': [4, 2, 1]}, dtype='Int64')
+    assert expr.compute(df).tolist()[:2] == [0.5, 0]
+    assert expr.compute(df).isna().tolist() == [False, False, True]
+    assert (col('low') / (col('ATR') - 2)).compute(df).isna().tolist() == [False, True, False]
+
+
+def test_select_expressions(monkeypatch):
+    q = Query().select(
+        'name',
+        col('close') / col('price_52_week_high'),
+        ((col('high') - col('low')) / col('close')).alias('range_pct'),
+    )
+    assert q.query.get('columns') == ['name', 'close', 'price_52_week_high', 'high', 'low']
+
+    def fake_get_scanner_data_raw(self, **kwargs):
+        return {
+            'totalCount': 1,
+            'data': [{'s': 'NASDAQ:AAPL', 'd': ['AAPL', 10.0, 20.0, 11.0, 9.0]}],
+        }
+
+    monkeypatch.setattr(Query, 'get_scanner_data_raw', fake_get_scanner_data_raw)
+    _, df = q.get_scanner_data(derived=[ratio('high', 'low')])
+    assert df.columns.tolist() == [
+        'ticker',
+        'name',
+        'close / price_52_week_high',
+        'range_pct',
+        'high/low',
+    ]
+    assert df.iloc[0].tolist() == ['NASDAQ:AAPL', 'AAPL', 0.5, 0.2, 11 / 9]
+
+    # the derived columns are kept by `copy()`, and cleared by the next `select()`
+    assert q.copy().derived == q.derived
+    q.select('name', 'close')
+    assert q.query.get('columns') == ['name', 'close']
+    assert q.derived == []
@@ -0,0 +1,118 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from tradingview_screener.diff import ChangeEvent, ChangeTracker
+from tradingview_screener.query import Query
+
+
+def test_change_tracker():
+    tracker = ChangeTracker(key_columns=['close', 'typespecs'])
+    df1 = pd.DataFrame(
+        {
+            'ticker': ['NASDAQ:AAPL', 'NYSE:KO', 'NASDAQ:MSFT'],
+            'name': ['AAPL', 'KO', 'MSFT'],
+            'close': [210.5, 60.0, None],
+            'typespecs': [['common'], ['common'], []],
+        }
+    )
+    events = tracker.update(df1)
+    assert [(e.kind, e.ticker) for e in events] == [
+        ('entered', 'NASDAQ:AAPL'),
+        ('entered', 'NYSE:KO'),
+        ('entered', 'NASDAQ:MSFT'),
+    ]
+    assert events[0].values == {'close': 210.5, 'typespecs': ['common']}
+
+    assert tracker.update(df1) == []
+    df2 = pd.DataFrame(
+        {
+            'ticker': ['NASDAQ:MSFT', 'NASDAQ:AAPL', 'NASDAQ:NVDA'],
+            'name': ['Microsoft', 'AAPL', 'NVDA'],  # not tracked
+            'close': [None, 211.0, 120.0],
+            'typespecs': [['common'], ['common'], ['common']],
+        }
+    )
+    assert tracker.update(df2) == [
+        ChangeEvent('entered', 'NASDAQ:NVDA', {'close': 120.0, 'typespecs': ['common']}),
+        ChangeEvent('changed', 'NASDAQ:MSFT', {'typespecs': ['common']}),
+        ChangeEvent('changed', 'NASDAQ:AAPL', {'close': 211.0}),
+        ChangeEvent('exited', 'NYSE:KO', {}),
+    ]
+
+    tracker = ChangeTracker(emit_initial=False)
+    assert tracker.update(df1) == []
+    assert tracker.key_columns == ['name', 'close', 'typespecs']
+
+
+def test_watch(monkeypatch):
+    results = iter(
+        [
+            pd.DataFrame({'ticker': ['NASDAQ:AAPL', 'NYSE:KO'], 'close': [1.0, 2.0]}),
+            pd.DataFrame({'ticker': ['NASDAQ:AAPL', 'NYSE:KO'], 'close': [1.0, 2.0]}),
+            pd.DataFrame({'ticker': ['NASDAQ:AAPL'], 'close': [1.5]}),
+        ]
+    )
+
+    def fake_get_scanner_data(self: Query, session=None, cache=None, **kwargs):
+        df = next(results)
+        return len(df), df
+
+    monkeypatch.setattr(Query, 'get_scanner_data', fake_get_scanner_data)
+
+    async def main():
+        events = []
+        async for event in Query().watch(0.01):
+            events.append(event)
+            if len(events) == 4:
+                break
+        return events
+
+    events = asyncio.run(asyncio.wait_for(main(), 5))
+    assert events == [
+        ChangeEvent('entered', 'NASDAQ:AAPL', {'close': 1.0}),
+        ChangeEvent('entered', 'NYSE:KO', {'close': 2.0}),
+        ChangeEvent('changed', 'NASDAQ:AAPL', {'close': 1.5}),
+        ChangeEvent('exited', 'NYSE:KO', {}),
+    ]
+
+
+def test_watch_keeps_polling_after_errors(monkeypatch):
+    results = iter(
+        [
+            pd.DataFrame({'ticker': ['NASDAQ:AAPL'], 'close': [1.0]}),
+            TimeoutError('timed out'),
+            pd.DataFrame({'ticker': ['NASDAQ:AAPL'], 'close': [1.5]}),
+        ]
+    )
+
+    def fake_get_scanner_data(self: Query, session=None, cache=None, **kwargs):
+        df = next(results)
+        if isinstance(df, Exception):
+            raise df
+        return len(df), df
+
+    monkeypatch.setattr(Query, 'get_scanner_data', fake_get_scanner_data)
+
+    async def main(n: int, **kwargs):
+        events = []
+        async for event in Query().watch(0.01, **kwargs):
+            events.append(event)
+            if len(events) == n:
+                break
+        return events
+
+    errors = []
+    events = asyncio.run(asyncio.wait_for(main(2, on_error=errors.append), 5))
+    assert events == [
+        ChangeEvent('entered', 'NASDAQ:AAPL', {'close': 1.0}),
+        ChangeEvent('changed', 'NASDAQ:AAPL', {'close': 1.5}),
+    ]
+    assert len(errors) == 1 and isinstance(errors[0], TimeoutError)
+
+    # without `on_error`, the errors are warnings
+    results = iter([TimeoutError('timed out'), pd.DataFrame({'ticker': ['A'], 'close': [1.0]})])
+    with pytest.warns(RuntimeWarning, match='timed out'):
+        events = asyncio.run(asyncio.wait_for(main(1), 5))
+    assert events == [ChangeEvent('entered', 'A', {'close': 1.0})]
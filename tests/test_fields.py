@@ -0,0 +1,131 @@
+import pandas as pd
+import pytest
+
+from tradingview_screener.decode import to_dataframe
+from tradingview_screener.fields import field_type, screener_from_url, validate_fields
+from tradingview_screener.query import Query
+from tradingview_screener.screeners import crypto, options
+
+
+@pytest.mark.parametrize(
+    ['name', 'screener', 'expected'],
+    [
+        ('close', 'stocks', 'price'),
+        ('close|5', 'stocks', 'price'),
+        ('close[1]', 'stocks', 'price'),
+        ('sector.tr', 'stocks', 'text'),
+        ('typespecs', 'stocks', 'set'),
+        ('is_primary', 'stocks', 'bool'),
+        ('earnings_release_next_trading_date_fq', 'stocks', 'time'),
+        ('EMA200', 'stocks', 'price'),
+        ('Perf.YTD', 'stocks', 'percent'),
+        ('24h_close_change|5', 'crypto', 'percent'),
+        ('strike', 'options', 'price'),
+        ('EMA200', 'options', None),
+        ('this_field_does_not_exist', 'stocks', None),
+    ],
+)
+def test_field_type(name, screener, expected):
+    assert field_type(name, screener) == expected
+
+
+def test_screener_from_url():
+    assert screener_from_url(Query().url) == 'stocks'
+    assert screener_from_url(Query('germany').url) == 'stocks'
+    assert screener_from_url(crypto().url) == 'crypto'
+    assert screener_from_url(options('NASDAQ:AAPL').url) == 'options'
+
+
+def test_validate_fields():
+    validate_fields(['name', 'close', 'volume', 'RSI7', 'sector.tr'])
+
+    with pytest.raises(ValueError, match="did you mean: 'close'"):
+        validate_fields(['clsoe'])
+
+    with pytest.raises(ValueError, match='clsoe'):
+        Query().select('name', 'clsoe', validate=True)
+
+    # by default the columns aren't validated
+    Query().select('name', 'clsoe')
+
+
+def test_to_dataframe_dtypes():
+    json_obj = {
+        'totalCount': 2,
+        'data': [
+            {'s': 'NASDAQ:AAPL', 'd': ['AAPL', 190.5, None, 1, True, 1714420800, 'stock']},
+            {'s': 'NASDAQ:MSFT', 'd': ['MSFT', 410.0, None, 100, None, None, 'stock']},
+        ],
+    }
+    columns = ['name', 'close', 'change', 'pricescale', 'is_primary', 'earnings_release_date', 'x']
+    df = to_dataframe(json_obj, columns)  # pyright: ignore [reportArgumentType]
+
+    assert list(df.columns) == ['ticker', *columns]
+    assert df['close'].dtype == 'float64'
+    assert df['change'].dtype == 'float64'  # all nulls, would've been `object` otherwise
+    assert df['pricescale'].dtype == 'Int64'
+    assert df['is_primary'].dtype == 'boolean'
+    assert df['earnings_release_date'].dtype.kind == 'M'
+    assert str(df['earnings_release_date'][0]) == '2024-04-29 20:00:00+00:00'
+    assert df['earnings_release_date'].isna().tolist() == [False, True]
+
+
+def test_to_dataframe_empty_and_duplicated_columns():
+    df = to_dataframe({'totalCount': 0, 'data': []}, ['close', 'close'])
+    assert df.empty
+    assert list(df.columns) == ['ticker', 'close', 'close']
+
+    json_obj = {'totalCount': 0, 'fields': ['strike', 'iv'], 'time': '2026-04-24T13:45:37Z'}
+    df = to_dataframe(json_obj, screener='options')  # pyright: ignore [reportArgumentType]
+    assert df.empty
+    assert list(df.columns) == ['ticker', 'strike', 'iv']
+
+
+def test_to_dataframe_compact():
+    rows = [
+        {
+            's': f'NASDAQ:T{i}',
+            'd': [10 + i * 0.25, 1_000 * i, ['NYSE', 'NASDAQ'][i % 2], 100, ['common']],
+        }
+        for i in range(100)
+    ]
+    rows[0]['d'][1] = None
+    json_obj = {'totalCount': 100, 'data': rows}
+    columns = ['close', 'volume', 'exchange', 'pricescale', 'typespecs']
+
+    df = to_dataframe(json_obj, columns)  # pyright: ignore [reportArgumentType]
+    compact = to_dataframe(json_obj, columns, compact=True)  # pyright: ignore [reportArgumentType]
+
+    assert compact['close'].dtype == 'float32'
+    assert compact['volume'].dtype == 'UInt32'  # nullable because of the `None`
+    assert compact['pricescale'].dtype == 'uint8'
+    assert compact['exchange'].dtype == 'category'
+    assert compact['typespecs'].dtype == object
+    assert compact['ticker'].dtype != 'category'  # all unique
+
+    assert (compact['close'].astype('float64') == df['close']).all()
+    assert compact['volume'].isna().tolist() == df['volume'].isna().tolist()
+    assert compact.attrs['memory_saved'] > 0
+    assert compact.attrs['memory_usage'] == compact.memory_usage(deep=True).sum()
+
+
+def test_to_dataframe_dates_and_server_time():
+    json_obj = {
+        'totalCount': 2,
+        'fields': ['strike', 'expiration'],
+        'symbols': [
+            {'s': 'OPRA:AAPL260821C200.0', 'f': [200.0, 20260821]},
+            {'s': 'OPRA:AAPL240229P150.0', 'f': [150.0, None]},
+        ],
+        'time': '2026-04-24T13:45:37Z',
+    }
+    df = to_dataframe(json_obj, screener='options')  # pyright: ignore [reportArgumentType]
+
+    assert df['expiration'].dtype == 'datetime64[s]'
+    assert str(df['expiration'][0]) == '2026-08-21 00:00:00'
+    assert df['expiration'].isna().tolist() == [False, True]
+    assert df.attrs['time'] == pd.Timestamp('2026-04-24T13:45:37Z')
+
+    # the metadata is kept in compact mode
+    df = to_dataframe(json_obj, screener='options', compact=True)  # pyright: ignore [reportArgumentType]
+    assert df.attrs['time'] == pd.Timestamp('2026-04-24T13:45:37Z')
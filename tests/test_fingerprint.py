@@ -0,0 +1,117 @@
+import pytest
+
+from tradingview_screener.column import Column, col
+from tradingview_screener.derived import Derived, spread
+from tradingview_screener.fingerprint import canonicalize, fingerprint
+from tradingview_screener.models import OperationComparisonDict, QueryDict
+from tradingview_screener.query import And, Or, Query
+
+
+def test_equivalent_queries_have_the_same_fingerprint():
+    # `where()` and `where2()` replace the default filters of `Query()`, so all of them use both
+    base = (
+        Query().select('name', 'close').where(col('close') > 5).where2(And(col('type') == 'stock'))
+    )
+    equivalent = [
+        Query().select('name', 'close').where(col('type') == 'stock').where2(And(col('close') > 5)),
+        Query()
+        .select('name', 'close')
+        .where()
+        .where2(And(col('type') == 'stock', col('close') > 5)),
+        Query()
+        .select('name', Column('close'))
+        .where(Column('close') > 5, col('type') == 'stock')
+        .where2(And(col('type') == 'stock')),
+        Query()
+        .select('name', 'close')
+        .where()
+        .where2(And(And(col('close') > 5), And(col('type') == 'stock'))),
+    ]
+    for q in equivalent:
+        assert q.fingerprint() == base.fingerprint(), q
+
+
+def test_different_queries_have_different_fingerprints():
+    base = Query().select('name', 'close')
+    different = [
+        Query().select('close', 'name'),  # the column order changes the result
+        Query().select('name', 'close').limit(10),
+        Query('germany').select('name', 'close'),
+        Query().select('name', 'close').order_by('close'),
+        Query().select('name', 'close').where(col('close').between(1, 5)),
+        Query().select('name', 'close').where(col('close').between(5, 1)),
+    ]
+    fingerprints = {q.fingerprint() for q in different}
+    assert len(fingerprints) == len(different)
+    assert base.fingerprint() not in fingerprints
+    assert len(base.fingerprint()) == 32
+
+
+def test_canonicalize_operands():
+    a = Or(col('exchange').isin(['NYSE', 'AMEX']), col('typespecs').has('common'))
+    b = Or(col('typespecs').has(['common']), col('exchange').isin(('AMEX', 'NYSE', 'AMEX')))
+    assert canonicalize({'filter2': a['operation']}) == canonicalize({'filter2': b['operation']})
+
+    # an empty OR is never true, so it isn't dropped, and the AND around it is never true either
+    never: OperationComparisonDict = {'operator': 'or', 'operands': []}
+    assert canonicalize({'filter2': never})['filter2'] == never
+    assert fingerprint({'filter2': never}) != fingerprint({})
+    q: QueryDict = {'filter': [col('x') > 1], 'filter2': never}
+    assert canonicalize(q)['filter2'] == never
+    assert fingerprint(q) == fingerprint({'filter2': never})
+    assert fingerprint(q) != fingerprint({'filter': [col('x') > 1]})
+    # and an OR with an operand that is always true is always true
+    assert 'filter2' not in canonicalize({'filter2': Or(col('x') > 1, And())['operation']})
+
+    # the defaults are filled in
+    assert canonicalize({'symbols': {}, 'ignore_unknown_fields': False}) == {'range': [0, 50]}
+    assert canonicalize({'sort': {'sortBy': 'close', 'sortOrder': 'asc'}})['sort'] == {
+        'sortBy': 'close',
+        'sortOrder': 'asc',
+        'nullsFirst': False,
+    }
+
+
+def test_derived_columns_change_the_fingerprint():
+    base = Query().select('name', 'close', 'VWAP')
+    ratio = Query().select('name', col('close') / col('VWAP'))
+    renamed = Query().select('name', (col('close') / col('VWAP')).alias('ratio'))
+    product = Query().select('name', col('close') * col('VWAP'))
+    assert ratio.query == base.query == product.query  # only the derived columns differ
+    queries = [base, ratio, renamed, product]
+    assert len({q.fingerprint() for q in queries}) == len(queries)
+    assert all(a != b for i, a in enumerate(queries) for b in queries[i + 1 :])
+
+    same = Query().select('name', Column('close') / 'VWAP')
+    assert same.fingerprint() == ratio.fingerprint() and same == ratio
+    assert ratio.copy() == ratio
+
+
+def test_derived_functions_change_the_fingerprint():
+    def query(*derived):
+        return Query().select('name', 'ask', 'bid', *derived)
+
+    # the same names and inputs, but different parameters or code
+    absolute = query(spread('ask', 'bid', name='s'))
+    relative = query(spread('ask', 'bid', relative=True, name='s'))
+    plus = query(Derived('s', ['ask', 'bid'], lambda a, b: a + b))
+    minus = query(Derived('s', ['ask', 'bid'], lambda a, b: a - b))
+    queries = [absolute, relative, plus, minus]
+    assert len({q.fingerprint() for q in queries}) == len(queries)
+    assert all(a != b for i, a in enumerate(queries) for b in queries[i + 1 :])
+    assert query(spread('ask', 'bid', name='s')) == absolute
+
+    # the computed columns of the filters are identified by their formula
+    a = Query().where(col('ask') / col('bid') > 1)
+    b = Query().where(col('ask') * col('bid') > 1)
+    assert a.fingerprint() != b.fingerprint()
+    assert a.fingerprint() == Query().where(col('ask') / col('bid') > 1).fingerprint()
+
+    class Scale:
+        def __call__(self, a):
+            return a * 2
+
+    unknown = query(Derived('s', ['ask'], Scale()))
+    with pytest.raises(TypeError):
+        unknown.fingerprint()
+    assert unknown != query(Derived('s', ['ask'], Scale()))
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import re
+import subprocess
+import sys
+
+HEAVY_MODULES = ('requests', 'pandas', 'numpy')
+
+
+def _run(code: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args, '-c', code], capture_output=True, text=True, check=True
+    )
+
+
+def test_import_is_lazy():
+    # building a query (without sending it) shouldn't import any of the heavy dependencies
+    code = (
+        'import sys\n'
+        'from tradingview_screener import Query, col, And, Or, stocks, options\n'
+        'q = stocks().select("close").where(col("close") > 5).limit(10)\n'
+        'q.where2(And(Or(col("type") == "stock", col("type") == "fund")))\n'
+        f'print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n'
+    )
+    loaded = _run(code).stdout.strip()
+    assert loaded == '', f'these modules were imported eagerly: {loaded}'
+
+
+def test_import_time_benchmark():
+    """
+    Parse the output of `python -X importtime` to measure how long it takes to import the package.
+
+    The threshold is very generous on purpose (CI machines are slow and noisy), it's only meant to
+    catch regressions like importing `requests` or `pandas` at the module level, which would add
+    hundreds of milliseconds.
+    """
+    stderr = _run('import tradingview_screener', '-X', 'importtime').stderr
+    match = re.search(r'\|\s*(\d+)\s*\|\s*tradingview_screener$', stderr, re.MULTILINE)
+    assert match is not None
+    cumulative_us = int(match.group(1))
+    assert cumulative_us < 150_000, f'importing took {cumulative_us / 1000:.1f}ms'
@@ -0,0 +1,62 @@
+import pytest
+
+from tradingview_screener.membership import MembershipCache
+from tradingview_screener.query import Query
+
+INDEXES = {
+    'SYML:SP;SPX': ['NASDAQ:AAPL', 'NASDAQ:MSFT', 'NYSE:KO', 'NYSE:JPM'],
+    'SYML:NASDAQ;NDX': ['NASDAQ:MSFT', 'NASDAQ:AAPL', 'NASDAQ:PDD'],
+}
+
+
+@pytest.fixture
+def requests_sent(monkeypatch):
+    sent = []
+
+    def fake_get_scanner_data_raw(self: Query, session=None, **kwargs):
+        sent.append(self.query)
+        (index,) = self.query['symbols']['symbolset']  # pyright: ignore
+        rows = [{'s': t, 'd': [t.split(':')[1]]} for t in INDEXES[index]]
+        return {'totalCount': len(rows), 'data': rows}
+
+    monkeypatch.setattr(Query, 'get_scanner_data_raw', fake_get_scanner_data_raw)
+    return sent
+
+
+def test_membership_cache(requests_sent):
+    members = MembershipCache(ttl=60)
+    assert members.members('SYML:SP;SPX') == INDEXES['SYML:SP;SPX']
+    assert members.members('SYML:SP;SPX') == INDEXES['SYML:SP;SPX']
+    assert len(requests_sent) == 1
+    assert requests_sent[0]['columns'] == ['name']
+
+    assert members.union('SYML:SP;SPX', 'SYML:NASDAQ;NDX') == [
+        'NASDAQ:AAPL',
+        'NASDAQ:MSFT',
+        'NYSE:KO',
+        'NYSE:JPM',
+        'NASDAQ:PDD',
+    ]
+    assert members.intersection('SYML:NASDAQ;NDX', 'SYML:SP;SPX') == ['NASDAQ:MSFT', 'NASDAQ:AAPL']
+    assert members.difference('SYML:SP;SPX', 'SYML:NASDAQ;NDX') == ['NYSE:KO', 'NYSE:JPM']
+    assert len(requests_sent) == 2
+    assert (members.hits, members.misses) == (6, 2)
+
+    q = Query().select('name', 'close').set_index('SYML:SP;SPX')
+    q2 = members.apply(q)
+    assert q2.query['symbols'] == {'tickers': INDEXES['SYML:SP;SPX']}  # pyright: ignore
+    assert 'preset' not in q2.query
+    assert q.query['symbols'] == {'symbolset': ['SYML:SP;SPX']}  # pyright: ignore
+    q3 = members.apply(Query(), 'SYML:SP;SPX', 'SYML:NASDAQ;NDX', how='intersection')
+    assert q3.query['symbols'] == {'tickers': ['NASDAQ:AAPL', 'NASDAQ:MSFT']}  # pyright: ignore
+    assert len(requests_sent) == 2
+
+    members.invalidate('SYML:SP;SPX')
+    members.members('SYML:SP;SPX')
+    assert len(requests_sent) == 3
+    members.ttl = -1  # everything expired
+    members.members('SYML:NASDAQ;NDX')
+    assert len(requests_sent) == 4
+
+    with pytest.raises(ValueError, match='index'):
+        members.apply(Query())
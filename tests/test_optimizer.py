@@ -0,0 +1,112 @@
+import pytest
+
+from tradingview_screener.column import col
+from tradingview_screener.optimizer import UNSATISFIABLE, is_unsatisfiable, optimize_filter2
+from tradingview_screener.query import And, Or, Query
+from tradingview_screener.screeners import crypto
+
+
+def _optimize(operation):
+    return optimize_filter2(operation['operation'])
+
+
+def test_flatten_and_dedupe():
+    result = _optimize(
+        And(
+            And(col('type') == 'stock', And(col('close') > col('VWAP'))),
+            col('close') > col('VWAP'),
+            Or(col('exchange') == 'NYSE'),
+        )
+    )
+    assert result == {
+        'operator': 'and',
+        'operands': [
+            {'expression': {'left': 'type', 'operation': 'equal', 'right': 'stock'}},
+            {'expression': {'left': 'close', 'operation': 'greater', 'right': 'VWAP'}},
+            {'expression': {'left': 'exchange', 'operation': 'equal', 'right': 'NYSE'}},
+        ],
+    }
+
+
+@pytest.mark.parametrize(
+    ['operation', 'expected'],
+    [
+        (And(col('close') > 5, col('close') > 10), [col('close') > 10]),
+        (And(col('close') >= 10, col('close') > 10), [col('close') > 10]),
+        (And(col('close') > 5, col('close') <= 20), [col('close') > 5, col('close') <= 20]),
+        (
+            And(col('close').between(1, 10), col('close').between(5, 20)),
+            [col('close').between(5, 10)],
+        ),
+        (And(col('close') >= 5, col('close') <= 5), [col('close') == 5]),
+        (And(col('close').not_empty(), col('close') > 5), [col('close') > 5]),
+        (And(col('type').isin(['stock', 'fund']), col('type') == 'fund'), [col('type') == 'fund']),
+        (Or(col('close') > 5, col('close') > 10), [col('close') > 5]),
+        (Or(col('close').between(1, 5), col('close').between(3, 8)), [col('close').between(1, 8)]),
+        (Or(col('close') > 5, col('close') < 10), [col('close').not_empty()]),
+        (Or(col('type') == 'stock', col('type') == 'fund'), [col('type').isin(['fund', 'stock'])]),
+    ],
+)
+def test_merge_bounds(operation, expected):
+    result = _optimize(And(operation))
+    assert result == {'operator': 'and', 'operands': [{'expression': e} for e in expected]}
+
+
+@pytest.mark.parametrize(
+    'operation',
+    [
+        And(col('close') > 10, col('close') < 5),
+        And(col('close') > 10, col('close') <= 10),
+        And(col('close').between(10, 5)),
+        And(col('type') == 'stock', col('type') == 'fund'),
+        And(col('close').empty(), col('close') > 5),
+        And(Or(col('close') > 10, col('close') < 5), col('close').between(6, 9)),
+    ],
+)
+def test_unsatisfiable(operation):
+    assert _optimize(operation) == UNSATISFIABLE
+
+
+def test_tautology():
+    assert optimize_filter2({'operator': 'and', 'operands': []}) is None
+    assert _optimize(And(Or(col('x') > 1, And()))) is None
+    # `x > 1 OR true` is true, so only `x < 5` is left
+    assert _optimize(And(Or(col('x') > 1, And()), col('x') < 5)) == {
+        'operator': 'and',
+        'operands': [{'expression': col('x') < 5}],
+    }
+
+
+def test_query_optimize(monkeypatch):
+    q = Query().where(col('close') > 5, col('close') > 10).optimize()
+    assert 'filter' not in q.query
+    operands = q.query['filter2']['operands']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+    assert operands[0] == {'expression': {'left': 'close', 'operation': 'greater', 'right': 10}}
+    assert operands[1]['operation']['operator'] == 'or'  # pyright: ignore
+
+    # an unsatisfiable query shouldn't send any request
+    def fail(*args, **kwargs):
+        raise AssertionError('no request should be sent')
+
+    monkeypatch.setattr('requests.post', fail)
+    count, df = Query().where(col('close') > 10, col('close') < 5).optimize().get_scanner_data()
+    assert count == 0
+    assert df.empty
+    assert list(df.columns) == ['ticker', *Query().query['columns']]  # pyright: ignore
+
+
+def test_column_on_the_right_is_not_a_literal():
+    # `base_currency` isn't in the registry of the stocks screener, and `Perf.1Y.MarketCap` isn't
+    # in any registry, but both are columns, not strings
+    q = crypto().where(col('currency') == col('base_currency'), col('currency') == 'USD')
+    assert not is_unsatisfiable(q.optimize().query)
+    q = crypto().where(col('currency') == 'base_currency', col('currency') == 'USD')
+    assert not is_unsatisfiable(q.optimize().query)
+
+    operation = Or(col('sector') == col('Perf.1Y.MarketCap'), col('sector') == 'Finance')
+    assert _optimize(And(operation)) == operation['operation']
+    operation = col('close').between(col('EMA5_custom'), col('EMA20_custom'))
+    assert _optimize(And(operation, col('close').isin(['EMA5_custom']))) == {
+        'operator': 'and',
+        'operands': [{'expression': operation}, {'expression': col('close') == 'EMA5_custom'}],
+    }
@@ -0,0 +1,70 @@
+import random
+
+import pandas as pd
+
+from tradingview_screener.option_chain import get_option_chain
+from tradingview_screener.query import Query
+
+
+def _fake_chain(underlying: str, n: int) -> list[dict]:
+    root = underlying.split(':')[1]
+    rows = []
+    for i in range(n):
+        strike = 100.0 + (i // 2) * 5
+        option_type = 'call' if i % 2 == 0 else 'put'
+        ticker = f'OPRA:{root}260821{option_type[0].upper()}{strike}'
+        rows.append({'s': ticker, 'f': [root, 20260821, strike, option_type, 0.3 + i / 1000]})
+    return rows
+
+
+def test_get_option_chain_pages(monkeypatch):
+    chains = {
+        'NASDAQ:AAPL': _fake_chain('NASDAQ:AAPL', 25),
+        'NASDAQ:TSLA': _fake_chain('NASDAQ:TSLA', 7),
+    }
+    requested = []
+
+    def fake_raw(self: Query, session=None, **kwargs):
+        underlying = self.query['index_filters'][0]['values'][0]  # pyright: ignore
+        start, end = self.query['range']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        requested.append((underlying, start, end))
+        rows = chains[underlying]
+        if self.query.get('sort', {}).get('sortBy') == 'name':
+            rows = sorted(rows, key=lambda row: row['s'])
+        else:  # without a sort, the order of the rows changes between the requests
+            rows = random.Random(len(requested)).sample(rows, len(rows))
+        return {
+            'totalCount': len(chains[underlying]),
+            'fields': self.query['columns'],  # pyright: ignore [reportTypedDictNotRequiredAccess]
+            'symbols': rows[start:end],
+            'time': '2026-04-24T13:45:37Z',
+        }
+
+    monkeypatch.setattr(Query, 'get_scanner_data_raw', fake_raw)
+    chain = get_option_chain('NASDAQ:AAPL', 'NASDAQ:TSLA', columns=['iv'], page_size=10)
+
+    assert sorted(requested) == [
+        ('NASDAQ:AAPL', 0, 10),
+        ('NASDAQ:AAPL', 10, 20),
+        ('NASDAQ:AAPL', 20, 30),
+        ('NASDAQ:TSLA', 0, 10),
+    ]
+    assert len(chain) == 32
+    assert not chain.index.duplicated().any()
+    assert chain.index.names == ['root', 'expiration', 'strike', 'option-type']
+    assert chain.index.is_monotonic_increasing
+    assert chain['iv'].dtype == 'float64'
+    assert chain.attrs['time'] == pd.Timestamp('2026-04-24T13:45:37Z')
+
+    row = chain.loc[('AAPL', pd.Timestamp('2026-08-21'), 105.0, 'put')]
+    assert row['ticker'] == 'OPRA:AAPL260821P105.0'
+    assert row['underlying'] == 'NASDAQ:AAPL'
+
+
+# --- integration tests ---
+
+
+def test_get_option_chain_returns_data():
+    chain = get_option_chain('NASDAQ:AAPL', page_size=1000)
+    assert len(chain) > 1000
+    assert not chain.index.duplicated().any()
@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradingview_screener.option_surface import OptionSurface
+
+
+def _response() -> dict:
+    rows = []
+    for expiration in (20260821, 20260918):
+        for strike in (190.0, 200.0, 210.0, 220.0):
+            moneyness = (strike - 205) / 100
+            call_delta = 0.5 - moneyness * 3
+            rows.append(
+                {
+                    's': f'OPRA:AAPL{expiration % 1000000}C{strike}',
+                    'f': ['AAPL', expiration, strike, 'call', 0.25 + moneyness, call_delta],
+                }
+            )
+            rows.append(
+                {
+                    's': f'OPRA:AAPL{expiration % 1000000}P{strike}',
+                    'f': ['AAPL', expiration, strike, 'put', 0.3 + moneyness, call_delta - 1],
+                }
+            )
+    rows.reverse()  # the surface should sort them
+    fields = ['root', 'expiration', 'strike', 'option-type', 'iv', 'delta']
+    return {'totalCount': len(rows), 'fields': fields, 'symbols': rows}
+
+
+def test_lookup():
+    surface = OptionSurface.from_response(_response())  # pyright: ignore [reportArgumentType]
+
+    assert surface.expirations() == [np.datetime64('2026-08-21'), np.datetime64('2026-09-18')]
+    assert surface.strikes('2026-08-21').tolist() == [190.0, 200.0, 210.0, 220.0]
+    assert surface.lookup('2026-08-21', 200.0, 'call', 'iv') == pytest.approx(0.2)
+    assert surface.lookup(20260821, 210.0, 'put', 'iv') == pytest.approx(0.35)
+    assert surface.lookup(pd.Timestamp('2026-08-21'), 210.0, 'put', 'iv') == pytest.approx(0.35)
+    assert math.isnan(surface.lookup('2026-08-21', 205.0))
+
+    values = surface.lookup_many('2026-09-18', [190.0, 195.0, 220.0, 500.0])
+    assert np.allclose(values, [0.1, np.nan, 0.4, np.nan], equal_nan=True)
+
+    with pytest.raises(KeyError):
+        surface.lookup('2030-01-01', 200.0)
+
+
+def test_atm_and_nearest_delta():
+    surface = OptionSurface.from_response(_response())  # pyright: ignore [reportArgumentType]
+
+    atm = surface.atm('2026-08-21', spot=203.0)
+    assert atm['strike'] == 200.0
+    assert atm['ticker'] == 'OPRA:AAPL260821C200.0'
+
+    assert surface.nearest_delta('2026-08-21', 0.3, 'call')['strike'] == 210.0
+    assert surface.nearest_delta('2026-08-21', -0.9, 'put')['strike'] == 220.0
+
+
+def test_interpolate():
+    surface = OptionSurface.from_response(_response())  # pyright: ignore [reportArgumentType]
+
+    result = surface.interpolate('2026-08-21', [195.0, 215.0, 100.0], columns=['iv'])
+    assert np.allclose(result['iv'], [0.15, 0.35, np.nan], equal_nan=True)
+
+
+def test_from_chain_dataframe():
+    df = pd.DataFrame(
+        {
+            'root': ['SPX', 'SPXW', 'SPX'],
+            'expiration': pd.to_datetime(['2026-08-21'] * 3),
+            'strike': [5000.0, 5000.0, 5100.0],
+            'option-type': ['call'] * 3,
+            'iv': [0.2, 0.21, 0.19],
+        }
+    ).set_index(['root', 'expiration', 'strike', 'option-type'])
+    surface = OptionSurface(df)
+
+    # both roots expire on the same day, so we have to pick one
+    with pytest.raises(ValueError, match='multiple roots'):
+        surface.lookup('2026-08-21', 5000.0)
+    assert surface.lookup('2026-08-21', 5000.0, root='SPXW') == pytest.approx(0.21)
+    assert surface.lookup('2026-08-21', 5100.0, root='SPX') == pytest.approx(0.19)
@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+from tradingview_screener.column import col
+from tradingview_screener.pager import Pager
+from tradingview_screener.query import Query
+
+
+@pytest.fixture
+def ranges(monkeypatch):
+    sent = []
+    lock = threading.Lock()
+
+    def fake_get_scanner_data_raw(self: Query, session=None, **kwargs):
+        start, end = self.query['range']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        filtered = any(f['left'] == 'close' for f in self.query.get('filter', []))
+        total = 250 if filtered else 1000
+        with lock:
+            sent.append((start, end, total))
+        rows = [{'s': f'NASDAQ:T{i}', 'd': [float(i)]} for i in range(start, min(end, total))]
+        return {'totalCount': total, 'data': rows}
+
+    monkeypatch.setattr(Query, 'get_scanner_data_raw', fake_get_scanner_data_raw)
+    return sent
+
+
+def _wait(pager: Pager):
+    wait(list(pager._pages.values()))
+
+
+def test_pager(ranges):
+    query = Query().select('close')
+    with Pager(query, page_size=100, read_ahead=2, max_pages=4) as pager:
+        assert pager.page(0)['close'].tolist() == [float(i) for i in range(100)]
+        assert (pager.count, pager.pages) == (1000, 10)
+        _wait(pager)
+        assert sorted(ranges) == [(0, 100, 1000), (100, 200, 1000), (200, 300, 1000)]
+
+        assert pager.next_page()['close'].iloc[0] == 100.0
+        assert pager.next_page()['close'].iloc[0] == 200.0
+        assert (pager.hits, pager.misses) == (2, 1)
+        _wait(pager)
+        assert len(ranges) == 5  # pages 3 and 4 were read ahead
+        assert list(pager._pages) == [1, 3, 4, 2]  # page 0 was evicted
+        assert pager.previous_page()['close'].iloc[0] == 100.0
+        assert query.query['range'] == [0, 50]  # pyright: ignore [reportTypedDictNotRequiredAccess]
+
+        # the query changed, so the pages are fetched again (and the count is updated)
+        ranges.clear()
+        query.where(col('close') > 0)
+        assert len(pager.page(1)) == 100
+        _wait(pager)
+        assert pager.count == 250
+        assert sorted(ranges) == [(100, 200, 250), (200, 300, 250), (300, 400, 250)]
+        ranges.clear()
+        assert len(pager.next_page()) == 50
+        _wait(pager)
+        assert ranges == []  # nothing to read ahead past the last page
+
+        with pytest.raises(IndexError):
+            pager.page(-1)
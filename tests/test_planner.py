@@ -0,0 +1,156 @@
+import pytest
+
+from tradingview_screener.column import col
+from tradingview_screener.local import evaluate
+from tradingview_screener.planner import needs_planning, plan
+from tradingview_screener.pool import DecodePool
+from tradingview_screener.query import And, Or, Query
+from tradingview_screener.ring import RingBuffer
+
+
+def test_plan():
+    ratio = col('close') / col('price_52_week_high')
+    q = (
+        Query()
+        .select('name', 'close')
+        .where(col('type') == 'stock', ratio > 0.95, col('name').regex(r'^[A-Z]{4}$'))
+    )
+    assert not needs_planning(Query().where(col('close') > 5).query)
+    assert needs_planning(q.query)
+
+    p = plan(q.query)
+    assert p.server_query.get('filter') == [col('type') == 'stock']
+    assert p.server_query.get('filter2') == q.query.get('filter2')  # the default one
+    assert p.residual is not None
+    assert len(p.residual['operands']) == 2
+    assert p.helpers == ['price_52_week_high']
+    assert p.server_query.get('columns') == ['name', 'close', 'price_52_week_high']
+
+    # the supported parts of a group that can't be sent as a whole
+    q = (
+        Query()
+        .select('close')
+        .where2(
+            And(
+                col('exchange') == 'NASDAQ',
+                Or(And(col('change') > 1, col('name').regex('X$')), col('volume') > 1e6),
+                Or(col('change') < -1, col('name').regex('Y$')),
+            )
+        )
+    )
+    p = plan(q.query)
+    assert p.server_query.get('filter2') == {
+        'operator': 'and',
+        'operands': [
+            {'expression': col('exchange') == 'NASDAQ'},
+            Or(And(col('change') > 1), col('volume') > 1e6),
+        ],
+    }
+    assert p.residual is not None
+    assert len(p.residual['operands']) == 2
+    assert p.helpers == ['change', 'name', 'volume']
+
+
+def test_plan_evaluate():
+    q = Query().where(
+        col('close') - col('open') > col('ATR'),  # an expression on both sides
+        (col('high') / col('low')).between(1, 1.5),
+        col('name').regex('^A'),
+    )
+    p = plan(q.query)
+    fields = ['name', 'close', 'open', 'ATR', 'high', 'low']
+    values = [
+        ('AAPL', 'ABNB', 'AMD', 'KO'),
+        (10, 10, None, 10),
+        (5, 5, 5, 5),
+        (1, 6, 1, 1),
+        (12, 12, 12, 12),
+        (10, 10, 10, 0),
+    ]
+    assert p.evaluate(fields, values, 4).tolist() == [True, False, False, False]
+    assert evaluate(None, {}, 2).tolist() == [True, True]
+
+
+def test_get_scanner_data_with_residual(monkeypatch):
+    universe = [{'s': f'NASDAQ:T{i}', 'name': f'T{i}', 'close': float(i)} for i in range(100)]
+    ranges = []
+
+    def fake_get_scanner_data_raw(self: Query, **kwargs):
+        start, end = self.query['range']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        columns = self.query['columns']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        ranges.append((start, end))
+        rows = [{'s': row['s'], 'd': [row[c] for c in columns]} for row in universe[start:end]]
+        return {'totalCount': len(universe), 'data': rows}
+
+    monkeypatch.setattr(Query, 'get_scanner_data_raw', fake_get_scanner_data_raw)
+    q = Query().select('name').where(col('name').regex('[05]$')).offset(1).limit(6)
+    count, df = q.get_scanner_data()
+    assert df['name'].tolist() == ['T5', 'T10', 'T15', 'T20', 'T25']
+    assert ranges[0] == (0, 12)  # the first page assumes that half of the rows match
+    assert ranges[-1][1] >= 26
+    assert 15 <= count <= 25  # 20 rows match
+    assert df.attrs['count_estimated']
+
+    ranges.clear()
+    q = Query().select('name').where(col('close') / 2 > 45).limit(50)
+    count, df = q.get_scanner_data()
+    assert df.columns.tolist() == ['ticker', 'name']  # without `close`, which wasn't selected
+    assert df['name'].tolist() == [f'T{i}' for i in range(91, 100)]
+    assert ranges[-1][1] >= 100
+    assert count == 9
+    assert 'count_estimated' not in df.attrs
+
+
+def test_residual_filters_are_not_sent(monkeypatch):
+    sent = []
+    monkeypatch.setattr(Query, '_send', lambda self, *args, **kwargs: sent.append(self.query))
+    q = Query().select('name').where(col('name').regex('[05]$'))
+    with pytest.raises(ValueError, match="server can't evaluate"):
+        q.get_scanner_data_raw()
+    assert not sent
+
+    universe = [{'s': f'NASDAQ:T{i}', 'name': f'T{i}', 'close': float(i)} for i in range(10)]
+
+    def fake_get_scanner_data_raw(self: Query, **kwargs):
+        assert not needs_planning(self.query)
+        start, end = self.query['range']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        columns = self.query['columns']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        rows = [{'s': row['s'], 'd': [row[c] for c in columns]} for row in universe[start:end]]
+        return {'totalCount': len(universe), 'data': rows}
+
+    monkeypatch.setattr(Query, 'get_scanner_data_raw', fake_get_scanner_data_raw)
+    ring = RingBuffer(['close'], capacity=4)
+    ring.update(Query().select('close').where(col('close') * 2 > 10))
+    assert sorted(ring.tickers) == ['NASDAQ:T6', 'NASDAQ:T7', 'NASDAQ:T8', 'NASDAQ:T9']
+
+    with DecodePool(max_workers=1) as pool:
+        _, df = pool.fetch(q).result()
+    assert df['name'].tolist() == ['T0', 'T5']
+
+
+def test_unregistered_column_on_the_right(monkeypatch):
+    universe = [
+        {'s': f'NASDAQ:T{i}', 'name': f'T{i}', 'close': 2.0, 'VWAP': 1.0, 'Perf.1Y.MarketCap': i}
+        for i in range(5)
+    ]
+
+    def fake_get_scanner_data_raw(self: Query, **kwargs):
+        start, end = self.query['range']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        columns = self.query['columns']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        rows = [{'s': row['s'], 'd': [row[c] for c in columns]} for row in universe[start:end]]
+        return {'totalCount': len(universe), 'data': rows}
+
+    monkeypatch.setattr(Query, 'get_scanner_data_raw', fake_get_scanner_data_raw)
+    q = Query().select('name').where((col('close') / col('VWAP')) > col('Perf.1Y.MarketCap'))
+    assert plan(q.query).helpers == ['close', 'VWAP', 'Perf.1Y.MarketCap']
+    _, df = q.get_scanner_data()
+    assert df['name'].tolist() == ['T0', 'T1']
+
+
+def test_server_only_operations_in_a_residual_group(monkeypatch):
+    sent = []
+    monkeypatch.setattr(Query, '_send', lambda self, *args, **kwargs: sent.append(self.query))
+    q = Query().where2(Or(col('close').crosses_above(col('VWAP')), col('name').regex('^A')))
+    with pytest.raises(ValueError, match='crosses_above'):
+        q.get_scanner_data()
+    assert not sent
@@ -0,0 +1,95 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from tradingview_screener import sharedmem
+from tradingview_screener.decode import to_dataframe
+from tradingview_screener.models import ScreenerDict, ScreenerDictV2
+from tradingview_screener.pool import DecodePool, _decode_worker
+
+COLUMNS = ['name', 'close', 'volume', 'typespecs', 'earnings_release_next_date', 'is_primary', 'x']
+SCAN: ScreenerDict = {
+    'totalCount': 1234,
+    'data': [
+        {'s': 'NASDAQ:AAPL', 'd': ['AAPL', 210.5, 10, ['common'], 1700000000, True, None]},
+        {'s': 'AMEX:SPY', 'd': [None, None, None, None, None, None, None]},
+        {'s': 'NYSE:KO', 'd': ['KO', 61, 3, ['common'], 1700000001, False, None]},
+    ],
+}
+SCAN2: ScreenerDictV2 = {
+    'totalCount': 2,
+    'time': '2026-04-24T13:45:37Z',
+    'fields': ['strike', 'expiration', 'strike'],
+    'symbols': [
+        {'s': 'OPRA:AAPL260821C200.0', 'f': [200.0, 20260821, 200.0]},
+        {'s': 'OPRA:AAPL260821C205.0', 'f': [205.0, 20260821, 205.0]},
+    ],
+}
+
+
+def _shared_memory_blocks() -> set[str]:
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+
+@pytest.fixture(scope='module')
+def pool():
+    with DecodePool(max_workers=2) as pool:
+        yield pool
+
+
+def test_decode_matches_to_dataframe(pool: DecodePool):
+    before = _shared_memory_blocks()
+    count, df = pool.decode(json.dumps(SCAN).encode(), COLUMNS).result()
+    assert count == 1234
+    pd.testing.assert_frame_equal(df, to_dataframe(SCAN, COLUMNS))
+
+    count, df = pool.decode(json.dumps(SCAN2), screener='options').result()
+    assert count == 2
+    pd.testing.assert_frame_equal(df, to_dataframe(SCAN2, screener='options'))
+    assert df.attrs['time'] == pd.Timestamp('2026-04-24T13:45:37Z')
+    assert _shared_memory_blocks() == before  # the blocks are unlinked
+
+
+def test_decode_empty(pool: DecodePool):
+    empty = {'totalCount': 0, 'data': []}
+    count, df = pool.decode(json.dumps(empty), ['name', 'close'], compact=True).result()
+    assert count == 0
+    assert df.columns.tolist() == ['ticker', 'name', 'close']
+    assert df.empty
+
+
+def test_decode_numeric_strings(pool: DecodePool):
+    # the names of TSE, HKEX, and SSE stocks are digits, but they must stay strings
+    body: ScreenerDict = {
+        'totalCount': 3,
+        'data': [
+            {'s': 'TSE:7203', 'd': ['7203', 'Toyota', 2800.5]},
+            {'s': 'TSE:6758', 'd': ['6758', None, None]},
+            {'s': 'HKEX:700', 'd': [None, 'Tencent', 380]},
+        ],
+    }
+    columns = ['name', 'description', 'close']
+    _, df = pool.decode(json.dumps(body), columns).result()
+    pd.testing.assert_frame_equal(df, to_dataframe(body, columns))
+    assert df['name'].tolist()[:2] == ['7203', '6758']
+
+
+def test_decode_worker_unlinks_the_block_on_failure(monkeypatch):
+    created = []
+    original = sharedmem.create
+
+    def create(size: int, name=None):
+        shm = original(1, name)  # too small for the columns, so writing them fails
+        created.append(shm.name)
+        return shm
+
+    monkeypatch.setattr(sharedmem, 'create', create)
+    before = _shared_memory_blocks()
+    with pytest.raises(ValueError):
+        _decode_worker(json.dumps(SCAN), COLUMNS)
+    assert len(created) == 1
+    assert _shared_memory_blocks() <= before
+    with pytest.raises(FileNotFoundError):
+        sharedmem.attach(created[0])
@@ -300,3 +300,46 @@ def test_and_or_chaining():
     assert query.query['filter2'] == dct  # pyright: ignore [reportTypedDictNotRequiredAccess]
     count, _ = query.get_scanner_data()
     assert count > 0
+
+
+def test_astream(monkeypatch):
+    import asyncio
+    import random
+    import threading
+    import time
+
+    total = 4500
+    ranges = []
+    in_flight = [0, 0]  # current, max
+    lock = threading.Lock()
+
+    def fake_get_scanner_data_raw(self: Query, session=None, **kwargs):
+        start, end = self.query['range']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        with lock:
+            ranges.append((start, end))
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(random.uniform(0, 0.02))  # the pages arrive out of order
+        with lock:
+            in_flight[0] -= 1
+        rows = [{'s': f'NASDAQ:T{i}', 'd': [float(i)]} for i in range(start, min(end, total))]
+        return {'totalCount': total, 'data': rows}
+
+    monkeypatch.setattr(Query, 'get_scanner_data_raw', fake_get_scanner_data_raw)
+
+    async def main(q: Query, **kwargs):
+        return [batch async for batch in q.astream(**kwargs)]
+
+    q = Query().select('close').limit(10_000)
+    batches = asyncio.run(main(q, batch_rows=1000, prefetch=3))
+    assert [len(b) for b in batches] == [1000, 1000, 1000, 1000, 500]
+    assert [b.attrs['offset'] for b in batches] == [0, 1000, 2000, 3000, 4000]
+    assert batches[0].attrs['count'] == total
+    assert [x for b in batches for x in b['close']] == list(range(total))
+    assert in_flight[1] <= 3
+    assert q.query['range'] == [0, 10_000]  # pyright: ignore [reportTypedDictNotRequiredAccess]
+
+    ranges.clear()
+    batches = asyncio.run(main(Query().select('close').offset(4400).limit(4700), batch_rows=70))
+    assert [b.attrs['offset'] for b in batches] == [4400, 4470]
+    assert min(ranges) == (4400, 4470) and max(ranges)[1] <= 4700
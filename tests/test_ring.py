@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradingview_screener.ring import RingBuffer
+
+
+def test_ring_buffer():
+    ring = RingBuffer(['close', 'volume'], capacity=3)
+    for i in range(5):
+        response = {
+            'totalCount': 2,
+            'data': [
+                {'s': 'NASDAQ:AAPL', 'd': ['AAPL', 10.0 + i, 100 * i]},
+                {'s': 'NYSE:KO', 'd': ['KO', None if i == 3 else 20.0, 0]},
+            ][: 1 if i == 1 else 2],
+        }
+        ring.append_response(response, ['name', 'close', 'volume'])  # pyright: ignore
+        ring._times[(ring._count - 1) % ring.capacity] = float(i)
+
+    assert len(ring) == 3
+    assert ring.tickers == ['NASDAQ:AAPL', 'NYSE:KO']
+    assert ring.times().tolist() == [2.0, 3.0, 4.0]
+    np.testing.assert_array_equal(ring.window('close'), [[12, 20], [13, np.nan], [14, 20]])
+    np.testing.assert_array_equal(ring.window('volume', 1), [[400, 0]])
+    assert ring.sliding_windows('close', 2).shape == (2, 2, 2)
+
+    assert ring.mean('close').tolist() == [13, 20]
+    assert ring.velocity('close', 2).tolist() == [1, 0]
+    zscore = ring.zscore('close')
+    assert zscore['NASDAQ:AAPL'] == pytest.approx(1.2247, abs=1e-4)
+    assert np.isnan(zscore['NYSE:KO'])  # no variance
+
+    ring.append(pd.DataFrame({'ticker': ['NYSE:KO', 'NYSE:PEP'], 'close': [21.0, 30.0]}))
+    assert ring.tickers == ['NASDAQ:AAPL', 'NYSE:KO', 'NYSE:PEP']
+    np.testing.assert_array_equal(ring.window('close', 1), [[np.nan, 21, 30]])
+    np.testing.assert_array_equal(ring.window('volume', 1), [[np.nan, np.nan, np.nan]])
+
+
+def test_ring_buffer_scan2_time():
+    ring = RingBuffer(['close'], capacity=2)
+    response = {
+        'totalCount': 1,
+        'time': '2026-04-24T13:45:37Z',
+        'fields': ['close'],
+        'symbols': [{'s': 'OPRA:X', 'f': [1.5]}],
+    }
+    ring.append_response(response)  # pyright: ignore [reportArgumentType]
+    assert ring.times().tolist() == [1777038337.0]
+    assert ring.window('close').tolist() == [[1.5]]
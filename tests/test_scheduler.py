@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from tradingview_screener.query import Query
+from tradingview_screener.scheduler import Scheduler
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def fake_get_scanner_data(self: Query, session=None, cache=None, delay=0.0, **kwargs):
+        calls.append((self.query['range'][1], time.monotonic()))  # pyright: ignore
+        time.sleep(delay)
+        if delay < 0:
+            raise ValueError('boom')
+        return 1, pd.DataFrame({'ticker': ['NASDAQ:AAPL']})
+
+    monkeypatch.setattr(Query, 'get_scanner_data', fake_get_scanner_data)
+    return calls
+
+
+def test_phases_are_spread():
+    scheduler = Scheduler()
+    jobs = [scheduler.add(Query().limit(i), interval=10) for i in range(4)]
+    other = scheduler.add(Query(), interval=3, priority=5)
+    assert [job.phase for job in jobs] == [0, 2.5, 5, 7.5]
+    assert other.phase == 0
+
+    first = scheduler.add(Query(), interval=10, priority=1)  # the highest priority goes first
+    assert first.phase == 0
+    assert [job.phase for job in jobs] == [2, 4, 6, 8]
+
+    scheduler.remove(first)
+    assert [job.phase for job in jobs] == [0, 2.5, 5, 7.5]
+    with pytest.raises(ValueError):
+        scheduler.add(Query(), interval=1, name=jobs[0].name)
+
+
+def test_run(calls):
+    results = []
+    scheduler = Scheduler(max_concurrency=2)
+    fast = scheduler.add(Query().limit(1), interval=0.1, callback=results.append)
+    slow = scheduler.add(Query().limit(2), interval=0.1, delay=0.25)
+    failing = scheduler.add(Query().limit(3), interval=0.2, delay=-1)
+
+    async def main():
+        task = asyncio.create_task(scheduler.run())
+        received = []
+        async for result in scheduler.results(fast):
+            received.append(result)
+            if len(received) == 3:
+                break
+        scheduler.stop()
+        await task
+        return received
+
+    received = asyncio.run(main())
+    assert len(received) == 3 and all(r.job is fast and r.count == 1 for r in received)
+    assert len(results) >= 3
+    assert slow.skipped > 0  # the runs due while the previous one was in flight
+    assert slow.runs <= 1
+    assert failing.errors == failing.runs >= 1
+    assert isinstance(failing.last_result.error, ValueError)  # pyright: ignore
+
+    # the runs of the jobs with the same interval are half an interval apart
+    fast_times = [t for limit, t in calls if limit == 1]
+    slow_times = [t for limit, t in calls if limit == 2]
+    assert abs((slow_times[0] - fast_times[0]) - 0.05) < 0.04
+
+
+def test_run_duration(calls):
+    scheduler = Scheduler()
+    job = scheduler.add(Query(), interval=0.05)
+    start = time.monotonic()
+    asyncio.run(scheduler.run(duration=0.22))
+    assert 0.2 <= time.monotonic() - start < 0.5
+    assert 4 <= job.runs <= 6
+
+
+def test_failing_callback(calls):
+    def callback(result):
+        raise RuntimeError('boom')
+
+    scheduler = Scheduler(max_concurrency=2)
+    job = scheduler.add(Query(), interval=0.05, callback=callback)
+    other = scheduler.add(Query().limit(1), interval=0.05)
+    asyncio.run(scheduler.run(duration=0.5))
+    assert job.runs >= 8 and job.skipped <= 1  # the workers kept running
+    assert job.callback_errors == job.runs
+    assert isinstance(job.last_callback_error, RuntimeError)
+    assert other.runs >= 8
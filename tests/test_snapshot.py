@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from tradingview_screener.decode import compact_dataframe, to_dataframe
+from tradingview_screener.models import ScreenerDictV2
+from tradingview_screener.snapshot import SnapshotPublisher, SnapshotReader
+
+RESPONSE: ScreenerDictV2 = {
+    'totalCount': 3,
+    'time': '2026-04-24T13:45:37Z',
+    'fields': ['name', 'close', 'volume', 'typespecs', 'earnings_release_next_date', 'is_primary'],
+    'symbols': [
+        {'s': 'NASDAQ:AAPL', 'f': ['AAPL', 210.5, 10, ['common'], 1700000000, True]},
+        {'s': 'AMEX:SPY', 'f': [None, None, None, None, None, None]},
+        {'s': 'NYSE:KO', 'f': ['KO', 61.25, 3, ['common'], 1700000001, False]},
+    ],
+}
+
+
+def _name() -> str:
+    return f'tvs-test-{uuid.uuid4().hex[:8]}'
+
+
+def _read_close_sum(name: str) -> float:
+    with SnapshotReader(name) as reader:
+        snapshot = reader.latest()
+        assert snapshot is not None
+        return float(np.nansum(snapshot.arrays['close']))
+
+
+def test_publish_and_read():
+    df = to_dataframe(RESPONSE)
+    name = _name()
+    with SnapshotPublisher(name) as publisher, SnapshotReader(name) as reader:
+        assert reader.latest() is None
+        assert publisher.publish(df) == 1
+
+        snapshot = reader.latest()
+        assert snapshot is not None and snapshot.version == 1
+        out = snapshot.to_dataframe()
+        pd.testing.assert_frame_equal(out, df)
+        assert out.attrs['time'] == df.attrs['time']
+        # the numeric columns are views over the shared memory
+        assert np.shares_memory(out['close'].to_numpy(), snapshot.arrays['close'])
+        assert not snapshot.arrays['close'].flags.writeable
+        assert reader.latest() is snapshot
+
+        compact = compact_dataframe(df).set_index(['ticker'])
+        publisher.publish(compact)
+        publisher.publish(compact)
+        assert reader.version() == 3
+        pd.testing.assert_frame_equal(reader.latest().to_dataframe(), compact)  # pyright: ignore
+        # the first snapshot was unlinked, but it's still mapped by this reader
+        assert out['close'].sum() == 271.75
+
+        # a reader in another process
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(1) as pool:
+            assert pool.apply(_read_close_sum, (name,)) == 271.75
+
+    if os.path.isdir('/dev/shm'):
+        assert not [f for f in os.listdir('/dev/shm') if f.startswith(name)]
+
+
+def test_restart_after_crash():
+    df = to_dataframe(RESPONSE)
+    name = _name()
+    crashed = SnapshotPublisher(name)
+    crashed.publish(df)
+    crashed.publish(df.iloc[:2])
+    # the process died without closing the publisher (and in the middle of an update)
+    crashed._header[1] += 1
+
+    with SnapshotPublisher(name) as publisher, SnapshotReader(name) as reader:
+        assert publisher.version == reader.version() == 2
+        pd.testing.assert_frame_equal(reader.latest().to_dataframe(), df.iloc[:2])  # pyright: ignore
+        assert publisher.publish(df) == 3
+        assert reader.latest().version == 3  # pyright: ignore
+        publisher.publish(df)
+
+    if os.path.isdir('/dev/shm'):
+        assert not [f for f in os.listdir('/dev/shm') if f.startswith(name)]
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from tradingview_screener.query import Query
+from tradingview_screener.topk import top_k
+
+
+@pytest.fixture
+def markets(monkeypatch):
+    rng = random.Random(0)
+    # one market has most of the top rows, and the others have few or none
+    markets = {
+        'america': [rng.uniform(50, 100) for _ in range(500)],
+        'uk': [rng.uniform(0, 60) for _ in range(300)],
+        'japan': [rng.uniform(0, 10) for _ in range(300)],
+        'israel': [*(rng.uniform(0, 5) for _ in range(20)), None, None],
+        'empty': [],
+    }
+
+    def fake_get_scanner_data_raw(self: Query, session=None, **kwargs):
+        market = self.query['markets'][0]  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        sort = self.query['sort']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        assert self.query['columns'][-1] == sort['sortBy']  # pyright: ignore
+        values = markets[market]
+        valid = sorted((v for v in values if v is not None), reverse=sort['sortOrder'] == 'desc')
+        ordered = valid + [None] * (len(values) - len(valid))
+        start, end = self.query['range']  # pyright: ignore [reportTypedDictNotRequiredAccess]
+        rows = [
+            {'s': f'{market}:{i}', 'd': [f'{market}-{v}', v]}
+            for i, v in enumerate(ordered[start:end], start)
+        ]
+        return {'totalCount': len(values), 'data': rows}
+
+    monkeypatch.setattr(Query, 'get_scanner_data_raw', fake_get_scanner_data_raw)
+    return markets
+
+
+@pytest.mark.parametrize('ascending', [False, True])
+def test_top_k(markets, ascending):
+    q = Query().select('name').order_by('Value.Traded', ascending=ascending)
+    count, df = top_k(q, list(markets), k=100, max_workers=2)
+
+    everything = sorted(
+        (v for values in markets.values() for v in values if v is not None),
+        reverse=not ascending,
+    )
+    assert count == sum(map(len, markets.values()))
+    assert df.columns.tolist() == ['ticker', 'name']
+    assert df['name'].tolist() == [
+        f'{ticker.split(":")[0]}-{v}' for ticker, v in zip(df['ticker'], everything[:100])
+    ]
+    naive = 100 * (len(markets) - 1) + 22  # `limit(100)` in every market
+    assert df.attrs['rows_fetched'] < naive
+
+    with pytest.raises(ValueError, match='sort'):
+        top_k(Query().select('name').set_property('sort', None), ['america'], k=10)